@@ -0,0 +1,158 @@
+import argparse
+import itertools
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+from services.nonio_mock import MockNonio  # noqa: E402
+
+EMAIL = "student@student.uc.pt"
+PASSWORD = "password"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the time to enroll against a local mock nonio for each engine and browser."
+    )
+    parser.add_argument("--courses", default="1,5,10,20")
+    parser.add_argument("--engines", default="direct,browser,hybrid")
+    parser.add_argument("--browsers", default="chrome,firefox")
+    parser.add_argument(
+        "--pages",
+        default="lean,full",
+        help="Lean pages skip assets and use the eager page load strategy",
+    )
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--contention", type=float, default=0)
+    parser.add_argument(
+        "--asset-delay",
+        type=float,
+        default=0.2,
+        help="Seconds the stylesheet and font of every page take",
+    )
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="Keep the saved links, session and browsers between repeats, after an untimed first run, instead of starting every repeat cold",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Also write the results to this file")
+    arguments = parser.parse_args()
+
+    courseCounts = [int(count) for count in arguments.courses.split(",")]
+    mock = MockNonio(
+        courses=max(courseCounts),
+        latency=arguments.latency,
+        jitter=arguments.jitter,
+        errorRate=arguments.error_rate,
+        contention=arguments.contention,
+        assetDelay=arguments.asset_delay,
+        email=EMAIL,
+        password=PASSWORD,
+        seed=0,
+    )
+    # The engines read the base URL and data path when imported, so both have to be set first
+    os.environ["PLANNEI_BASE_URL"] = mock.start(port=arguments.port)
+    dataDirectory = tempfile.TemporaryDirectory()
+    os.environ["PLANNEI_DATA_PATH"] = dataDirectory.name
+    from services.browser import BrowserChoice, EnrollmentRun, EngineChoice
+    from services.links import LINKS_PATH
+    from services.plan import PLANS_PATH
+    from services.pool import driverPool
+    from services.sessions import SESSIONS_PATH
+
+    def clearData():
+        """Drops the links, session and plans saved by earlier runs and quits the browsers they left, driver paths and logs are kept."""
+        shutil.rmtree(PLANS_PATH, ignore_errors=True)
+        for path in (LINKS_PATH, SESSIONS_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+        driverPool.clear()
+
+    print(f"Every repeat starts {'warm' if arguments.warm else 'cold'}")
+    results = [
+        "| Engine | Browser | Pages | Courses | Median (s) | Best (s) | Course page (s) | Classes picked |",
+        "| --- | --- | --- | ---: | ---: | ---: | ---: | ---: |",
+    ]
+    print(results[0])
+    print(results[1])
+    with tempfile.TemporaryDirectory() as directory:
+        tablePath = os.path.join(directory, "table.csv")
+        for engine in [
+            EngineChoice(name) for name in arguments.engines.split(",")
+        ]:
+            browsers = (
+                ["-"]
+                if engine == EngineChoice.DIRECT
+                else arguments.browsers.split(",")
+            )
+            pagesModes = (
+                ["-"]
+                if engine == EngineChoice.DIRECT
+                else arguments.pages.split(",")
+            )
+            for browser, pages, count in itertools.product(
+                browsers, pagesModes, courseCounts
+            ):
+                mock.writeTable(tablePath, count)
+                timings: list[float] = []
+                pageTimings: list[float] = []
+                picked = 0
+                clearData()
+                for repeat in range(arguments.repeat + arguments.warm):
+                    if not arguments.warm:
+                        clearData()
+                    mock.reset()
+                    thread = EnrollmentRun(
+                        loginEmail=EMAIL,
+                        loginPassword=PASSWORD,
+                        browserChoice=BrowserChoice(
+                            browser if browser != "-" else "chrome"
+                        ),
+                        headless=True,
+                        dryRun=False,
+                        enrollmentIndex=1,
+                        tablePath=tablePath,
+                        parallelBrowsers=arguments.parallel,
+                        engineChoice=engine,
+                        leanPages=pages != "full",
+                    )
+                    start = time.perf_counter()
+                    thread.run()
+                    if arguments.warm and repeat == 0:
+                        # Only fills the caches the timed runs start from
+                        continue
+                    timings.append(time.perf_counter() - start)
+                    pageTimings.extend(
+                        span["duration"]
+                        for span in thread.timings.spans
+                        if span["name"] == "page"
+                    )
+                    picked = len(mock.picked)
+                pageMedian = (
+                    f"{statistics.median(pageTimings):.3f}"
+                    if pageTimings
+                    else "-"
+                )
+                row = f"| {engine.value} | {browser} | {pages} | {count} | {statistics.median(timings):.3f} | {min(timings):.3f} | {pageMedian} | {picked} |"
+                print(row, flush=True)
+                results.append(row)
+    mock.stop()
+    dataDirectory.cleanup()
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            file.write("\n".join(results) + "\n")
+
+
+if __name__ == "__main__":
+    main()
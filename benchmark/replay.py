@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+from services.recorder import replay  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replays a recorded run through the page parser, without a browser, and shows how long each step took."
+    )
+    parser.add_argument("archive", help="Archive saved by a recorded run")
+    parser.add_argument(
+        "--output", help="Also write what was read from each page to this file"
+    )
+    arguments = parser.parse_args()
+
+    try:
+        run, results = replay(arguments.archive)
+    except ValueError as error:
+        parser.error(str(error))
+    print(
+        f"{run['engine']} run on {run['startedAt']}, {len(results)} pages, {len(run['actions'])} actions, {len(run['responses'])} responses"
+    )
+
+    print("| Kind | Pages | Parse median (ms) | Parse max (ms) |")
+    print("| --- | ---: | ---: | ---: |")
+    kinds: dict[str, list[float]] = {}
+    for result in results:
+        kinds.setdefault(result["kind"], []).append(result["parse"] * 1000)
+    for kind, durations in kinds.items():
+        print(
+            f"| {kind} | {len(durations)} | {statistics.median(durations):.2f} | {max(durations):.2f} |"
+        )
+
+    print("| Phase | Count | Total (s) | Max (s) |")
+    print("| --- | ---: | ---: | ---: |")
+    phases: dict[str, list[float]] = {}
+    for span in run["timings"]["spans"]:
+        phases.setdefault(span["name"], []).append(span["duration"])
+    for name, durations in phases.items():
+        print(
+            f"| {name} | {len(durations)} | {sum(durations):.3f} | {max(durations):.3f} |"
+        )
+
+    for result in results:
+        if result["kind"] == "course" and not result["result"]["coursePage"]:
+            print(
+                f"Course page {result['url']} could not be read, the website may have changed"
+            )
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
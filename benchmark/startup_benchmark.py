@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import window
+imported = time.perf_counter()
+from app import App
+app = App(sys.argv)
+main = window.Window()
+main.show()
+app.processEvents()
+painted = time.perf_counter()
+print(json.dumps({"import": imported - start, "paint": painted - start}))
+main.hide()
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the time to import the window and to first paint it, each in a fresh process."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=1.5,
+        help="Seconds the median time to first paint may take before the benchmark fails",
+    )
+    parser.add_argument("--output", help="Also write the results to this file")
+    arguments = parser.parse_args()
+
+    environment = {**os.environ, "PYTHONPATH": SOURCE_PATH}
+    imports: list[float] = []
+    paints: list[float] = []
+    for _ in range(arguments.repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT],
+            env=environment,
+            cwd=SOURCE_PATH,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # The app logs to the same output, from background threads and processes too
+        timings = json.loads(
+            next(
+                line
+                for line in reversed(result.stdout.splitlines())
+                if line.startswith('{"import"')
+            )
+        )
+        imports.append(timings["import"])
+        paints.append(timings["paint"])
+
+    results = [
+        "| Step | Median (s) | Best (s) |",
+        "| --- | ---: | ---: |",
+        f"| import | {statistics.median(imports):.3f} | {min(imports):.3f} |",
+        f"| first paint | {statistics.median(paints):.3f} | {min(paints):.3f} |",
+    ]
+    print("\n".join(results))
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            file.write("\n".join(results) + "\n")
+
+    if statistics.median(paints) > arguments.budget:
+        print(
+            f"First paint took longer than the {arguments.budget:.2f}s budget"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from PySide6 import QtCore
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon, QPixmap
 
@@ -12,6 +13,24 @@ from config.metadata import (
 )
 
 
+def qMessageHandler(
+    mode: QtCore.QtMsgType, _: QtCore.QMessageLogContext, message: str
+):
+    match mode:
+        case QtCore.QtMsgType.QtDebugMsg:
+            logger.debug(message)
+        case QtCore.QtMsgType.QtInfoMsg:
+            logger.debug(message)
+        case QtCore.QtMsgType.QtWarningMsg:
+            logger.warning(message)
+        case QtCore.QtMsgType.QtCriticalMsg:
+            logger.error(message)
+        case QtCore.QtMsgType.QtFatalMsg:
+            logger.critical(message)
+        case _:
+            logger.trace(message)
+
+
 class App(QApplication):
     """Base application class."""
 
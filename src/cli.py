@@ -0,0 +1,157 @@
+import argparse
+import os
+import sys
+import threading
+from datetime import datetime
+
+from services.browser import EnrollmentRun
+from services.choices import BrowserChoice, EngineChoice
+from services.clock import nextOccurrence
+from utils.log_buffer import LogBuffer
+from utils.logger import LogLevel, quietConsole
+
+EMAIL_VARIABLE = "PLANNEI_EMAIL"
+PASSWORD_VARIABLE = "PLANNEI_PASSWORD"
+
+
+class ConsoleBuffer(LogBuffer):
+    """Prints output lines as they come instead of keeping them for a log view, counting the errors."""
+
+    def __init__(self, echo: bool = True):
+        super().__init__()
+        self.echo = echo
+        self.errors = 0
+
+    def push(self, text: str, level: str):
+        with self.lock:
+            if level == LogLevel.ERROR.value:
+                self.errors += 1
+            if self.echo:
+                print(f"[{level}] {text}", flush=True)
+
+
+def readCredentials(path: str | None) -> tuple[str, str]:
+    """Email and password from a file with one on each line, or from the environment."""
+    email = os.environ.get(EMAIL_VARIABLE, "")
+    password = os.environ.get(PASSWORD_VARIABLE, "")
+    if path:
+        with open(path, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        if len(lines) < 2:
+            raise ValueError(
+                f"{path} needs the email on the first line and the password on the second"
+            )
+        email, password = lines[0].strip(), lines[1]
+    return email, password
+
+
+def parseStart(value: str) -> datetime:
+    for pattern in ("%H:%M:%S", "%H:%M"):
+        try:
+            time = datetime.strptime(value, pattern).time()
+        except ValueError:
+            continue
+        return nextOccurrence(time)
+    raise argparse.ArgumentTypeError(f"{value} is not a time like 09:00:00")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Enrolls in the classes of a schedule table without opening the app window."
+    )
+    parser.add_argument("table", help="CSV or Excel schedule table")
+    parser.add_argument(
+        "--credentials",
+        help=f"File with the email on the first line and the password on the second, {EMAIL_VARIABLE} and {PASSWORD_VARIABLE} are used without it",
+    )
+    parser.add_argument(
+        "--email", help="Overrides the email of the credentials"
+    )
+    parser.add_argument(
+        "--browser",
+        choices=[choice.value for choice in BrowserChoice],
+        default=BrowserChoice.CHROME.value,
+    )
+    parser.add_argument(
+        "--engine",
+        choices=[choice.value for choice in EngineChoice],
+        default=EngineChoice.BROWSER.value,
+    )
+    parser.add_argument(
+        "--headless",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run the browser without a window",
+    )
+    parser.add_argument(
+        "--lean-pages",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Skip page assets and use pages as soon as they are parsed",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--enrollment-index", type=int, default=1)
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument(
+        "--start-at",
+        type=parseStart,
+        help="Log in ahead of time and start enrolling at this time of day",
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="Save the run for replaying"
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Print every log line instead of only the run output",
+    )
+    arguments = parser.parse_args(argv)
+
+    try:
+        email, password = readCredentials(arguments.credentials)
+    except (OSError, ValueError) as error:
+        print(f"Failed to read credentials: {error}", file=sys.stderr)
+        return 2
+    email = arguments.email or email
+    if not email or not password:
+        print(
+            f"An email and password are needed, pass --credentials or set {EMAIL_VARIABLE} and {PASSWORD_VARIABLE}",
+            file=sys.stderr,
+        )
+        return 2
+
+    worker = EnrollmentRun(
+        loginEmail=email,
+        loginPassword=password,
+        browserChoice=BrowserChoice(arguments.browser),
+        headless=arguments.headless,
+        dryRun=arguments.dry_run,
+        enrollmentIndex=arguments.enrollment_index,
+        tablePath=arguments.table,
+        parallelBrowsers=arguments.parallel,
+        engineChoice=EngineChoice(arguments.engine),
+        startAt=arguments.start_at,
+        leanPages=arguments.lean_pages,
+        recordRun=arguments.record,
+    )
+    # The log lines printed while debugging already have the run output
+    output = ConsoleBuffer(echo=not arguments.debug)
+    worker.outputBuffer = output
+    if not arguments.debug:
+        quietConsole()
+
+    # The run goes on a thread of its own so Ctrl+C can stop it cleanly
+    thread = threading.Thread(target=worker.run, name="run")
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        worker.stop()
+        thread.join()
+        return 130
+    return 1 if output.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,5 @@
 import os
-
-from PySide6.QtCore import QStandardPaths
+import sys
 
 # Beware of changing these variable names as they are used in the deployment workflows to get required information
 EXECUTABLE_NAME = "Plannei"
@@ -9,11 +8,26 @@ AUTHOR_DOMAIN = "neiaac.com"
 
 LOGO_PATH = os.path.join("images", "logo.png")
 
-DATA_PATH = os.path.join(
-    QStandardPaths.writableLocation(
-        QStandardPaths.StandardLocation.GenericConfigLocation
-    ),
-    AUTHOR_NAME,
-    EXECUTABLE_NAME,
+
+def configLocation() -> str:
+    """Same folder as the GenericConfigLocation of QStandardPaths, found without Qt for the command line runner."""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        return os.environ.get("LOCALAPPDATA") or os.path.join(
+            home, "AppData", "Local"
+        )
+    if sys.platform == "darwin":
+        return os.path.join(home, "Library", "Preferences")
+    location = os.environ.get("XDG_CONFIG_HOME", "")
+    return (
+        location if os.path.isabs(location) else os.path.join(home, ".config")
+    )
+
+
+DATA_PATH = os.environ.get("PLANNEI_DATA_PATH") or os.path.join(
+    configLocation(), AUTHOR_NAME, EXECUTABLE_NAME
 )
-"""Path to store app data on the system, usually this should not need to be changed."""
+"""Path to store app data on the system, usually this should not need to be changed.
+
+Can be pointed elsewhere with PLANNEI_DATA_PATH, so benchmarks do not touch the caches of the app.
+"""
@@ -1,14 +1,18 @@
+import multiprocessing
 import os
 import sys
 import tempfile
 
-from PySide6 import QtCore
+if __name__ == "__main__":
+    # Spawned engine processes import this module too, keep Qt out of them
+    multiprocessing.freeze_support()
 
-from utils.logger import logger, qMessageHandler
-from app import App
-from window import Window
+    from PySide6 import QtCore
+
+    from utils.logger import logger
+    from app import App, qMessageHandler
+    from window import Window
 
-if __name__ == "__main__":
     with logger.catch():
         QtCore.qInstallMessageHandler(qMessageHandler)
 
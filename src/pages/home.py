@@ -1,4 +1,7 @@
 import os
+from html import escape
+from datetime import datetime
+from typing import TYPE_CHECKING
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -6,8 +9,8 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QFileDialog,
 )
-from PySide6.QtCore import Qt, QUrl
-from PySide6.QtMultimedia import QSoundEffect
+from PySide6.QtCore import Qt, QUrl, QTime, QTimer, QFileSystemWatcher
+from PySide6.QtGui import QTextCursor
 from qfluentwidgets import (
     BodyLabel,
     LineEdit,
@@ -22,33 +25,47 @@ from qfluentwidgets import (
     TextBrowser,
     InfoBar,
     InfoBarPosition,
+    TimePicker,
 )
 
 from app import App
-from services.browser import BrowserThread
+from services.plan import ClassData
+from services.plan_thread import PlanThread
+from services.host import engineProcess
 from utils.data_saver import config
 from utils import file_loader
-from services.browser import BrowserChoice
-from utils.logger import LogLevel
+from services.choices import BrowserChoice, EngineChoice
+from services.clock import nextOccurrence
+from utils.log_buffer import VIEW_LINES
+from utils.logger import logger, LogLevel
+
+if TYPE_CHECKING:
+    # The engines pull in selenium, they are imported when a run starts
+    from PySide6.QtMultimedia import QSoundEffect
+
+    from services.workers import ProcessWorker
+
+LOGS_INTERVAL = 100
+"""Milliseconds between log view updates during a run."""
+LOG_COLORS = {
+    LogLevel.ERROR.value: "red",
+    LogLevel.WARNING.value: "olive",
+    LogLevel.SUCCESS.value: "green",
+}
 
 
 class HomePage(QWidget):
-    worker: BrowserThread | None = None
+    worker: "ProcessWorker | None" = None
+    finishSound: "QSoundEffect | None" = None
+    """Created when the first run starts, QtMultimedia is slow to load and only needed once a run ends."""
+    plan: dict[str, ClassData] | None = None
+    """Compiled schedule table of the selected file, None while it is compiling or has errors."""
+    planError: str | None = None
 
     def __init__(self):
         super().__init__()
         self.setObjectName("Home")
 
-        self.finishSound = QSoundEffect()
-        self.finishSound.setSource(
-            QUrl.fromLocalFile(
-                file_loader.getResourcePath(
-                    os.path.join("sounds", "success.wav")
-                )
-            )
-        )
-        self.finishSound.setVolume(0.2)
-
         self.loginEmailLabel = BodyLabel("<b>LOGIN EMAIL<b>")
         self.loginEmailField = LineEdit()
         self.loginEmailField.setMaximumWidth(500)
@@ -57,6 +74,7 @@ class HomePage(QWidget):
             lambda text: config.loginEmail.set(text)
         )
         self.loginEmailField.setText(config.loginEmail.get())
+        self.loginEmailField.editingFinished.connect(self.prepareSession)
         self.loginEmailLayout = QVBoxLayout()
         self.loginEmailLayout.setSpacing(10)
         self.loginEmailLayout.addWidget(self.loginEmailLabel)
@@ -71,6 +89,7 @@ class HomePage(QWidget):
             lambda text: config.loginPassword.set(text)
         )
         self.loginPasswordField.setText(config.loginPassword.get())
+        self.loginPasswordField.editingFinished.connect(self.prepareSession)
         self.loginPasswordLayout = QVBoxLayout()
         self.loginPasswordLayout.setSpacing(10)
         self.loginPasswordLayout.addWidget(self.loginPasswordLabel)
@@ -97,8 +116,10 @@ class HomePage(QWidget):
                 self.browserChoiceCombo.setCurrentIndex(i)
                 break
         self.browserChoiceCombo.currentIndexChanged.connect(
-            lambda: config.browserChoice.set(
-                self.browserChoiceCombo.currentData()
+            lambda: (
+                config.browserChoice.set(self.browserChoiceCombo.currentData()),
+                self.prepareDriver(),
+                self.prewarmBrowser(),
             )
         )
 
@@ -107,11 +128,38 @@ class HomePage(QWidget):
         self.browserChoiceLayout.addWidget(self.browserChoiceLabel)
         self.browserChoiceLayout.addWidget(self.browserChoiceCombo)
 
+        self.engineChoiceLabel = BodyLabel("<b>ENGINE</b>")
+        self.engineChoiceCombo = ComboBox()
+        self.engineChoiceCombo.setMaximumWidth(500)
+        for engine in EngineChoice:
+            self.engineChoiceCombo.addItem(
+                engine.value.title(), userData=engine.value
+            )
+        for i in range(self.engineChoiceCombo.count()):
+            if self.engineChoiceCombo.itemData(i) == config.engineChoice.get():
+                self.engineChoiceCombo.setCurrentIndex(i)
+                break
+        self.engineChoiceCombo.currentIndexChanged.connect(
+            lambda: (
+                config.engineChoice.set(self.engineChoiceCombo.currentData()),
+                self.prepareDriver(),
+                self.prewarmBrowser(),
+            )
+        )
+
+        self.engineChoiceLayout = QVBoxLayout()
+        self.engineChoiceLayout.setSpacing(10)
+        self.engineChoiceLayout.addWidget(self.engineChoiceLabel)
+        self.engineChoiceLayout.addWidget(self.engineChoiceCombo)
+
         self.headlessLabel = BodyLabel("<b>HEADLESS</b>")
         self.headlessCheckBox = CheckBox()
         self.headlessCheckBox.setChecked(config.headless.get())
         self.headlessCheckBox.toggled.connect(
-            lambda checked: config.headless.set(checked)
+            lambda checked: (
+                config.headless.set(checked),
+                self.prewarmBrowser(),
+            )
         )
 
         self.headlessLayout = QVBoxLayout()
@@ -119,6 +167,37 @@ class HomePage(QWidget):
         self.headlessLayout.addWidget(self.headlessLabel)
         self.headlessLayout.addWidget(self.headlessCheckBox)
 
+        self.leanPagesLabel = BodyLabel("<b>LEAN PAGES</b>")
+        self.leanPagesCheckBox = CheckBox()
+        self.leanPagesCheckBox.setToolTip(
+            "Skip stylesheets, fonts, images and analytics and use pages as soon as they are parsed"
+        )
+        self.leanPagesCheckBox.setChecked(config.leanPages.get())
+        self.leanPagesCheckBox.toggled.connect(
+            lambda checked: (
+                config.leanPages.set(checked),
+                self.prewarmBrowser(),
+            )
+        )
+        self.leanPagesLayout = QVBoxLayout()
+        self.leanPagesLayout.setSpacing(10)
+        self.leanPagesLayout.addWidget(self.leanPagesLabel)
+        self.leanPagesLayout.addWidget(self.leanPagesCheckBox)
+
+        self.recordRunsLabel = BodyLabel("<b>RECORD RUNS</b>")
+        self.recordRunsCheckBox = CheckBox()
+        self.recordRunsCheckBox.setToolTip(
+            "Save the pages, actions and timings of each run to an archive in the app data folder, for replaying later"
+        )
+        self.recordRunsCheckBox.setChecked(config.recordRuns.get())
+        self.recordRunsCheckBox.toggled.connect(
+            lambda checked: config.recordRuns.set(checked)
+        )
+        self.recordRunsLayout = QVBoxLayout()
+        self.recordRunsLayout.setSpacing(10)
+        self.recordRunsLayout.addWidget(self.recordRunsLabel)
+        self.recordRunsLayout.addWidget(self.recordRunsCheckBox)
+
         self.dryRunLabel = BodyLabel("<b>DRY RUN</b>")
         self.dryRunCheckBox = CheckBox()
         self.dryRunLayout = QVBoxLayout()
@@ -126,12 +205,30 @@ class HomePage(QWidget):
         self.dryRunLayout.addWidget(self.dryRunLabel)
         self.dryRunLayout.addWidget(self.dryRunCheckBox)
 
+        self.parallelBrowsersLabel = BodyLabel("<b>PARALLEL BROWSERS</b>")
+        self.parallelBrowsersInput = SpinBox()
+        self.parallelBrowsersInput.setFixedWidth(200)
+        self.parallelBrowsersInput.setMinimum(1)
+        self.parallelBrowsersInput.setMaximum(8)
+        self.parallelBrowsersInput.valueChanged.connect(
+            lambda value: config.parallelBrowsers.set(value)
+        )
+        self.parallelBrowsersInput.setValue(config.parallelBrowsers.get())
+        self.parallelBrowsersLayout = QVBoxLayout()
+        self.parallelBrowsersLayout.setSpacing(10)
+        self.parallelBrowsersLayout.addWidget(self.parallelBrowsersLabel)
+        self.parallelBrowsersLayout.addWidget(self.parallelBrowsersInput)
+
         self.configsLayout = FlowLayout()
         self.configsLayout.setVerticalSpacing(20)
         self.configsLayout.setHorizontalSpacing(20)
         self.configsLayout.addItem(self.browserChoiceLayout)
+        self.configsLayout.addItem(self.engineChoiceLayout)
         self.configsLayout.addItem(self.headlessLayout)
+        self.configsLayout.addItem(self.leanPagesLayout)
+        self.configsLayout.addItem(self.recordRunsLayout)
         self.configsLayout.addItem(self.dryRunLayout)
+        self.configsLayout.addItem(self.parallelBrowsersLayout)
 
         self.enrollmentIndexLabel = BodyLabel("<b>ENROLLMENT INDEX</b>")
         self.enrollmentIndexInput = SpinBox()
@@ -147,6 +244,33 @@ class HomePage(QWidget):
         self.enrollmentIndexLayout.addWidget(self.enrollmentIndexLabel)
         self.enrollmentIndexLayout.addWidget(self.enrollmentIndexInput)
 
+        self.startTimeLabel = BodyLabel("<b>SCHEDULED START</b>")
+        self.startTimePicker = TimePicker(showSeconds=True)
+        self.startTimePicker.setTime(
+            QTime.fromString(config.startTime.get(), "HH:mm:ss")
+        )
+        self.startTimePicker.setEnabled(config.scheduledStart.get())
+        self.startTimePicker.timeChanged.connect(
+            lambda time: config.startTime.set(time.toString("HH:mm:ss"))
+        )
+        self.scheduledStartCheckBox = CheckBox()
+        self.scheduledStartCheckBox.setChecked(config.scheduledStart.get())
+        self.scheduledStartCheckBox.toggled.connect(
+            lambda checked: (
+                config.scheduledStart.set(checked),
+                self.startTimePicker.setEnabled(checked),  # type: ignore
+            )
+        )
+        self.startTimeContentLayout = QHBoxLayout()
+        self.startTimeContentLayout.setSpacing(10)
+        self.startTimeContentLayout.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.startTimeContentLayout.addWidget(self.scheduledStartCheckBox)
+        self.startTimeContentLayout.addWidget(self.startTimePicker)
+        self.startTimeLayout = QVBoxLayout()
+        self.startTimeLayout.setSpacing(10)
+        self.startTimeLayout.addWidget(self.startTimeLabel)
+        self.startTimeLayout.addLayout(self.startTimeContentLayout)
+
         self.tableLabel = BodyLabel("<b>SCHEDULE TABLE FILE</b>")
         self.tableFileInput = LineEdit()
         self.tableFileInput.setReadOnly(True)
@@ -154,8 +278,15 @@ class HomePage(QWidget):
         self.tableFileInput.setPlaceholderText("No table file selected.")
         self.tableFileInput.setText(config.tablePath.get())
         self.tableFileInput.textChanged.connect(
-            lambda text: config.tablePath.set(text)
+            lambda text: (
+                config.tablePath.set(text),
+                self.compilePlan(),  # type: ignore
+            )
         )
+        self.tableStatusLabel = BodyLabel()
+        self.tableFileWatcher = QFileSystemWatcher()
+        self.tableFileWatcher.fileChanged.connect(self.compilePlan)
+        self.planThreads: list[PlanThread] = []
         self.tableFileDialog = QFileDialog()
         self.tableFileDialog.setFileMode(QFileDialog.FileMode.ExistingFile)
         self.tableFilePickButton = PrimaryToolButton(FluentIcon.FOLDER)
@@ -175,18 +306,67 @@ class HomePage(QWidget):
         self.tableLayout.setSpacing(10)
         self.tableLayout.addWidget(self.tableLabel)
         self.tableLayout.addLayout(self.tableContentLayout)
+        self.tableLayout.addWidget(self.tableStatusLabel)
+
+        self.manifestLabel = BodyLabel("<b>BATCH MANIFEST FILE</b>")
+        self.manifestFileInput = LineEdit()
+        self.manifestFileInput.setReadOnly(True)
+        self.manifestFileInput.setMaximumWidth(500)
+        self.manifestFileInput.setPlaceholderText("No manifest file selected.")
+        self.manifestFileInput.setToolTip(
+            "A table with Email, Password and Table columns, and optionally Enrollment index, to enroll many accounts in one run"
+        )
+        self.manifestFileInput.setText(config.manifestPath.get())
+        self.manifestFileInput.textChanged.connect(
+            lambda text: config.manifestPath.set(text)
+        )
+        self.manifestFilePickButton = PrimaryToolButton(FluentIcon.FOLDER)
+        self.manifestFilePickButton.clicked.connect(
+            lambda: self.manifestFileInput.setText(
+                self.tableFileDialog.getOpenFileName(
+                    self, "Select a manifest file!"
+                )[0]
+            )
+        )
+        self.manifestFilePickButton.setEnabled(config.batchMode.get())
+        self.batchModeCheckBox = CheckBox()
+        self.batchModeCheckBox.setChecked(config.batchMode.get())
+        self.batchModeCheckBox.toggled.connect(
+            lambda checked: (
+                config.batchMode.set(checked),
+                self.manifestFilePickButton.setEnabled(checked),  # type: ignore
+            )
+        )
+        self.manifestContentLayout = QHBoxLayout()
+        self.manifestContentLayout.setSpacing(10)
+        self.manifestContentLayout.setAlignment(Qt.AlignmentFlag.AlignTop)
+        self.manifestContentLayout.addWidget(self.batchModeCheckBox)
+        self.manifestContentLayout.addWidget(self.manifestFilePickButton)
+        self.manifestContentLayout.addWidget(self.manifestFileInput)
+        self.manifestLayout = QVBoxLayout()
+        self.manifestLayout.setSpacing(10)
+        self.manifestLayout.addWidget(self.manifestLabel)
+        self.manifestLayout.addLayout(self.manifestContentLayout)
 
         self.inputsLayout = QVBoxLayout()
         self.inputsLayout.setSpacing(20)
         self.inputsLayout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.inputsLayout.addLayout(self.enrollmentIndexLayout)
+        self.inputsLayout.addLayout(self.startTimeLayout)
         self.inputsLayout.addLayout(self.tableLayout)
+        self.inputsLayout.addLayout(self.manifestLayout)
 
         self.runLogsBox = TextBrowser()
         self.runLogsBox.setHtml("")
         self.runLogsBox.setMinimumHeight(150)
         self.runLogsBox.setMaximumHeight(300)
         self.runLogsBox.setReadOnly(True)
+        # Older lines are dropped from the view, they are all in the log files
+        self.runLogsBox.document().setMaximumBlockCount(VIEW_LINES)
+        self.runLogsBox.setUndoRedoEnabled(False)
+        self.logsTimer = QTimer(self)
+        self.logsTimer.setInterval(LOGS_INTERVAL)
+        self.logsTimer.timeout.connect(self.flushLogs)
         self.runLogsBox.setPlaceholderText(
             "Press the start button on the left to begin. \
             \nLog output from the run will be shown here. \
@@ -195,6 +375,19 @@ class HomePage(QWidget):
         self.runButton = PrimaryToolButton(FluentIcon.PLAY)
         self.runButton.setFixedWidth(100)
         self.runButton.clicked.connect(self.runBrowser)
+        self.warmUpButton = PrimaryToolButton(FluentIcon.STOP_WATCH)
+        self.warmUpButton.setFixedWidth(100)
+        self.warmUpButton.setToolTip(
+            "Start the browser and log in ahead of time, then press start when the enrollment opens"
+        )
+        self.warmUpButton.clicked.connect(self.warmUpBrowser)
+        self.stopButton = PrimaryToolButton(FluentIcon.CANCEL)
+        self.stopButton.setFixedWidth(100)
+        self.stopButton.setDisabled(True)
+        self.stopButton.setToolTip(
+            "Stop the run and close the browsers it started"
+        )
+        self.stopButton.clicked.connect(self.stopBrowser)
         self.runLogsClearButton = PrimaryToolButton(FluentIcon.DELETE)
         self.runLogsClearButton.setDisabled(True)
         self.runLogsClearButton.setFixedWidth(100)
@@ -208,6 +401,8 @@ class HomePage(QWidget):
         self.runButtonLayout.setSpacing(10)
         self.runButtonLayout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.runButtonLayout.addWidget(self.runButton)
+        self.runButtonLayout.addWidget(self.warmUpButton)
+        self.runButtonLayout.addWidget(self.stopButton)
         self.runButtonLayout.addWidget(self.runLogsClearButton)
         self.runContentLayout = QHBoxLayout()
         self.runContentLayout.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -243,17 +438,119 @@ class HomePage(QWidget):
 
         self.setLayout(self.mainLayout)
 
+        self.compilePlan()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Runs go to their own process, starting it now keeps its imports off the first run
+        engineProcess.start()
+        self.prepareDriver()
+        self.prewarmBrowser()
+        self.prepareSession()
+
+    def prepareSession(self):
+        """Has the engine derive the key of the saved session now, rather than on the way to the login."""
+        email = self.loginEmailField.text().strip()
+        password = self.loginPasswordField.text()
+        if email and password:
+            engineProcess.prepareSession(email, password)
+
+    def prepareDriver(self):
+        """Has the engine look up the driver of the picked browser, Selenium Manager is only loaded there."""
+        if self.engineChoiceCombo.currentData() == EngineChoice.DIRECT.value:
+            return
+        engineProcess.prepareDriver(
+            BrowserChoice(self.browserChoiceCombo.currentData())
+        )
+
+    def prewarmBrowser(self):
+        """Starts a browser in the background for the next run, only headless ones so no window pops up out of nowhere."""
+        if (
+            self.engineChoiceCombo.currentData() == EngineChoice.DIRECT.value
+            or not self.headlessCheckBox.isChecked()
+        ):
+            return
+        engineProcess.prewarm(
+            BrowserChoice(self.browserChoiceCombo.currentData()),
+            self.leanPagesCheckBox.isChecked(),
+        )
+
+    def compilePlan(self):
+        """Compiles the selected table in the background and watches it for changes."""
+        path = self.tableFileInput.text()
+        self.plan = None
+        self.planError = None
+        if self.tableFileWatcher.files():
+            self.tableFileWatcher.removePaths(self.tableFileWatcher.files())
+        if not path:
+            self.tableStatusLabel.setText("")
+            return
+        # Editors often save by replacing the file, which drops it from the watcher
+        self.tableFileWatcher.addPath(path)
+        self.tableStatusLabel.setText(
+            '<font color="gray">Checking table...</font>'
+        )
+
+        thread = PlanThread(path)
+
+        def compiled(path: str, plan: dict[str, ClassData]):
+            if path != self.tableFileInput.text():
+                return
+            self.plan = plan
+            self.tableStatusLabel.setText(
+                f'<font color="green">{len(plan)} courses ready to enroll</font>'
+            )
+
+        def failed(path: str, error: str):
+            if path != self.tableFileInput.text():
+                return
+            self.planError = error
+            self.tableStatusLabel.setText(f'<font color="red">{error}</font>')
+
+        thread.compiledSignal.connect(compiled)
+        thread.failedSignal.connect(failed)
+        thread.finished.connect(lambda: self.planThreads.remove(thread))
+        self.planThreads.append(thread)
+        thread.start()
+
     def runBrowser(self):
         if self.worker is not None and self.worker.isRunning():
+            if self.worker.warmUp:
+                self.worker.trigger()
+                self.runButton.setDisabled(True)
             return
+        self.startWorker(warmUp=False)
+
+    def warmUpBrowser(self):
+        if self.worker is not None and self.worker.isRunning():
+            return
+        self.startWorker(warmUp=True)
+
+    def stopBrowser(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.stop()
+            self.stopButton.setDisabled(True)
+
+    def scheduledStart(self) -> datetime | None:
+        if not self.scheduledStartCheckBox.isChecked():
+            return None
+        return nextOccurrence(self.startTimePicker.getTime().toPython())
 
-        schema = {
-            "Email": self.loginEmailField.text(),
-            "Password": self.loginPasswordField.text(),
-            "Browser choice": self.browserChoiceCombo.currentData(),
-            "Enrollment index": self.enrollmentIndexInput.value(),
-            "Table file": self.tableFileInput.text(),
-        }
+    def startWorker(self, warmUp: bool):
+        batchMode = self.batchModeCheckBox.isChecked()
+        if batchMode:
+            schema = {
+                "Browser choice": self.browserChoiceCombo.currentData(),
+                "Manifest file": self.manifestFileInput.text(),
+            }
+        else:
+            schema = {
+                "Email": self.loginEmailField.text(),
+                "Password": self.loginPasswordField.text(),
+                "Browser choice": self.browserChoiceCombo.currentData(),
+                "Enrollment index": self.enrollmentIndexInput.value(),
+                "Table file": self.tableFileInput.text(),
+            }
         for input in schema:
             if not schema[input]:
                 InfoBar.error(
@@ -266,35 +563,133 @@ class HomePage(QWidget):
                 )
                 return
 
-        self.runButton.setDisabled(True)
+        if not batchMode and self.planError is not None:
+            InfoBar.error(
+                title="Table file has errors!",
+                content=self.planError,
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=4000,
+                parent=self,
+            )
+            return
 
-        self.worker = BrowserThread(
-            loginEmail=self.loginEmailField.text(),
-            loginPassword=self.loginPasswordField.text(),
-            browserChoice=BrowserChoice(self.browserChoiceCombo.currentData()),
-            headless=self.headlessCheckBox.isChecked(),
-            dryRun=self.dryRunCheckBox.isChecked(),
-            enrollmentIndex=self.enrollmentIndexInput.value(),
-            tablePath=self.tableFileInput.text(),
-        )
+        startAt = self.scheduledStart()
+
+        from services.workers import ProcessWorker
+
+        self.loadFinishSound()
+        self.warmUpButton.setDisabled(True)
+        self.stopButton.setDisabled(False)
+        if not warmUp and startAt is None:
+            self.runButton.setDisabled(True)
+
+        if batchMode:
+            self.worker = ProcessWorker(
+                command="batch",
+                manifestPath=self.manifestFileInput.text(),
+                browserChoice=BrowserChoice(
+                    self.browserChoiceCombo.currentData()
+                ),
+                headless=self.headlessCheckBox.isChecked(),
+                dryRun=self.dryRunCheckBox.isChecked(),
+                parallelBrowsers=self.parallelBrowsersInput.value(),
+                engineChoice=EngineChoice(self.engineChoiceCombo.currentData()),
+                warmUp=warmUp,
+                startAt=startAt,
+                leanPages=self.leanPagesCheckBox.isChecked(),
+                recordRuns=self.recordRunsCheckBox.isChecked(),
+            )
+        else:
+            self.worker = ProcessWorker(
+                loginEmail=self.loginEmailField.text(),
+                loginPassword=self.loginPasswordField.text(),
+                browserChoice=BrowserChoice(
+                    self.browserChoiceCombo.currentData()
+                ),
+                headless=self.headlessCheckBox.isChecked(),
+                dryRun=self.dryRunCheckBox.isChecked(),
+                enrollmentIndex=self.enrollmentIndexInput.value(),
+                tablePath=self.tableFileInput.text(),
+                parallelBrowsers=self.parallelBrowsersInput.value(),
+                engineChoice=EngineChoice(self.engineChoiceCombo.currentData()),
+                warmUp=warmUp,
+                startAt=startAt,
+                plan=self.plan,
+                leanPages=self.leanPagesCheckBox.isChecked(),
+                recordRun=self.recordRunsCheckBox.isChecked(),
+            )
 
-        def output(text: str, level: LogLevel):
-            if level == LogLevel.ERROR.value:
-                self.runLogsBox.append(f'<font color="red">{text}</font>')
-            elif level == LogLevel.WARNING.value:
-                self.runLogsBox.append(f'<font color="olive">{text}</font>')
-            elif level == LogLevel.SUCCESS.value:
-                self.runLogsBox.append(f'<font color="green">{text}</font>')
-            else:
-                self.runLogsBox.append(f'<font color="gray">{text}</font>')
-            self.runLogsClearButton.setDisabled(False)
+        def timings(phases: list[dict]):
+            if not phases:
+                return
+            parts = []
+            for phase in phases:
+                if phase["count"] > 1:
+                    parts.append(
+                        f"{phase['name']} ×{phase['count']} total {phase['total']:.2f}s (max {phase['max']:.2f}s)"
+                    )
+                else:
+                    parts.append(f"{phase['name']} {phase['total']:.2f}s")
+            # Lines still in the buffer came before the timings
+            self.flushLogs()
+            self.appendLogs(
+                [(f"Timings: {', '.join(parts)}", LogLevel.INFO.value)]
+            )
 
-        self.worker.outputSignal.connect(output)
+        self.worker.timingsSignal.connect(timings)
 
         def finished():
+            self.logsTimer.stop()
+            self.flushLogs()
             self.runButton.setDisabled(False)
+            self.warmUpButton.setDisabled(False)
+            self.stopButton.setDisabled(True)
             App.alert(self, 0)
-            self.finishSound.play()
+            if self.finishSound is not None:
+                self.finishSound.play()
 
         self.worker.finished.connect(finished)
+        self.logsTimer.start()
         self.worker.start()
+
+    def loadFinishSound(self):
+        if self.finishSound is not None:
+            return
+        try:
+            from PySide6.QtMultimedia import QSoundEffect
+        except ImportError as error:
+            logger.warning(f"Finish sound is not available: {error}")
+            return
+        self.finishSound = QSoundEffect(self)
+        self.finishSound.setSource(
+            QUrl.fromLocalFile(
+                file_loader.getResourcePath(
+                    os.path.join("sounds", "success.wav")
+                )
+            )
+        )
+        self.finishSound.setVolume(0.2)
+
+    def flushLogs(self):
+        if self.worker is not None:
+            self.appendLogs(self.worker.outputBuffer.drain())
+
+    def appendLogs(self, lines: list[tuple[str, str]]):
+        """Adds output lines to the log view in a single edit, following them only if it was scrolled to the end."""
+        if not lines:
+            return
+        scrollBar = self.runLogsBox.verticalScrollBar()
+        following = scrollBar.value() == scrollBar.maximum()
+        cursor = QTextCursor(self.runLogsBox.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for text, level in lines:
+            if not self.runLogsBox.document().isEmpty():
+                cursor.insertBlock()
+            color = LOG_COLORS.get(level, "gray")
+            cursor.insertHtml(f'<font color="{color}">{escape(text)}</font>')
+        cursor.endEditBlock()
+        if following:
+            scrollBar.setValue(scrollBar.maximum())
+        self.runLogsClearButton.setDisabled(False)
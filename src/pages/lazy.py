@@ -0,0 +1,23 @@
+from typing import Callable
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout
+
+
+class LazyPage(QWidget):
+    """Holds the place of a page in the navigation and only builds it the first time it is shown."""
+
+    def __init__(self, name: str, build: Callable[[], QWidget]):
+        super().__init__()
+        self.setObjectName(name)
+        self.build = build
+        self.page: QWidget | None = None
+
+        self.mainLayout = QVBoxLayout()
+        self.mainLayout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.mainLayout)
+
+    def showEvent(self, event):
+        if self.page is None:
+            self.page = self.build()
+            self.mainLayout.addWidget(self.page)
+        super().showEvent(event)
@@ -0,0 +1,240 @@
+import ctypes
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import TypedDict
+
+from services.browser import BrowserChoice, EnrollmentRun, EngineChoice
+from services.plan import readRecords
+from utils.log_buffer import LogBuffer
+from utils.logger import logger, LogLevel
+
+BROWSER_MEMORY = 600 * 1024**2
+"""Bytes a logged in browser with one course page open needs."""
+DIRECT_SLOTS_PER_CORE = 4
+"""Accounts run at once per core by the direct engine, which mostly waits on the network."""
+
+MANIFEST_COLUMNS = ("Email", "Password", "Table")
+"""Columns every batch manifest needs, an Enrollment index column is optional."""
+
+
+class Account(TypedDict):
+    email: str
+    password: str
+    tablePath: str
+    enrollmentIndex: int
+
+
+def totalMemory() -> int | None:
+    """Bytes of physical memory on this machine, None if it can not be told."""
+    if sys.platform == "win32":
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):  # type: ignore
+            return status.ullTotalPhys
+        return None
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def defaultSlots(
+    engineChoice: EngineChoice,
+    browserChoice: BrowserChoice,
+    parallelBrowsers: int,
+) -> int:
+    """Accounts that can run at once without the browsers starving each other of cores or memory."""
+    cores = os.cpu_count() or 1
+    if engineChoice == EngineChoice.DIRECT:
+        return cores * DIRECT_SLOTS_PER_CORE
+    # A race starts the same browsers once for every racer
+    browsers = parallelBrowsers * len(browserChoice.browsers())
+    slots = cores // browsers
+    memory = totalMemory()
+    if memory is not None:
+        # Half the memory is left to the system and the app itself
+        slots = min(slots, memory // 2 // (BROWSER_MEMORY * browsers))
+    return max(1, slots)
+
+
+def readManifest(path: str) -> list[Account]:
+    """Reads the accounts of a batch, table paths are relative to the manifest."""
+    records, headers = readRecords(path)
+    missing = [column for column in MANIFEST_COLUMNS if column not in headers]
+    if missing:
+        raise ValueError(f"Manifest is missing columns {', '.join(missing)}")
+    folder = os.path.dirname(os.path.abspath(path))
+    accounts: list[Account] = []
+    for record in records:
+        email = str(record["Email"]).strip()
+        if not email:
+            continue
+        index = str(record.get("Enrollment index") or "1").strip()
+        accounts.append(
+            {
+                "email": email,
+                "password": str(record["Password"]),
+                "tablePath": os.path.join(folder, str(record["Table"]).strip()),
+                "enrollmentIndex": int(index),
+            }
+        )
+    return accounts
+
+
+class BatchRun:
+    """Enrolls every account of a manifest, starting the next one as soon as a slot frees up.
+
+    Runs on whichever thread calls run, the app sends batches to the engine process like single runs.
+    """
+
+    def __init__(
+        self,
+        manifestPath: str,
+        browserChoice: BrowserChoice,
+        headless: bool,
+        dryRun: bool,
+        parallelBrowsers: int = 1,
+        engineChoice: EngineChoice = EngineChoice.BROWSER,
+        warmUp: bool = False,
+        startAt: datetime | None = None,
+        slots: int | None = None,
+        leanPages: bool = True,
+        recordRuns: bool = False,
+    ):
+        self.manifestPath = manifestPath
+        self.browserChoice = browserChoice
+        self.headless = headless
+        self.dryRun = dryRun
+        self.parallelBrowsers = max(1, parallelBrowsers)
+        self.engineChoice = engineChoice
+        self.startAt = startAt
+        self.warmUp = warmUp or startAt is not None
+        self.leanPages = leanPages
+        self.recordRuns = recordRuns
+        self.slots = slots or defaultSlots(
+            engineChoice, browserChoice, self.parallelBrowsers
+        )
+        self.startEvent = threading.Event()
+        self.stopEvent = threading.Event()
+        self.lock = threading.Lock()
+        self.workers: list[EnrollmentRun] = []
+        self.outputBuffer = LogBuffer()
+        self.results: dict[str, dict[str, str | None]] = {}
+        """Final choices of every account that was run, by email."""
+
+    def output(self, text: str, level: LogLevel = LogLevel.INFO):
+        logger.log(level.value, text)
+        self.outputBuffer.push(text, level.value)
+
+    def trigger(self):
+        """Lets every warmed up account continue, and the ones still queued skip the wait."""
+        with self.lock:
+            self.startEvent.set()
+            for worker in self.workers:
+                worker.trigger()
+
+    def stop(self):
+        """Stops every running account and skips the ones still queued."""
+        with self.lock:
+            self.stopEvent.set()
+            for worker in self.workers:
+                worker.stop()
+
+    def run(self):
+        self.results = {}
+        try:
+            accounts = readManifest(self.manifestPath)
+        except Exception as error:
+            self.output(f"Failed to load manifest: {error}", LogLevel.ERROR)
+            return
+        if not accounts:
+            self.output("Given manifest has no accounts", LogLevel.ERROR)
+            return
+
+        slots = min(self.slots, len(accounts))
+        self.output(
+            f"{'[DRY-RUN] ' if self.dryRun else ''}Enrolling {len(accounts)} accounts, {slots} at a time"
+        )
+        with ThreadPoolExecutor(max_workers=slots) as pool:
+            for number, account in enumerate(accounts, 1):
+                pool.submit(self.runAccount, number, len(accounts), account)
+
+        enrolled = sum(1 for picked in self.results.values() if picked)
+        if self.stopEvent.is_set():
+            self.output(
+                f"Batch stopped after {len(self.results)} of {len(accounts)} accounts",
+                LogLevel.WARNING,
+            )
+        self.output(
+            f"Batch completed, {enrolled} of {len(accounts)} accounts got classes",
+            LogLevel.SUCCESS if enrolled == len(accounts) else LogLevel.WARNING,
+        )
+        for account in accounts:
+            picked = self.results.get(account["email"])
+            if picked:
+                self.output(
+                    f"{account['email']}: {', '.join(f'{className}{preference}' for className, preference in picked.items())}",
+                    LogLevel.SUCCESS,
+                )
+            else:
+                self.output(
+                    f"{account['email']}: no classes were picked",
+                    LogLevel.WARNING,
+                )
+
+    def runAccount(self, number: int, total: int, account: Account):
+        worker = EnrollmentRun(
+            loginEmail=account["email"],
+            loginPassword=account["password"],
+            browserChoice=self.browserChoice,
+            headless=self.headless,
+            dryRun=self.dryRun,
+            enrollmentIndex=account["enrollmentIndex"],
+            tablePath=account["tablePath"],
+            parallelBrowsers=self.parallelBrowsers,
+            engineChoice=self.engineChoice,
+            warmUp=self.warmUp,
+            startAt=self.startAt,
+            leanPages=self.leanPages,
+            recordRun=self.recordRuns,
+        )
+        worker.outputPrefix = f"[{account['email']}] "
+        worker.outputBuffer = self.outputBuffer
+        with self.lock:
+            if self.stopEvent.is_set():
+                return
+            if self.startEvent.is_set():
+                worker.trigger()
+            self.workers.append(worker)
+
+        self.output(f"Starting account {number} of {total}, {account['email']}")
+        try:
+            worker.run()
+        except Exception as error:
+            worker.output(
+                f"An unexpected error occurred: {error}", LogLevel.ERROR
+            )
+        finally:
+            with self.lock:
+                self.workers.remove(worker)
+                self.results[account["email"]] = worker.picked
+        self.output(
+            f"Finished account {number} of {total}, {account['email']}, {len(worker.picked)} classes picked"
+        )
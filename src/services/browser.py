@@ -1,23 +1,55 @@
 from asyncio import subprocess
+import json
 import random
-from typing import Literal
-from enum import Enum
-from csv import DictReader, __version__ as csv_version
+import threading
+import time
+from datetime import datetime
+from typing import Callable, NoReturn
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, Future, wait
+from functools import partial
+from urllib.parse import urlsplit
 
-from PySide6.QtCore import QThread, Signal
-
-from openpyxl import load_workbook, __version__ as openpyxl_version
 from selenium import webdriver
+from selenium.webdriver.common.bidi.storage import BytesValue, PartialCookie
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
+from services.clock import sleepUntil
+from services.scheduler import EnrollmentQueue
+from services.solver import Timetable
+from services.plan import CLASS_TYPES, ClassData, ClassType, loadPlan
+from services.drivers import DriverPaths, forgetDriver, resolveDriver
+from services.links import EnrollmentLinks, forgetLinks, readLinks, saveLinks
+from services.navigation import Cancelled, Navigator, redirected
+from services.choices import RACERS, BrowserChoice, EngineChoice
+from services.pool import PoolKey, driverPool, poolKey
+from services.nonio import (
+    BASE_URL,
+    LOGIN_URL,
+    ENROLL_URL,
+    NonioSession,
+    Page,
+    PageError,
+    ClassOption,
+    SAVE_ERROR_SELECTOR,
+    samePage,
+    saveError,
+    unkept,
+)
+from services.recorder import Recorder, recordingPath
+from services.sessions import (
+    COOKIE_KEYS,
+    forgetSession,
+    prepareCipher,
+    readSession,
+    saveSession,
+)
+from utils.log_buffer import LogBuffer
 from utils.logger import logger, LogLevel
-
-
-class BrowserChoice(Enum):
-    CHROME = "chrome"
-    FIREFOX = "firefox"
+from utils.timings import LatencyWindow, Timings
 
 
 USER_AGENTS = [
@@ -26,13 +58,243 @@ USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36",
 ]
 
-BASE_URL = "https://inforestudante.uc.pt"
-LOGIN_URL = f"{BASE_URL}/nonio/security/login.do"
-ENROLL_URL = f"{BASE_URL}/nonio/inscturmas/init.do"
+KEEPALIVE_INTERVAL = 60
+"""Seconds between the requests that keep a warmed up session from expiring."""
+
+CLOCK_SAMPLES = 8
+"""Requests used to estimate the server clock offset before a scheduled start."""
+CLOCK_SAMPLE_SPACING = 0.3
+"""Seconds between clock samples, not a divisor of one so they land on different sub-second phases."""
+OPENING_POLL_INTERVAL = 0.25
+OPENING_TIMEOUT = 120
+"""Seconds to keep polling for the save button after the scheduled start before going anyway."""
+
+ENROLLMENT_DEADLINE = 300
+"""Seconds after the course work starts when every course still pending is given up on."""
+COURSE_BUDGET = 90
+"""Seconds a single course keeps being retried after its first visit."""
+PAGE_LOAD_TIMEOUT = 15
+"""Seconds before a hung course page is abandoned and retried later."""
+NAVIGATION_TIMEOUT = 120
+"""Seconds to wait for the pages before the course work, which can not be skipped and retried."""
+ELEMENT_TIMEOUT = 10
+"""Seconds to wait for an element a page can not be used without, before any page load was timed."""
+ELEMENT_TIMEOUT_MIN = 2
+ELEMENT_TIMEOUT_MAX = 30
+ELEMENT_POLL_INTERVAL = 0.05
+SLOW_PAGE_RETRIES = 3
+"""Extra waits given to a page that is still loading when its element has not shown up."""
+
+BLOCKED_URLS = (
+    "*.css",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.ico",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+)
+"""Requests lean pages never make, scripts of the site itself are kept since its forms may need them."""
+
+LOGGED_INPUTS = (
+    "browserChoice",
+    "headless",
+    "dryRun",
+    "enrollmentIndex",
+    "tablePath",
+    "parallelBrowsers",
+    "engineChoice",
+    "warmUp",
+    "startAt",
+    "leanPages",
+    "recordRun",
+)
+"""Inputs of a run that go into the log, anything else like the credentials is left out."""
+
+COURSES_SCRIPT = """
+const body = document.querySelector("table.displaytable > tbody");
+if (!body) return null;
+return Array.from(body.querySelectorAll(":scope > tr"), (row) => {
+    const cells = row.querySelectorAll(":scope > td");
+    const link = cells.length > 6 ? cells[6].querySelector("a") : null;
+    // Text content does not depend on stylesheets, which lean pages never load
+    const text = (cell) => cell.textContent.replace(/\\s+/g, " ").trim();
+    return [
+        cells.length > 0 ? text(cells[0]) : "",
+        cells.length > 1 ? text(cells[1]) : "",
+        link ? link.href : null,
+    ];
+});
+"""
+"""Reads the id, name and enrollment link of every course in a single call."""
+
+CLASSES_SCRIPT = """
+const [classTypes, dryRun] = arguments;
+const boxes = [];
+const options = {};
+const tables = document.querySelectorAll('table[class="displaytable"]');
+for (const classType of classTypes) {
+    options[classType] = [];
+    for (const table of tables) {
+        const selector = `input[type="checkbox"][alt="${classType}"]`;
+        if (!table.querySelector(selector)) continue;
+        for (const row of table.querySelectorAll(":scope > tbody > tr")) {
+            const cells = row.querySelectorAll(":scope > td");
+            if (!cells.length) continue;
+            // The class number is the text before the sup tag in the first cell
+            let lead = "";
+            for (const node of cells[0].childNodes) {
+                if (node.nodeName === "SUP") break;
+                lead += node.textContent;
+            }
+            // Dry runs use the preview checkbox so they work even if enrollments are open
+            const preview = cells.length > 1 ? cells[cells.length - 2].querySelector("input") : null;
+            const box = (dryRun && preview) || cells[cells.length - 1].querySelector("input");
+            if (!box) continue;
+            boxes.push(box);
+            options[classType].push({
+                number: lead.split(classType).pop().trim(),
+                checked: box.checked,
+                disabled: box.disabled,
+                index: boxes.length - 1,
+                schedule: cells.length > 2 ? cells[1].textContent.trim() : "",
+            });
+        }
+    }
+}
+return { options, boxes };
+"""
+"""Reads the options of every class type and their checkboxes in a single call."""
+SAVE_ERROR_SCRIPT = (
+    f"return document.querySelector('{SAVE_ERROR_SELECTOR}') !== null;"
+)
+
+
+def cookieDomain() -> str:
+    return urlsplit(BASE_URL).hostname or ""
+
+
+def setupChromium(
+    paths: DriverPaths | None, headless: bool, leanPages: bool
+) -> webdriver.Chrome:
+    options = webdriver.ChromeOptions()
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-setuid-sandbox")
+    options.add_argument("--disable-popup-blocking")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-notifications")
+    options.add_argument("--disable-default-apps")
+    options.add_argument("--mute-audio")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--remote-allow-origins=*")
+    options.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
+    if headless:
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--headless")
+    else:
+        options.add_argument("--start-maximized")
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    if leanPages:
+        options.page_load_strategy = "eager"
+    options.enable_bidi = True
+    if paths:
+        options.binary_location = paths["browserPath"]
+    service = webdriver.ChromeService(
+        executable_path=paths["driverPath"] if paths else None,
+        log_output=subprocess.DEVNULL,
+    )
+    driver = webdriver.Chrome(options=options, service=service)
+    if leanPages:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd(
+            "Network.setBlockedURLs", {"urls": list(BLOCKED_URLS)}
+        )
+    if not headless:
+        driver.maximize_window()
+    return driver
+
+
+def setupFirefox(
+    paths: DriverPaths | None, headless: bool, leanPages: bool
+) -> webdriver.Firefox:
+    options = webdriver.FirefoxOptions()
+    options.set_preference("permissions.default.desktop-notification", 2)
+    options.set_preference("permissions.default.image", 2)
+    options.set_preference("dom.push.enabled", False)
+    options.set_preference("dom.webnotifications.serviceworker.enabled", False)
+    options.set_preference("dom.webnotifications.enabled", False)
+    options.set_preference(
+        "general.useragent.override", random.choice(USER_AGENTS)
+    )
+    if leanPages:
+        # Firefox has no URL block list, so stylesheets and web fonts are turned off instead
+        options.page_load_strategy = "eager"
+        options.set_preference("permissions.default.stylesheet", 2)
+        options.set_preference("gfx.downloadable_fonts.enabled", False)
+        options.set_preference("browser.display.use_document_fonts", 0)
+    if headless:
+        options.add_argument("--width=1920")
+        options.add_argument("--height=1080")
+        options.add_argument("--headless")
+    options.enable_bidi = True
+    if paths:
+        options.binary_location = paths["browserPath"]
+    service = webdriver.FirefoxService(
+        executable_path=paths["driverPath"] if paths else None,
+        log_output=subprocess.DEVNULL,
+    )
+    driver = webdriver.Firefox(options=options, service=service)
+    if not headless:
+        driver.maximize_window()
+    return driver
+
+
+def startBrowser(
+    browserChoice: BrowserChoice, headless: bool, leanPages: bool
+) -> webdriver.Chrome | webdriver.Firefox:
+    """Starts a browser with the driver found for it, looking for the driver again if it fails to start.
+
+    Takes Chrome or Firefox, a race is started by the run as one of each.
+    """
+    setup = (
+        setupChromium if browserChoice == BrowserChoice.CHROME else setupFirefox
+    )
+    paths = resolveDriver(browserChoice.value)
+    try:
+        return setup(paths, headless, leanPages)
+    except Exception as error:
+        if paths is None:
+            raise
+        # The cached driver may not match the browser anymore, look for it again
+        logger.warning(
+            f"Cached driver failed to start, finding it again: {error}"
+        )
+        forgetDriver(browserChoice.value)
+        return setup(resolveDriver(browserChoice.value), headless, leanPages)
+
+
+class CourseNotReady(Exception):
+    """Raised when a course page does not allow saving a schedule yet."""
+
+
+class StaleLink(Exception):
+    """Raised when a course link does not lead to the course page anymore."""
+
 
+class EnrollmentRun:
+    """Enrolls one account, a plain object that works on whichever thread calls run.
 
-class BrowserThread(QThread):
-    outputSignal = Signal(str, str)
+    It is not a Qt thread, the app runs it in the engine process through ProcessWorker in workers.
+    """
 
     def __init__(
         self,
@@ -43,8 +305,14 @@ class BrowserThread(QThread):
         dryRun: bool,
         enrollmentIndex: int,
         tablePath: str,
+        parallelBrowsers: int = 1,
+        engineChoice: EngineChoice = EngineChoice.BROWSER,
+        warmUp: bool = False,
+        startAt: datetime | None = None,
+        plan: dict[str, ClassData] | None = None,
+        leanPages: bool = True,
+        recordRun: bool = False,
     ):
-        super().__init__()
         self.loginEmail = loginEmail
         self.loginPassword = loginPassword
         self.browserChoice = browserChoice
@@ -52,253 +320,715 @@ class BrowserThread(QThread):
         self.enrollmentIndex = enrollmentIndex
         self.tablePath = tablePath
         self.dryRun = dryRun
+        self.parallelBrowsers = max(1, parallelBrowsers)
+        self.engineChoice = engineChoice
+        self.startAt = startAt
+        self.warmUp = warmUp or startAt is not None
+        self.plan = plan
+        """Schedule table compiled ahead of time, read from the table file if missing."""
+        self.leanPages = leanPages
+        """Pages are used once their HTML is parsed, without waiting on or fetching assets."""
+        self.recordRun = recordRun
+        """Pages, actions and timings of the run are saved to an archive that can be replayed."""
+        self.recorder: Recorder | None = None
+        self.startEvent = threading.Event()
+        self.stopEvent = threading.Event()
+        self.queue: EnrollmentQueue | None = None
+        self.timings = Timings()
+        self.latency = LatencyWindow()
+        self.navigators: dict[int, Navigator | None] = {}
+        self.browsers: dict[int, BrowserChoice] = {}
+        """Browser each driver was started as, to give it back to the right spot in the pool."""
+        self.racing: Future | None = None
+        """Browser that lost the race to start, it only helps with the course work if it is ready by then."""
+        self.linksLock = threading.Lock()
+        self.rewalk: Callable[[], EnrollmentLinks | None] | None = None
+        """Finds the course links again, set while the ones in use were saved by an earlier run."""
+        self.freshLinks: EnrollmentLinks | None = None
+        self.timetable = Timetable()
+        """Slots held by the classes picked so far, so courses never clash with each other."""
+        self.picked: dict[str, str | None] = {}
+        """Final choice of every class, filled in once the course work ends."""
+        self.outputPrefix = ""
+        """Put before every output line, to tell runs sharing a log apart."""
+        self.outputBuffer = LogBuffer()
+        """Output lines waiting to be shown, drained by the log view."""
+        self.onTimings: Callable[[list[dict]], None] | None = None
+        """Called with the timings summary once the run ends."""
 
     def output(self, text: str, level: LogLevel = LogLevel.INFO):
+        text = self.outputPrefix + text
         logger.log(level.value, text)
-        self.outputSignal.emit(text, level.value)
+        self.outputBuffer.push(text, level.value)
 
-    def readTable(self) -> tuple[list[dict[str, str]], list[str]]:
-        if self.tablePath.endswith(".csv"):
-            logger.info(
-                f"Using native CSV {csv_version} module to read {self.tablePath}"
-            )
-            records = []
-            with open(self.tablePath, mode="r", encoding="utf-8") as csvfile:
-                reader = DictReader(csvfile)
-                headers = reader.fieldnames
-                if not headers:
-                    raise ValueError("CSV file has no headers")
-                logger.info(f"Headers found in CSV: {len(headers)}")
-                for row in reader:
-                    records.append(
-                        {
-                            key: (value if value else "")
-                            for key, value in row.items()
-                        }
-                    )
-        elif self.tablePath.endswith(".xlsx"):
-            logger.info(
-                f"Using openpyxl {openpyxl_version} to read {self.tablePath}"
+    def trigger(self):
+        """Lets a warmed up run continue to the course pages."""
+        self.startEvent.set()
+
+    def stop(self):
+        """Asks the run to stop, it ends at its next step and closes everything it started."""
+        self.stopEvent.set()
+        # Wakes up the warm up waits, which check for the stop before going on
+        self.startEvent.set()
+        for navigator in list(self.navigators.values()):
+            if navigator is not None:
+                navigator.cancel()
+        if self.queue is not None:
+            self.queue.stop()
+
+    def checkStopped(self):
+        if self.stopEvent.is_set():
+            raise Cancelled("Run was stopped")
+
+    def waitForStart(
+        self,
+        keepalive: Callable[[], object],
+        session: NonioSession,
+        probeUrl: str | None,
+    ):
+        if not self.warmUp or self.startEvent.is_set():
+            return
+        if self.startAt is None:
+            self.output(
+                "Warm up complete, press start when the enrollment opens",
+                LogLevel.SUCCESS,
             )
-            workbook = load_workbook(filename=self.tablePath, data_only=True)
-            logger.info(
-                f"Loaded workbook with {len(workbook.sheetnames)} sheets"
+            while not self.startEvent.wait(KEEPALIVE_INTERVAL):
+                self.keepAlive(keepalive)
+            self.checkStopped()
+            self.output("Starting enrollment")
+            return
+
+        self.output("Estimating the server clock offset")
+        for _ in range(CLOCK_SAMPLES):
+            try:
+                session.get(probeUrl or ENROLL_URL)
+            except Exception as error:
+                logger.warning(f"Failed to sample the server clock: {error}")
+            if self.stopEvent.wait(CLOCK_SAMPLE_SPACING):
+                self.checkStopped()
+        if session.clock.samples:
+            self.output(
+                f"Server clock is {session.clock.offset * 1000:+.0f} ms from the local clock, within {session.clock.uncertainty * 1000:.0f} ms"
             )
-            sheet = workbook.active
-            if not sheet:
-                raise ValueError("Excel file has no sheets")
-            logger.info(
-                f"Active sheet: {sheet.title}, {sheet.max_row} rows, {sheet.max_column} columns"
-            )
-            headers = [str(cell.value) for cell in sheet[1] if cell.value]
-            logger.info(f"Headers found: {len(headers)}")
-            if not headers:
-                raise ValueError("Excel file has no headers")
-            records = []
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                logger.debug(f"Row data: {row}")
-                record = {
-                    headers[i]: (value if value else "")
-                    for i, value in enumerate(row)
-                    if i < len(headers)
-                }
-                records.append(record)
         else:
-            raise ValueError("Unsupported file extension")
-
-        return records, list(headers)
-
-    def setupChromium(self) -> webdriver.Chrome:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-setuid-sandbox")
-        options.add_argument("--disable-popup-blocking")
-        options.add_argument("--disable-infobars")
-        options.add_argument("--disable-notifications")
-        options.add_argument("--disable-default-apps")
-        options.add_argument("--mute-audio")
-        options.add_argument("--blink-settings=imagesEnabled=false")
-        options.add_argument("--remote-allow-origins=*")
-        options.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
-        if self.headless:
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--headless")
+            self.output(
+                "Server did not report its time, using the local clock",
+                LogLevel.WARNING,
+            )
+
+        deadline = session.clock.localTime(self.startAt.timestamp())
+        when = f"{self.startAt:%H:%M:%S}"
+        if self.startAt.date() != datetime.now().date():
+            when = f"{self.startAt:%Y-%m-%d} {when}"
+        self.output(
+            f"Warm up complete, enrollment will start at {when}, press start to go now",
+            LogLevel.SUCCESS,
+        )
+        while time.time() < deadline:
+            checkpoint = min(deadline, time.time() + KEEPALIVE_INTERVAL)
+            if not sleepUntil(checkpoint, self.startEvent):
+                self.checkStopped()
+                self.output("Starting enrollment")
+                return
+            if checkpoint < deadline:
+                self.keepAlive(keepalive)
+
+        if self.dryRun or not probeUrl:
+            self.output("Starting enrollment")
+            return
+        self.output("Waiting for the save button to show up")
+        giveUpAt = time.time() + OPENING_TIMEOUT
+        while time.time() < giveUpAt:
+            try:
+                if "botaoGravar" in session.get(probeUrl).ids:
+                    self.output("Enrollment is open, starting")
+                    return
+            except Exception as error:
+                logger.warning(
+                    f"Failed to check if enrollment is open: {error}"
+                )
+            if self.startEvent.wait(OPENING_POLL_INTERVAL):
+                self.checkStopped()
+                self.output("Starting enrollment")
+                return
+        self.output(
+            "Save button did not show up in time, starting anyway",
+            LogLevel.WARNING,
+        )
+
+    def keepAlive(self, keepalive: Callable[[], object]):
+        try:
+            keepalive()
+            logger.debug("Session keepalive sent")
+        except Exception as error:
+            self.output(
+                f"Failed to keep the session alive: {error}",
+                LogLevel.WARNING,
+            )
+
+    def newSession(self, userAgent: str | None) -> NonioSession:
+        session = NonioSession(userAgent, PAGE_LOAD_TIMEOUT)
+        if self.recorder is not None:
+            session.onResponse = self.recorder.response
+        return session
+
+    def snapshot(
+        self,
+        kind: str,
+        source: Page | webdriver.Chrome | webdriver.Firefox,
+        **fields: str | int,
+    ):
+        """Keeps the HTML of a page for replay when the run is recorded."""
+        if self.recorder is None:
+            return
+        if isinstance(source, Page):
+            self.recorder.page(kind, source.url, source.text, **fields)
+        else:
+            self.recorder.page(
+                kind, source.current_url, source.page_source, **fields
+            )
+
+    def act(self, name: str, **fields):
+        if self.recorder is not None:
+            self.recorder.action(name, **fields)
+
+    def poolKey(self, browserChoice: BrowserChoice) -> PoolKey:
+        return poolKey(browserChoice, self.headless, self.leanPages)
+
+    def setupDriver(
+        self, browserChoice: BrowserChoice | None = None
+    ) -> webdriver.Chrome | webdriver.Firefox:
+        browserChoice = browserChoice or self.browserChoice
+        with self.timings.span(
+            "driver",
+            browser=browserChoice.value,
+            pages="lean" if self.leanPages else "full",
+        ) as span:
+            driver = driverPool.acquire(self.poolKey(browserChoice))
+            span["pooled"] = driver is not None
+            if driver is None:
+                driver = startBrowser(
+                    browserChoice, self.headless, self.leanPages
+                )
+                driverPool.track(driver)
+            self.browsers[id(driver)] = browserChoice
+            return driver
+
+    def releaseDriver(self, driver: webdriver.Chrome | webdriver.Firefox):
+        """Hands a browser back to the pool for the next run."""
+        navigator = self.navigators.pop(id(driver), None)
+        if navigator is not None:
+            navigator.close()
+        browserChoice = self.browsers.pop(id(driver), self.browserChoice)
+        driverPool.release(self.poolKey(browserChoice), driver)
+
+    def raceDrivers(
+        self, futures: list[Future]
+    ) -> webdriver.Chrome | webdriver.Firefox:
+        """First of the racing browsers to start, taken out of the futures so the rest are left as helpers.
+
+        The first futures start one of each browser, a failed one is dropped and the race goes
+        on with the other. The loser is kept as a helper if it is ready by the course work.
+        """
+        racers = {
+            future: browserChoice
+            for future, browserChoice in zip(futures, RACERS)
+        }
+        pending = set(racers)
+        error: BaseException = RuntimeError("No browser started")
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                name = racers[future].value.title()
+                if future.exception() is not None:
+                    error = future.exception()  # type: ignore
+                    self.output(
+                        f"{name} failed to start: {error}", LogLevel.WARNING
+                    )
+                    continue
+                self.racing = next(iter(pending), None)
+                self.output(f"{name} won the race to start")
+                return future.result()
+        raise error
+
+    def navigator(
+        self, driver: webdriver.Chrome | webdriver.Firefox
+    ) -> Navigator | None:
+        """BiDi navigation of a driver, None if its browser does not support it."""
+        if id(driver) not in self.navigators:
+            try:
+                self.navigators[id(driver)] = Navigator(driver, self.leanPages)
+            except Exception as error:
+                logger.warning(
+                    f"WebDriver BiDi is not available, navigating with blocking calls: {error}"
+                )
+                self.navigators[id(driver)] = None
+        return self.navigators[id(driver)]
+
+    def load(
+        self,
+        driver: webdriver.Chrome | webdriver.Firefox,
+        url: str,
+        timeout: float = NAVIGATION_TIMEOUT,
+    ) -> list[dict]:
+        """Opens a page and returns the responses that led to it, empty when they can not be seen."""
+        self.checkStopped()
+        start = time.monotonic()
+        navigator = self.navigator(driver)
+        if navigator is not None:
+            responses = navigator.navigate(url, timeout)
         else:
-            options.add_argument("--start-maximized")
-        options.add_experimental_option("excludeSwitches", ["enable-logging"])
-        service = webdriver.ChromeService(log_output=subprocess.DEVNULL)
-        driver = webdriver.Chrome(options=options, service=service)
-        if not self.headless:
-            driver.maximize_window()
-        return driver
-
-    def setupFirefox(self) -> webdriver.Firefox:
-        options = webdriver.FirefoxOptions()
-        options.set_preference("permissions.default.desktop-notification", 2)
-        options.set_preference("permissions.default.image", 2)
-        options.set_preference("dom.push.enabled", False)
-        options.set_preference(
-            "dom.webnotifications.serviceworker.enabled", False
+            driver.get(url)
+            responses = []
+        duration = time.monotonic() - start
+        self.latency.add(duration)
+        self.act(
+            "load",
+            url=url,
+            duration=round(duration, 4),
+            responses=[
+                {
+                    "url": response["response"]["url"],
+                    "status": response["response"]["status"],
+                }
+                for response in responses
+            ],
         )
-        options.set_preference("dom.webnotifications.enabled", False)
-        options.set_preference(
-            "general.useragent.override", random.choice(USER_AGENTS)
+        return responses
+
+    def waitForElement(
+        self,
+        driver: webdriver.Chrome | webdriver.Firefox,
+        selector: str,
+    ) -> WebElement:
+        """Waits for an element the page can not be used without, for longer while the page is still loading.
+
+        Once the page has finished loading a missing element means the selector no longer matches,
+        so that fails right away instead of waiting out every retry.
+        """
+        timeout = self.latency.timeout(
+            ELEMENT_TIMEOUT, ELEMENT_TIMEOUT_MIN, ELEMENT_TIMEOUT_MAX
         )
-        if self.headless:
-            options.add_argument("--width=1920")
-            options.add_argument("--height=1080")
-            options.add_argument("--headless")
-        service = webdriver.FirefoxService(log_output=subprocess.DEVNULL)
-        driver = webdriver.Firefox(options=options, service=service)
-        if not self.headless:
-            driver.maximize_window()
-        return driver
+        retries = 0
+        while True:
+            start = time.monotonic()
+            try:
+                element = WebDriverWait(
+                    driver, timeout, poll_frequency=ELEMENT_POLL_INTERVAL
+                ).until(
+                    lambda driver: self.checkStopped()
+                    or expected_conditions.presence_of_element_located(
+                        (By.CSS_SELECTOR, selector)
+                    )(driver)
+                )
+            except TimeoutException:
+                loading = (
+                    driver.execute_script("return document.readyState")
+                    != "complete"
+                )
+                if not loading or retries == SLOW_PAGE_RETRIES:
+                    logger.warning(
+                        f"Gave up waiting for {selector} at {driver.current_url}, the page {'was still loading' if loading else 'loaded without it'}"
+                    )
+                    raise NoSuchElementException(
+                        f"Message: no such element: Unable to locate element: {selector}"
+                    )
+                retries += 1
+                timeout = min(timeout * 2, ELEMENT_TIMEOUT_MAX)
+                self.output(
+                    f"Page is still loading, waiting up to {timeout:.0f} more seconds for it",
+                    LogLevel.WARNING,
+                )
+                continue
+            self.latency.add(time.monotonic() - start)
+            return element
 
-    def run(self):
+    def copySession(
+        self,
+        source: webdriver.Chrome | webdriver.Firefox,
+        target: webdriver.Chrome | webdriver.Firefox,
+    ):
+        self.addCookies(target, source.get_cookies())
+
+    def addCookies(
+        self, driver: webdriver.Chrome | webdriver.Firefox, cookies: list[dict]
+    ):
+        # Cookies can only be added for the domain the driver is currently on
+        driver.get(BASE_URL)
+        for cookie in cookies:
+            driver.add_cookie(
+                {key: cookie[key] for key in COOKIE_KEYS if key in cookie}
+            )
+
+    def savedSession(self) -> list[dict] | None:
+        """Cookies kept by the last login of the account, tried before logging in again."""
+        cookies = readSession(BASE_URL, self.loginEmail, self.loginPassword)
+        if cookies:
+            self.output("Reusing the session of the last login")
+        return cookies
+
+    def keepSession(self, cookies: list[dict] | None):
+        """Saves the cookies of a login for the next run, or forgets them if the login failed."""
+        if cookies is None:
+            forgetSession(BASE_URL, self.loginEmail)
+            return
+        try:
+            saveSession(BASE_URL, self.loginEmail, self.loginPassword, cookies)
+        except Exception as error:
+            logger.warning(f"Failed to save the login session: {error}")
+
+    def restoreSession(self, driver: webdriver.Chrome | webdriver.Firefox):
+        """Puts the cookies of the last login into a browser before its first page."""
+        cookies = self.savedSession()
+        if not cookies:
+            return
         try:
-            inputs = self.__dict__.copy()
-            inputs.pop("loginEmail", False)
-            inputs.pop("loginPassword", False)
+            # Unlike the classic command, this sets cookies without opening a page of their site
+            for cookie in cookies:
+                driver.storage.set_cookie(
+                    PartialCookie(
+                        cookie["name"],
+                        BytesValue(BytesValue.TYPE_STRING, cookie["value"]),
+                        cookie.get("domain") or cookieDomain(),
+                        cookie.get("path"),
+                        cookie.get("httpOnly"),
+                        cookie.get("secure"),
+                        expiry=cookie.get("expiry"),
+                    )
+                )
+        except Exception:
+            self.addCookies(driver, cookies)
 
+    def run(self):
+        self.timings = Timings()
+        self.latency = LatencyWindow()
+        self.navigators = {}
+        self.browsers = {}
+        self.timetable = Timetable()
+        self.picked = {}
+        try:
+            inputs = {name: getattr(self, name) for name in LOGGED_INPUTS}
             logger.info(
-                f"Starting browser thread with input parameters: {inputs}"
+                f"Starting enrollment run with input parameters: {inputs}"
             )
 
             self.output("...")
+            # The key of the saved session is derived while the table loads and the browser starts
+            prepareCipher(self.loginEmail, self.loginPassword)
+
+            if self.recordRun:
+                try:
+                    self.recorder = Recorder(
+                        recordingPath(),
+                        engine=self.engineChoice.value,
+                        browser=self.browserChoice.value,
+                        dryRun=self.dryRun,
+                        enrollmentIndex=self.enrollmentIndex,
+                        leanPages=self.leanPages,
+                    )
+                    self.output(f"Recording the run to {self.recorder.path}")
+                except OSError as error:
+                    self.output(
+                        f"Failed to start recording, the run will go on without it: {error}",
+                        LogLevel.WARNING,
+                    )
 
             try:
-                rows_dict, headers = self.readTable()
+                self.checkStopped()
+                with self.timings.span("table"):
+                    plan = (
+                        self.plan
+                        if self.plan is not None
+                        else loadPlan(self.tablePath)
+                    )
             except Exception as error:
                 self.output(f"Failed to load table: {error}", LogLevel.ERROR)
                 return
-            logger.info(
-                f"Table loaded, found {len(rows_dict)} {len(rows_dict) == 1 and 'row' or 'rows'}"
+            # Course links and names get filled in, so each run works on a copy
+            classes_dict: dict[str, ClassData] = {
+                classId: dict(classData) for classId, classData in plan.items()
+            }
+            self.output(
+                f"{'[DRY-RUN] ' if self.dryRun else ''}Enrolling in the {len(classes_dict)} classes found in the schedule table",
             )
-            logger.info(f"Table headers read: {headers}")
-            logger.info(f"Table rows read: {rows_dict}")
 
-            if not rows_dict or not headers:
-                self.output("Given table is empty", LogLevel.ERROR)
+            if self.engineChoice == EngineChoice.DIRECT:
+                session = self.newSession(random.choice(USER_AGENTS))
+                try:
+                    self.enrollDirect(session, classes_dict)
+                finally:
+                    session.close()
                 return
-            if len(rows_dict) < 1:
+
+            race = self.browserChoice == BrowserChoice.RACE
+            if race:
                 self.output(
-                    "Given table must have at least 1 row IN addition to the headers",
-                    LogLevel.ERROR,
+                    "Starting Chrome and Firefox, the first one ready logs in"
                 )
-                return
-            expectedColumns = 5
-            if len(headers) != expectedColumns:
+            else:
+                self.output("Starting browser")
+            if self.parallelBrowsers > 1:
                 self.output(
-                    f"Given table must have exactly {expectedColumns} columns",
-                    LogLevel.ERROR,
+                    f"Starting {self.parallelBrowsers - 1} additional browsers in the background"
                 )
-                return
-
-            classes_dict: dict[
-                str,
-                dict[
-                    Literal["href"]
-                    | Literal["className"]
-                    | Literal["PL"]
-                    | Literal["TP"]
-                    | Literal["T"]
-                    | Literal["T/TP"],
-                    str | list[str] | None,
-                ],
-            ] = {}
-            for item in rows_dict:
-                classId = item[headers[0]].replace(" ", "").split("#")[0]
-
-                Pls = (
-                    item[headers[1]].replace(" ", "").split("#")
-                    if item[headers[1]]
-                    else None
-                )
-                Tps = (
-                    item[headers[2]].replace(" ", "").split("#")
-                    if item[headers[2]]
-                    else None
-                )
-                Ts = (
-                    item[headers[3]].replace(" ", "").split("#")
-                    if item[headers[3]]
-                    else None
-                )
-                Ttps = (
-                    item[headers[4]].replace(" ", "").split("#")
-                    if item[headers[4]]
-                    else None
-                )
-
-                classes_dict[classId] = {
-                    "href": None,
-                    "PL": Pls,
-                    "TP": Tps,
-                    "T": Ts,
-                    "T/TP": Ttps,
-                }
-            self.output(
-                f"{'[DRY-RUN] ' if self.dryRun else ''}Enrolling in the {len(classes_dict)} classes found in the schedule table",
+            # Extra browsers start while the main one logs in, so their startup
+            # time is hidden behind the login round trip
+            browsers = (
+                [
+                    RACERS[index % len(RACERS)]
+                    for index in range(max(len(RACERS), self.parallelBrowsers))
+                ]
+                if race
+                else [self.browserChoice] * (self.parallelBrowsers - 1)
             )
-
-            self.output("Starting browser")
+            pool = ThreadPoolExecutor(
+                max_workers=max(self.parallelBrowsers, len(browsers))
+            )
+            helperFutures = [
+                pool.submit(self.setupDriver, browser) for browser in browsers
+            ]
+            helpers: list[webdriver.Chrome | webdriver.Firefox] = []
+            self.racing = None
             try:
-                if self.browserChoice == BrowserChoice.CHROME:
-                    driver = self.setupChromium()
-                elif self.browserChoice == BrowserChoice.FIREFOX:
-                    driver = self.setupFirefox()
-                else:
-                    self.output(
-                        "Invalid browser choice",
-                        LogLevel.ERROR,
-                    )
-                    return
+                driver = (
+                    self.raceDrivers(helperFutures)
+                    if race
+                    else self.setupDriver()
+                )
             except Exception as error:
                 self.output(
                     f"No supported browser found, you need to have the selected browser installed on your system: {error}",
                     LogLevel.ERROR,
                 )
+                self.releaseHelpers(pool, helperFutures, helpers)
                 return
 
-            self.output(f"{driver.name.capitalize()} initialized")
+            try:
+                self.enroll(driver, classes_dict, pool, helperFutures, helpers)
+            finally:
+                self.releaseHelpers(pool, helperFutures, helpers)
+                self.releaseDriver(driver)
+        except Cancelled:
+            self.output("Run stopped", LogLevel.WARNING)
+        except NoSuchElementException as error:
+            self.output(
+                "An element was not found in time on the page, this can mean two things:",
+                LogLevel.ERROR,
+            )
+            self.output(
+                "1. Your browser is either outdated or was too slow on this run, trying again, using a different browser or updating your current browser should fix this",
+                LogLevel.ERROR,
+            )
+            self.output(
+                "2. The website was updated, which means we also need to update the app to fix it, please report this issue to us",
+                LogLevel.ERROR,
+            )
+            if error.msg:
+                self.output(
+                    " ".join(error.msg.split(": ")[2:]).split(";")[0],
+                    LogLevel.ERROR,
+                )
+        except PageError as error:
+            self.output(
+                "The page did not have the expected contents, this can mean the website was updated or is overloaded, please report this issue to us if it persists",
+                LogLevel.ERROR,
+            )
+            self.output(str(error), LogLevel.ERROR)
+        except Exception as error:
+            self.output(
+                f"An unexpected error occurred: {error}",
+                LogLevel.ERROR,
+            )
+        finally:
+            record = self.timings.record()
+            logger.info(f"Run timings: {record}")
+            if self.recorder is not None:
+                self.recorder.close(json.loads(record))
+                self.recorder = None
+            if self.onTimings is not None:
+                self.onTimings(self.timings.summary())
+
+    def releaseHelpers(
+        self,
+        pool: ThreadPoolExecutor,
+        helperFutures: list[Future],
+        helpers: list[webdriver.Chrome | webdriver.Firefox],
+    ):
+        for future in helperFutures:
+            if not future.cancel() and future.exception() is None:
+                helper = future.result()
+                if helper not in helpers:
+                    helpers.append(helper)
+        pool.shutdown(wait=False, cancel_futures=True)
+        for helper in helpers:
+            self.releaseDriver(helper)
+        helpers.clear()
+
+    def enroll(
+        self,
+        driver: webdriver.Chrome | webdriver.Firefox,
+        classes_dict: dict[str, ClassData],
+        pool: ThreadPoolExecutor,
+        helperFutures: list[Future],
+        helpers: list[webdriver.Chrome | webdriver.Firefox],
+    ):
+        self.output(f"{driver.name.capitalize()} initialized")
+        with self.timings.span("login"):
+            self.restoreSession(driver)
             self.output(
                 f"Navigating to {LOGIN_URL.split('/')[-1].split('.')[0]}"
             )
-            driver.get(LOGIN_URL)
+            responses = self.load(driver, LOGIN_URL)
+            navigator = self.navigator(driver)
 
-            if driver.current_url != LOGIN_URL:
+            if (
+                any(redirected(response) for response in responses)
+                if navigator is not None
+                else driver.current_url != LOGIN_URL
+            ):
                 self.output("Already logged in")
             else:
-                username_input = driver.find_element(
-                    By.CSS_SELECTOR, "input#username"
-                )
+                username_input = self.waitForElement(driver, "input#username")
                 password_input = driver.find_element(
                     By.CSS_SELECTOR, "input#password1"
                 )
                 username_input.send_keys(self.loginEmail)
+                self.act("type", target="username")
                 password_input.send_keys(self.loginPassword)
+                self.act("type", target="password")
                 login_button = driver.find_element(
                     By.CSS_SELECTOR, "input[type='submit']"
                 )
+                since = navigator.mark() if navigator is not None else 0
                 login_button.click()
-                if driver.current_url == LOGIN_URL:
+                self.act("click", target="login")
+                if navigator is not None:
+                    # The login form only redirects away when the credentials are right,
+                    # so there is no need to wait for the page it redirects to
+                    response = navigator.waitForResponse(
+                        since,
+                        lambda response: response["request"]["method"]
+                        == "POST",
+                        NAVIGATION_TIMEOUT,
+                    )
+                    failed = not redirected(response)
+                else:
+                    failed = driver.current_url == LOGIN_URL
+                if failed:
+                    self.keepSession(None)
                     self.output(
                         "Login failed, check your credentials and retry",
                         LogLevel.ERROR,
                     )
                     return
                 self.output("Login successful")
+                self.keepSession(driver.get_cookies())
+
+        if self.engineChoice == EngineChoice.HYBRID:
+            self.output("Handing the browser session over to direct requests")
+            session = self.newSession(
+                driver.execute_script("return navigator.userAgent")
+            )
+            session.importCookies(driver.get_cookies())
+            try:
+                self.enrollDirect(session, classes_dict, loggedIn=True)
+            finally:
+                session.close()
+            return
 
+        if self.navigator(driver) is None:
             self.output(f"Now at {driver.current_url.split('/')[-2]}")
+        links = self.courseLinks(partial(self.walkLinks, driver))
+        if links is None:
+            return
+        self.applyLinks(classes_dict, links)
+        if self.rewalk is not None:
+            # Workers can not share the main browser, so stale links are looked up with direct requests
+            self.rewalk = partial(
+                self.walkLinksDetached,
+                driver.get_cookies(),
+                driver.execute_script("return navigator.userAgent"),
+            )
+
+        courses: list[tuple[str, ClassData]] = []
+        for classId, classData in classes_dict.items():
+            if not isinstance(classData["href"], str):
+                self.output(
+                    f"No class found with ID {classId} from schedule table so it will be skipped, check for typos in ID",
+                    LogLevel.WARNING,
+                )
+                continue
+            courses.append((classId, classData))
+
+        # Every ready helper browser gets a copy of the logged in session and takes courses from the queue
+        for future in helperFutures:
+            if future is self.racing and not future.done():
+                self.output(
+                    "The browser that lost the race is still starting, the course work goes on without it"
+                )
+                continue
+            try:
+                helper = future.result()
+            except Exception as error:
+                self.output(
+                    f"An additional browser failed to start and will not be used: {error}",
+                    LogLevel.WARNING,
+                )
+                continue
+            helpers.append(helper)
+        drivers = [driver]
+        for helper in helpers[: max(0, len(courses) - 1)]:
+            try:
+                self.copySession(driver, helper)
+            except Exception as error:
+                self.output(
+                    f"Failed to share the session with an additional browser: {error}",
+                    LogLevel.WARNING,
+                )
+                continue
+            drivers.append(helper)
+        if len(drivers) > 1:
+            self.output(
+                f"Splitting {len(courses)} courses between {len(drivers)} browsers"
+            )
+        for worker in drivers:
+            worker.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+
+        if self.warmUp:
+            probe = NonioSession(
+                driver.execute_script("return navigator.userAgent")
+            )
+            probe.importCookies(driver.get_cookies())
+            try:
+                with self.timings.span("wait"):
+                    self.waitForStart(
+                        driver.refresh,
+                        probe,
+                        str(courses[0][1]["href"]) if courses else None,
+                    )
+            finally:
+                probe.close()
+
+        self.enrollCourses(
+            courses,
+            [partial(self.enrollCourse, worker) for worker in drivers],
+            pool,
+        )
+
+    def walkLinks(
+        self, driver: webdriver.Chrome | webdriver.Firefox
+    ) -> EnrollmentLinks | None:
+        """Finds the course links by going through the enrollment pages, None if the enrollment is missing."""
+        with self.timings.span("enrollments"):
             self.output(f"Navigating to {ENROLL_URL.split('/')[-2]}")
-            driver.get(ENROLL_URL)
+            self.load(driver, ENROLL_URL)
 
-            tableBody = driver.find_element(
-                By.CSS_SELECTOR, "table.displaytable > tbody"
+            tableBody = self.waitForElement(
+                driver, "table.displaytable > tbody"
             )
+            self.snapshot("enrollments", driver)
             try:
                 chosenEnrollment = tableBody.find_element(
                     By.CSS_SELECTOR,
@@ -309,7 +1039,7 @@ class BrowserThread(QThread):
                     f"Failed to find enrollment with index {self.enrollmentIndex}",
                     LogLevel.ERROR,
                 )
-                return
+                return None
 
             chosenEnrollmentText = chosenEnrollment.find_element(
                 By.CSS_SELECTOR, "td:first-child"
@@ -320,182 +1050,597 @@ class BrowserThread(QThread):
 
             if not chosenEnrollmentLink:
                 self.output("No enrollment link found", LogLevel.ERROR)
-                return
+                return None
 
+        with self.timings.span("courses"):
             self.output(f"Proceeding to enrollment in {chosenEnrollmentText}")
-            driver.get(chosenEnrollmentLink)
+            self.load(driver, chosenEnrollmentLink)
+            self.waitForElement(driver, "table.displaytable > tbody")
+            self.snapshot("courses", driver)
 
-            # Parse every row in the courses table body and add the href for that courses enrollment page to the classes_dict
-            tableBody = driver.find_element(
-                By.CSS_SELECTOR, "table.displaytable > tbody"
-            )
-            for row in tableBody.find_elements(By.CSS_SELECTOR, "tr"):
-                cells = row.find_elements(By.CSS_SELECTOR, "td")
-                classId = cells[0].text.strip()
-                className = cells[1].text.strip()
-                href = (
-                    cells[6]
-                    .find_element(By.CSS_SELECTOR, "a")
-                    .get_attribute("href")
+            # Read every row in the courses table body and keep the href for that courses enrollment page
+            rows = driver.execute_script(COURSES_SCRIPT)
+            if rows is None:
+                raise NoSuchElementException(
+                    "Message: no such element: Unable to locate element: table.displaytable > tbody"
                 )
-                if classId in classes_dict:
-                    classes_dict[classId]["href"] = href
-                    classes_dict[classId]["className"] = className
+            return {
+                "enrollmentText": chosenEnrollmentText,
+                "enrollmentLink": chosenEnrollmentLink,
+                "courses": {
+                    classId: {"href": href, "className": className}
+                    for classId, className, href in rows
+                    if href
+                },
+            }
 
-            picked_dict: dict[str, str | None] = {}
+    def enrollCourses(
+        self,
+        courses: list[tuple[str, ClassData]],
+        visitors: list[Callable[[str, ClassData, list[ClassType]], tuple]],
+        pool: ThreadPoolExecutor,
+    ):
+        """Visits every course until all its class types are settled, each visitor working on its own thread."""
+        pending: dict[str, list[ClassType]] = {
+            classId: [
+                classType for classType in CLASS_TYPES if classData[classType]
+            ]
+            for classId, classData in courses
+        }
+        self.checkStopped()
+        queue = EnrollmentQueue(
+            [classId for classId, _ in courses],
+            ENROLLMENT_DEADLINE,
+            COURSE_BUDGET,
+        )
+        self.queue = queue
+        if self.stopEvent.is_set():
+            queue.stop()
+        picked_dict: dict[str, str | None] = {}
+        with self.timings.span("enrollment"):
+            futures = [
+                pool.submit(
+                    self.enrollWorker,
+                    queue,
+                    visitor,
+                    dict(courses),
+                    pending,
+                    picked_dict,
+                )
+                for visitor in visitors
+            ]
+            for future in futures:
+                future.result()
+        self.queue = None
+        self.picked = picked_dict
+        self.checkStopped()
 
-            # TODO: Maybe do this in a while loop untill everything is picked or we run out of attempeted preferences, in case
-            # the saving fails after checking the checkboxes in a class
+        for classId, reason in queue.failed.items():
+            classData = dict(courses)[classId]
+            self.output(
+                f"Gave up on {classData['className']} ({classId}) after {queue.attempts[classId]} attempts, {reason}, may need manual picking",
+                LogLevel.WARNING,
+            )
 
-            for classId, classData in classes_dict.items():
-                if not isinstance(classData["href"], str):
-                    self.output(
-                        f"No class found with ID {classId} from schedule table so it will be skipped, check for typos in ID",
-                        LogLevel.WARNING,
-                    )
-                    continue
-                self.output(f"Proceeding to {classData['className']} schedule")
-
-                # TODO: Maybe this can be improved to use multiple tabs, open all course pages at once in
-                # different tabs and fill the preferences in parallel for each one
-                driver.get(classData["href"])
-
-                if not self.dryRun:
-                    try:
-                        save_button = driver.find_element(By.ID, "botaoGravar")
-                    except Exception:
-                        self.output(
-                            f"Schedule choice for {classData['className']} ({classId}) is not available yet, skipping",
-                            LogLevel.WARNING,
-                        )
-                        continue
-                else:
-                    # Use back button instead of trying to find save in dry run mode
-                    save_button = driver.find_element(By.ID, "botaoVoltar")
-
-                classTypes = ("PL", "TP", "T", "T/TP")
-
-                for classType in classTypes:
-                    if classData[classType]:
-                        classRows = driver.find_elements(
-                            By.CSS_SELECTOR,
-                            f'table[class="displaytable"]:has(input[type="checkbox"][alt="{classType}"]) > tbody > tr',
-                        )
-                        if not classRows:
-                            self.output(
-                                f"Class {classData['className']} ({classId}) had {classType} preferences but there are no {classType} schedules available",
-                                LogLevel.WARNING,
-                            )
-                            continue
-                        self.output(
-                            f"Choosing {classType} schedule for class {classData['className']}"
-                        )
-                        possibilities_dict: dict[str, WebElement] = {}
-                        alreadyPickedNumber: str | None = None
-                        for row in classRows:
-                            cells = row.find_elements(By.TAG_NAME, "td")
-
-                            element = cells[0].get_attribute("innerHTML") or ""
-
-                            classNumberPreference = (
-                                element.split("<sup>")[0]
-                                .split(classType)[-1]
-                                .strip()
-                            )
-
-                            if classNumberPreference not in (
-                                classData[classType] or []
-                            ):
-                                continue
-
-                            # Try to find preview checkbox instead of the real selection checkbox
-                            # so dryRun works even if enrollments are open
-                            if self.dryRun:
-                                try:
-                                    classCheckbox = cells[-2].find_element(
-                                        By.TAG_NAME, "input"
-                                    )
-                                except Exception:
-                                    classCheckbox = cells[-1].find_element(
-                                        By.TAG_NAME, "input"
-                                    )
-                            else:
-                                classCheckbox = cells[-1].find_element(
-                                    By.TAG_NAME, "input"
-                                )
-                            if classCheckbox.get_attribute("checked"):
-                                alreadyPickedNumber = classNumberPreference
-                                possibilities_dict[classNumberPreference] = (
-                                    classCheckbox
-                                )
-                                continue
-                            if classCheckbox.get_attribute("disabled"):
-                                continue
-                            possibilities_dict[classNumberPreference] = (
-                                classCheckbox
-                            )
-                        if not possibilities_dict:
-                            self.output(
-                                "None of the preferences were available, may need manual picking",
-                                LogLevel.WARNING,
-                            )
-                            continue
-                        for classNumberPreference in classData[classType] or []:
-                            if (
-                                classNumberPreference
-                                in possibilities_dict.keys()
-                            ):
-                                if alreadyPickedNumber == classNumberPreference:
-                                    picked_dict[
-                                        f"{classData['className']} {classType}"
-                                    ] = alreadyPickedNumber
-                                    self.output(
-                                        f"Best preference, {classType}{alreadyPickedNumber}, is already picked",
-                                        LogLevel.INFO,
-                                    )
-                                    break
-                                self.output(
-                                    f"Enrolling in {classType}{classNumberPreference}"
-                                )
-                                possibilities_dict[
-                                    classNumberPreference
-                                ].click()
-                                picked_dict[
-                                    f"{classData['className']} {classType}"
-                                ] = classNumberPreference
-                                break
-                save_button.click()
+        self.output(
+            f"Enrollment completed for {len(picked_dict)} classes",
+        )
+        if picked_dict:
             self.output(
-                f"Enrollment completed for {len(picked_dict)} classes",
+                "Final choices were:",
+                LogLevel.SUCCESS,
             )
-            if picked_dict:
+            for className, preference in picked_dict.items():
+                self.output(f"{className}{preference}", LogLevel.SUCCESS)
+
+    def enrollWorker(
+        self,
+        queue: EnrollmentQueue,
+        visitor: Callable[[str, ClassData, list[ClassType]], tuple],
+        courses: dict[str, ClassData],
+        pending: dict[str, list[ClassType]],
+        picked_dict: dict[str, str | None],
+    ):
+        while (classId := queue.next()) is not None:
+            classData = courses[classId]
+            try:
+                with self.timings.span(
+                    "course", course=classId, attempt=queue.attempts[classId]
+                ):
+                    picked, missing = visitor(
+                        classId, classData, pending[classId]
+                    )
+            except CourseNotReady as error:
+                reason = str(error)
+            except StaleLink as error:
+                reason = str(error)
+                self.refreshLink(classId, classData)
+            except Exception as error:
+                reason = (
+                    str(error).strip().splitlines() or [type(error).__name__]
+                )[0]
+                logger.opt(exception=error).debug(
+                    f"Visit to course {classId} failed"
+                )
+                if self.stopEvent.is_set():
+                    queue.done(classId)
+                    return
+            else:
+                picked_dict.update(picked)
+                pending[classId] = missing
+                reason = (
+                    f"no {', '.join(missing)} schedules were found"
+                    if missing
+                    else ""
+                )
+            self.revisit(queue, pending)
+            if not reason:
+                queue.done(classId)
+                continue
+            if queue.retry(classId, reason):
                 self.output(
-                    "Final choices were:",
-                    LogLevel.SUCCESS,
+                    f"Will retry {classData['className']} ({classId}) shortly, {reason}",
+                    LogLevel.WARNING,
                 )
-                for className, preference in picked_dict.items():
-                    self.output(f"{className}{preference}", LogLevel.SUCCESS)
 
-        except NoSuchElementException as error:
+    def revisit(
+        self, queue: EnrollmentQueue, pending: dict[str, list[ClassType]]
+    ):
+        """Brings back the courses whose saved picks have to change for the timetable of every course to fit."""
+        for classId, classTypes in self.timetable.takeRevisits().items():
+            pending[classId] = [
+                classType
+                for classType in CLASS_TYPES
+                if classType in classTypes or classType in pending[classId]
+            ]
             self.output(
-                "An element was not found in time on the page, this can mean two things:",
-                LogLevel.ERROR,
+                f"Will revisit course {classId} to change its {', '.join(sorted(classTypes))} so no classes clash"
             )
-            self.output(
-                "1. Your browser is either outdated or was too slow on this run, trying again, using a different browser or updating your current browser should fix this",
-                LogLevel.ERROR,
+            queue.revisit(classId)
+
+    def enrollCourse(
+        self,
+        driver: webdriver.Chrome | webdriver.Firefox,
+        classId: str,
+        classData: ClassData,
+        classTypes: list[ClassType],
+    ) -> tuple[dict[str, str | None], list[ClassType]]:
+        """Picks the given class types of a course, returns the picks and the class types with no schedules found."""
+        picked_dict: dict[str, str | None] = {}
+        missing: list[ClassType] = []
+
+        self.output(f"Proceeding to {classData['className']} schedule")
+        with self.timings.span("page", course=classId):
+            responses = self.load(
+                driver, str(classData["href"]), PAGE_LOAD_TIMEOUT
+            )
+        status = responses[-1]["response"]["status"] if responses else None
+        if status is not None and status >= 400:
+            self.checkCoursePage(status, driver.current_url, classData)
+
+        try:
+            if not self.dryRun:
+                try:
+                    save_button = driver.find_element(By.ID, "botaoGravar")
+                except NoSuchElementException:
+                    driver.find_element(By.ID, "botaoVoltar")
+                    raise CourseNotReady("schedule choice is not available yet")
+            else:
+                # Use back button instead of trying to find save in dry run mode
+                save_button = driver.find_element(By.ID, "botaoVoltar")
+        except NoSuchElementException:
+            # Every course page has a back button, even before the enrollment opens
+            self.checkCoursePage(status, driver.current_url, classData)
+
+        with self.timings.span("read", course=classId):
+            page = driver.execute_script(
+                CLASSES_SCRIPT, classTypes, self.dryRun
+            )
+        self.snapshot("course", driver, course=classId)
+        boxes: list[WebElement] = page["boxes"]
+        for classType, options in page["options"].items():
+            if not options:
+                missing.append(classType)
+        chosen = self.pickClasses(
+            classId, classData, page["options"], picked_dict
+        )
+        for classType, option in chosen.items():
+            with self.timings.span("pick", course=classId, classType=classType):
+                boxes[option["index"]].click()
+            self.act(
+                "click",
+                target=f"{classType}{option['number']}",
+                course=classId,
+            )
+        with self.timings.span("save", course=classId):
+            if self.dryRun:
+                save_button.click()
+            else:
+                self.confirmSave(
+                    driver,
+                    save_button,
+                    classData,
+                    {
+                        classType: option["number"]
+                        for classType, option in chosen.items()
+                    },
+                )
+        self.act("click", target="save", course=classId)
+        return picked_dict, missing
+
+    def checkCoursePage(
+        self, status: int | None, url: str, classData: ClassData
+    ) -> NoReturn:
+        """Raises why a course page can not be used, StaleLink only when nonio says the link leads nowhere.
+
+        Overloaded servers answer with error pages that have no back button either, those are
+        retried like a course that is not open yet instead of looking the links up again.
+        """
+        if status == 404 or (
+            (status or 200) < 400
+            and not samePage(url, str(classData["href"]))
+            and not samePage(url, LOGIN_URL)
+        ):
+            raise StaleLink("its link did not lead to the course page")
+        raise CourseNotReady(
+            f"the course page answered with status {status}"
+            if status is not None and status >= 400
+            else "the course page did not load properly"
+        )
+
+    def confirmSave(
+        self,
+        driver: webdriver.Chrome | webdriver.Firefox,
+        button: WebElement,
+        classData: ClassData,
+        chosen: dict[str, str],
+    ):
+        """Clicks save and reads the course page back, raising CourseNotReady unless the chosen classes are checked."""
+        navigator = self.navigator(driver)
+        if navigator is not None:
+            since = navigator.mark()
+            button.click()
+            response = navigator.waitForResponse(
+                since,
+                lambda response: response["request"]["method"] == "POST",
+                PAGE_LOAD_TIMEOUT,
+            )
+            status = response["response"]["status"]
+            navigator.waitForPage(response["navigation"], PAGE_LOAD_TIMEOUT)
+        else:
+            courseUrl = driver.current_url
+            button.click()
+            WebDriverWait(
+                driver, PAGE_LOAD_TIMEOUT, poll_frequency=ELEMENT_POLL_INTERVAL
+            ).until(
+                lambda driver: self.checkStopped()
+                or (
+                    driver.current_url != courseUrl
+                    and driver.execute_script("return document.readyState")
+                    == "complete"
+                )
+            )
+            # Without BiDi the status can not be seen, the page read back tells whether it worked
+            status = 200
+        error = saveError(status, driver.execute_script(SAVE_ERROR_SCRIPT))
+        if error is not None:
+            raise CourseNotReady(error)
+        if not chosen:
+            return
+        options = driver.execute_script(CLASSES_SCRIPT, list(chosen), False)[
+            "options"
+        ]
+        if not any(options.values()):
+            # The save led away from the course, so it is opened again to see what was kept
+            self.load(driver, str(classData["href"]), PAGE_LOAD_TIMEOUT)
+            options = driver.execute_script(
+                CLASSES_SCRIPT, list(chosen), False
+            )["options"]
+        missed = unkept(chosen, options)
+        if missed:
+            raise CourseNotReady(
+                f"the save did not keep the {', '.join(missed)} classes"
             )
+
+    def pickClasses(
+        self,
+        classId: str,
+        classData: ClassData,
+        options: dict[ClassType, list[ClassOption]],
+        picked_dict: dict[str, str | None],
+    ) -> dict[ClassType, ClassOption]:
+        """Finds the best options of a course that do not clash with the other courses, returns the ones whose checkbox still has to be clicked."""
+        for classType, typeOptions in options.items():
+            if not typeOptions:
+                self.output(
+                    f"Class {classData['className']} ({classId}) had {classType} preferences but there are no {classType} schedules available",
+                    LogLevel.WARNING,
+                )
+        chosen = self.timetable.pick(
+            classId,
+            {
+                classType: classData[classType] or []  # type: ignore
+                for classType in options
+            },
+            {
+                classType: typeOptions
+                for classType, typeOptions in options.items()
+                if typeOptions
+            },
+        )
+        clicks: dict[ClassType, ClassOption] = {}
+        for classType, typeOptions in options.items():
+            if not typeOptions:
+                continue
+            option = chosen[classType]
             self.output(
-                "2. The website was updated, which means we also need to update the app to fix it, please report this issue to us",
-                LogLevel.ERROR,
+                f"Choosing {classType} schedule for class {classData['className']}"
             )
-            if error.msg:
+            if option is None:
                 self.output(
-                    " ".join(error.msg.split(": ")[2:]).split(";")[0],
+                    "No free schedule fits without clashing, may need manual picking",
+                    LogLevel.WARNING,
+                )
+                continue
+            if option["number"] not in (classData[classType] or []):  # type: ignore
+                self.output(
+                    f"None of the preferences were available without clashing, falling back to {classType}{option['number']}",
+                    LogLevel.WARNING,
+                )
+            picked_dict[f"{classData['className']} {classType}"] = option[
+                "number"
+            ]
+            if option["checked"]:
+                self.output(
+                    f"Best choice, {classType}{option['number']}, is already picked",
+                    LogLevel.INFO,
+                )
+                continue
+            self.output(f"Enrolling in {classType}{option['number']}")
+            clicks[classType] = option
+        return clicks
+
+    def enrollDirect(
+        self,
+        session: NonioSession,
+        classes_dict: dict[str, ClassData],
+        loggedIn: bool = False,
+    ):
+        if not loggedIn:
+            with self.timings.span("login"):
+                self.output(
+                    f"Logging in at {LOGIN_URL.split('/')[-1].split('.')[0]} with direct requests"
+                )
+                session.importCookies(self.savedSession() or [])
+                result = session.login(self.loginEmail, self.loginPassword)
+                if result is None:
+                    self.output("Already logged in")
+                elif not result:
+                    self.keepSession(None)
+                    self.output(
+                        "Login failed, check your credentials and retry",
+                        LogLevel.ERROR,
+                    )
+                    return
+                else:
+                    self.output("Login successful")
+                    self.keepSession(session.exportCookies(cookieDomain()))
+
+        links = self.courseLinks(partial(self.walkLinksDirect, session))
+        if links is None:
+            return
+        self.applyLinks(classes_dict, links)
+
+        with self.timings.span("wait"):
+            self.waitForStart(
+                lambda: session.get(links["enrollmentLink"]),
+                session,
+                next(
+                    (
+                        classData["href"]
+                        for classData in classes_dict.values()
+                        if isinstance(classData["href"], str)
+                    ),
+                    None,
+                ),
+            )
+
+        courses: list[tuple[str, ClassData]] = []
+        for classId, classData in classes_dict.items():
+            if not isinstance(classData["href"], str):
+                self.output(
+                    f"No class found with ID {classId} from schedule table so it will be skipped, check for typos in ID",
+                    LogLevel.WARNING,
+                )
+                continue
+            courses.append((classId, classData))
+
+        # The pooled session is thread safe, so parallel workers only cost connections
+        workers = max(1, min(self.parallelBrowsers, len(courses)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            self.enrollCourses(
+                courses,
+                [partial(self.enrollCourseDirect, session)] * workers,
+                pool,
+            )
+
+    def walkLinksDirect(self, session: NonioSession) -> EnrollmentLinks | None:
+        """Finds the course links like walkLinks does, with direct requests."""
+        with self.timings.span("enrollments"):
+            self.output(f"Navigating to {ENROLL_URL.split('/')[-2]}")
+            page = session.get(ENROLL_URL)
+            self.snapshot("enrollments", page)
+            enrollments = page.enrollments()
+            if not 0 < self.enrollmentIndex <= len(enrollments):
+                self.output(
+                    f"Failed to find enrollment with index {self.enrollmentIndex}",
                     LogLevel.ERROR,
                 )
-        except Exception as error:
+                return None
+            chosenEnrollmentText, chosenEnrollmentLink = enrollments[
+                self.enrollmentIndex - 1
+            ]
+            if chosenEnrollmentLink is None:
+                self.output("No enrollment link found", LogLevel.ERROR)
+                return None
+
+        with self.timings.span("courses"):
+            self.output(f"Proceeding to enrollment in {chosenEnrollmentText}")
+            page = session.get(chosenEnrollmentLink)
+            self.snapshot("courses", page)
+            return {
+                "enrollmentText": chosenEnrollmentText,
+                "enrollmentLink": chosenEnrollmentLink,
+                "courses": page.courseLinks(),
+            }
+
+    def walkLinksDetached(
+        self, cookies: list[dict], userAgent: str
+    ) -> EnrollmentLinks | None:
+        """Finds the course links with a session of its own, for workers that can not use the main browser."""
+        session = self.newSession(userAgent)
+        session.importCookies(cookies)
+        try:
+            return self.walkLinksDirect(session)
+        finally:
+            session.close()
+
+    def courseLinks(
+        self, walk: Callable[[], EnrollmentLinks | None]
+    ) -> EnrollmentLinks | None:
+        """Links of the chosen enrollment, the ones saved by the last run skip the two pages leading to them."""
+        self.checkStopped()
+        self.rewalk = None
+        self.freshLinks = None
+        links = readLinks(BASE_URL, self.loginEmail, self.enrollmentIndex)
+        if links is not None:
             self.output(
-                f"An unexpected error occurred: {error}",
-                LogLevel.ERROR,
+                f"Using the course links saved for {links['enrollmentText']}"
+            )
+            self.rewalk = walk
+            return links
+        links = walk()
+        if links is not None:
+            saveLinks(BASE_URL, self.loginEmail, self.enrollmentIndex, links)
+        return links
+
+    def applyLinks(
+        self, classes_dict: dict[str, ClassData], links: EnrollmentLinks
+    ):
+        for classId, link in links["courses"].items():
+            if classId in classes_dict:
+                classes_dict[classId]["href"] = link["href"]
+                classes_dict[classId]["className"] = link["className"]
+
+    def refreshLink(self, classId: str, classData: ClassData):
+        """Looks up a course link again after a saved one led nowhere, only the first stale course goes through the pages."""
+        with self.linksLock:
+            if self.rewalk is not None:
+                walk, self.rewalk = self.rewalk, None
+                self.output(
+                    "A saved course link is stale, finding the course links again",
+                    LogLevel.WARNING,
+                )
+                forgetLinks(BASE_URL, self.loginEmail, self.enrollmentIndex)
+                self.freshLinks = walk()
+                if self.freshLinks is not None:
+                    saveLinks(
+                        BASE_URL,
+                        self.loginEmail,
+                        self.enrollmentIndex,
+                        self.freshLinks,
+                    )
+            link = (
+                self.freshLinks["courses"].get(classId)
+                if self.freshLinks is not None
+                else None
+            )
+        if link is not None:
+            classData["href"] = link["href"]
+
+    def enrollCourseDirect(
+        self,
+        session: NonioSession,
+        classId: str,
+        classData: ClassData,
+        classTypes: list[ClassType],
+    ) -> tuple[dict[str, str | None], list[ClassType]]:
+        picked_dict: dict[str, str | None] = {}
+        missing: list[ClassType] = []
+
+        self.output(f"Proceeding to {classData['className']} schedule")
+        with self.timings.span("page", course=classId):
+            page = session.get(str(classData["href"]))
+        self.snapshot("course", page, course=classId)
+
+        if page.status >= 400 or "botaoVoltar" not in page.ids:
+            self.checkCoursePage(page.status, page.url, classData)
+        form = page.formWith("botaoGravar")
+        if form is None and not self.dryRun:
+            raise CourseNotReady("schedule choice is not available yet")
+
+        options: dict[ClassType, list[ClassOption]] = {}
+        checkboxes: dict[ClassType, list[dict[str, str]]] = {}
+        for classType in classTypes:
+            options[classType], checkboxes[classType] = page.classOptions(
+                classType, self.dryRun
+            )
+            if not options[classType]:
+                missing.append(classType)
+        chosen = self.pickClasses(classId, classData, options, picked_dict)
+        for classType, option in chosen.items():
+            # Only one class of each type can be kept, like clicking in the page does
+            for checkbox in checkboxes[classType]:
+                if "disabled" not in checkbox:
+                    checkbox.pop("checked", None)
+            checkboxes[classType][option["index"]]["checked"] = "checked"
+
+        if form is not None and not self.dryRun:
+            with self.timings.span("save", course=classId):
+                result = session.submit(page, form, form.element("botaoGravar"))
+            self.act("submit", target="save", course=classId)
+            error = saveError(result.status, result.showsError())
+            if error is not None:
+                raise CourseNotReady(error)
+            self.confirmSaveDirect(
+                session,
+                result,
+                classData,
+                {
+                    classType: option["number"]
+                    for classType, option in chosen.items()
+                },
+            )
+        return picked_dict, missing
+
+    def confirmSaveDirect(
+        self,
+        session: NonioSession,
+        result: Page,
+        classData: ClassData,
+        chosen: dict[str, str],
+    ):
+        """Reads the course page back after a save, raising CourseNotReady unless the chosen classes are checked."""
+        if not chosen:
+            return
+        page = result
+        if not any(
+            page.classOptions(classType, False)[0] for classType in chosen
+        ):
+            # The save led away from the course, so it is opened again to see what was kept
+            page = session.get(str(classData["href"]))
+            if page.status >= 400:
+                raise CourseNotReady(
+                    f"the course page answered with status {page.status} after saving"
+                )
+        missed = unkept(
+            chosen,
+            {
+                classType: page.classOptions(classType, False)[0]
+                for classType in chosen
+            },
+        )
+        if missed:
+            raise CourseNotReady(
+                f"the save did not keep the {', '.join(missed)} classes"
             )
@@ -0,0 +1,24 @@
+from enum import Enum
+
+
+class BrowserChoice(Enum):
+    CHROME = "chrome"
+    FIREFOX = "firefox"
+    RACE = "race"
+    """Chrome and Firefox start together and the first one ready logs in."""
+
+    def browsers(self) -> tuple["BrowserChoice", ...]:
+        """Browsers this choice starts, both of them for a race."""
+        return RACERS if self == BrowserChoice.RACE else (self,)
+
+
+RACERS = (BrowserChoice.CHROME, BrowserChoice.FIREFOX)
+
+
+class EngineChoice(Enum):
+    BROWSER = "browser"
+    """Every step is done by the browser."""
+    DIRECT = "direct"
+    """Every step is done with plain HTTP requests, no browser is started."""
+    HYBRID = "hybrid"
+    """The browser logs in and hands its session to plain HTTP requests."""
@@ -0,0 +1,87 @@
+import datetime
+import math
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+SPIN_MARGIN = 0.02
+"""Seconds before a deadline where sleeping stops and the thread spins on the clock instead."""
+
+
+class ClockOffset:
+    """Estimates how far ahead the server clock is from the local one using HTTP Date headers.
+
+    A Date header only has second resolution, so each response bounds the offset to an interval
+    one second plus the round trip wide. Intersecting the intervals of responses taken at different
+    sub-second phases narrows the estimate down well below a second.
+    """
+
+    def __init__(self):
+        self.low = -math.inf
+        self.high = math.inf
+        self.samples = 0
+
+    def add(self, sentAt: float, receivedAt: float, date: str | None) -> bool:
+        """Adds a sample from the local times around a request and the Date header of its response."""
+        if not date:
+            return False
+        try:
+            server = parsedate_to_datetime(date).timestamp()
+        except (TypeError, ValueError):
+            return False
+        low = server - receivedAt
+        high = server + 1 - sentAt
+        if low > self.high or high < self.low:
+            # The server clock jumped or the sample is inconsistent, start over from it
+            self.low, self.high = low, high
+        else:
+            self.low, self.high = max(self.low, low), min(self.high, high)
+        self.samples += 1
+        return True
+
+    @property
+    def offset(self) -> float:
+        """Seconds to add to the local clock to get the server clock."""
+        if not self.samples:
+            return 0
+        return (self.low + self.high) / 2
+
+    @property
+    def uncertainty(self) -> float:
+        if not self.samples:
+            return math.inf
+        return (self.high - self.low) / 2
+
+    def serverTime(self) -> float:
+        return time.time() + self.offset
+
+    def localTime(self, serverTime: float) -> float:
+        return serverTime - self.offset
+
+
+def nextOccurrence(
+    timeOfDay: datetime.time, now: datetime.datetime | None = None
+) -> datetime.datetime:
+    """The next moment the clock shows the time, tomorrow if it already passed today."""
+    now = now or datetime.datetime.now()
+    start = datetime.datetime.combine(now.date(), timeOfDay)
+    if start <= now:
+        start += datetime.timedelta(days=1)
+    return start
+
+
+def sleepUntil(deadline: float, event: threading.Event | None = None) -> bool:
+    """Sleeps until the local wall clock reaches the deadline, returns early with False if the event is set."""
+    target = time.perf_counter() + (deadline - time.time())
+    while True:
+        remaining = target - time.perf_counter()
+        if remaining <= SPIN_MARGIN:
+            break
+        if event is not None:
+            if event.wait(remaining - SPIN_MARGIN):
+                return False
+        else:
+            time.sleep(remaining - SPIN_MARGIN)
+    while time.perf_counter() < target:
+        pass
+    return True
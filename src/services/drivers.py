@@ -0,0 +1,97 @@
+import os
+import threading
+from typing import TypedDict
+
+from config.metadata import DATA_PATH
+from services.choices import BrowserChoice
+from utils.json_cache import readJson, writeJson
+from utils.logger import logger
+
+DRIVERS_PATH = os.path.join(DATA_PATH, "drivers.json")
+"""Where the driver and browser found for each browser choice are kept between runs."""
+
+lock = threading.Lock()
+
+
+class DriverPaths(TypedDict):
+    driverPath: str
+    browserPath: str
+    browserMtime: int
+    browserSize: int
+
+
+def readCache() -> dict[str, DriverPaths]:
+    return readJson(DRIVERS_PATH) or {}
+
+
+def writeCache(cache: dict[str, DriverPaths]):
+    try:
+        writeJson(DRIVERS_PATH, cache)
+    except OSError as error:
+        logger.warning(f"Failed to cache driver paths: {error}")
+
+
+def isCurrent(paths: DriverPaths) -> bool:
+    """True while the driver is still there and the browser binary was not updated since it was found."""
+    try:
+        browser = os.stat(paths["browserPath"])
+    except OSError:
+        return False
+    return (
+        os.path.isfile(paths["driverPath"])
+        and browser.st_mtime_ns == paths["browserMtime"]
+        and browser.st_size == paths["browserSize"]
+    )
+
+
+def resolveDriver(browserName: str) -> DriverPaths | None:
+    """Driver and browser binaries for a browser, only asking Selenium Manager again when the browser changed.
+
+    None when they can not be found, so the driver falls back to its own lookup and reports the error.
+    """
+    with lock:
+        cached = readCache().get(browserName)
+        if cached and isCurrent(cached):
+            return cached
+        try:
+            # Imported here so the app can start without loading selenium
+            from selenium.webdriver.common.selenium_manager import (
+                SeleniumManager,
+            )
+
+            output = SeleniumManager().binary_paths(["--browser", browserName])
+            browser = os.stat(output["browser_path"])
+        except Exception as error:
+            logger.warning(
+                f"Failed to find a driver for {browserName}: {error}"
+            )
+            return None
+        paths: DriverPaths = {
+            "driverPath": output["driver_path"],
+            "browserPath": output["browser_path"],
+            "browserMtime": browser.st_mtime_ns,
+            "browserSize": browser.st_size,
+        }
+        logger.info(
+            f"Found {browserName} at {paths['browserPath']} with driver {paths['driverPath']}"
+        )
+        cache = readCache()
+        cache[browserName] = paths
+        writeCache(cache)
+        return paths
+
+
+def forgetDriver(browserName: str):
+    """Drops the cached paths of a browser, for when its driver failed to start."""
+    with lock:
+        cache = readCache()
+        if cache.pop(browserName, None) is not None:
+            writeCache(cache)
+
+
+def prepareDriver(browserName: str):
+    """Resolves the driver of a browser in the background, so the next run starts it straight away."""
+    for browser in BrowserChoice(browserName).browsers():
+        threading.Thread(
+            target=resolveDriver, args=(browser.value,), daemon=True
+        ).start()
@@ -0,0 +1,278 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+from functools import partial
+from typing import TYPE_CHECKING, Callable
+from multiprocessing.context import SpawnProcess
+
+from services.choices import BrowserChoice
+from services.pool import poolKey
+from utils.log_buffer import LogBuffer
+from utils.logger import logger
+
+if TYPE_CHECKING:
+    from services.batch import BatchRun
+    from services.browser import EnrollmentRun
+
+STOP_GRACE = 10
+"""Seconds a stopped run gets to wind down before its process is killed."""
+PROCESS_TERMINATE = 0x0001
+PROCESS_SET_QUOTA = 0x0100
+
+# Messages sent back by the engine process, kept to plain tuples so they are cheap to pickle:
+# ("output", text, level), ("timings", summary), ("picked", picked) and ("done",)
+
+
+class QueueBuffer(LogBuffer):
+    """Sends output lines to the app process as they come instead of keeping them."""
+
+    def __init__(self, messages: multiprocessing.Queue):
+        super().__init__()
+        self.messages = messages
+
+    def push(self, text: str, level: str):
+        self.messages.put(("output", text, level))
+
+
+def createJob(pid: int) -> int | None:
+    """Windows job object holding a process and every process it starts from then on, None elsewhere.
+
+    Windows has no process groups to kill, terminating the job takes the drivers and browsers
+    along with the engine process.
+    """
+    if sys.platform != "win32":
+        return None
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    job = kernel32.CreateJobObjectW(None, None)
+    process = kernel32.OpenProcess(
+        PROCESS_SET_QUOTA | PROCESS_TERMINATE, False, pid
+    )
+    try:
+        if job and process and kernel32.AssignProcessToJobObject(job, process):
+            return job
+        logger.warning(
+            f"Failed to put engine process {pid} in a job, its browsers will outlive a kill"
+        )
+        if job:
+            kernel32.CloseHandle(job)
+        return None
+    finally:
+        if process:
+            kernel32.CloseHandle(process)
+
+
+def terminateJob(job: int):
+    if sys.platform != "win32":
+        return
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.TerminateJobObject(job, 1)
+    kernel32.CloseHandle(job)
+
+
+def closeJob(job: int):
+    if sys.platform == "win32":
+        import ctypes
+
+        ctypes.windll.kernel32.CloseHandle(job)
+
+
+def serve(
+    commands: multiprocessing.Queue,
+    messages: multiprocessing.Queue,
+    startEvent,
+    stopEvent,
+):
+    """Entry point of the engine process, carries out the commands of the app until it is told to close."""
+    if hasattr(os, "setpgrp"):
+        # Browsers started from here join this process group, so killing the group takes them along
+        os.setpgrp()
+    # Selenium and the engines are loaded here rather than in the app, before the first command comes in
+    from services.batch import BatchRun
+    from services.browser import EnrollmentRun, startBrowser
+    from services.drivers import prepareDriver
+    from services.pool import driverPool
+    from services.sessions import prepareCipher
+
+    while True:
+        command = commands.get()
+        if command[0] == "close":
+            driverPool.close()
+            return
+        if command[0] == "prewarm":
+            leanPages = command[2]
+            for browser in BrowserChoice(command[1]).browsers():
+                driverPool.prewarm(
+                    poolKey(browser, True, leanPages),
+                    partial(startBrowser, browser, True, leanPages),
+                )
+        elif command[0] == "driver":
+            prepareDriver(command[1])
+        elif command[0] == "session":
+            prepareCipher(command[1], command[2])
+        elif command[0] == "run":
+            runWorker(
+                EnrollmentRun(**command[1]), messages, startEvent, stopEvent
+            )
+        elif command[0] == "batch":
+            runWorker(BatchRun(**command[1]), messages, startEvent, stopEvent)
+
+
+def runWorker(
+    worker: "EnrollmentRun | BatchRun",
+    messages: multiprocessing.Queue,
+    startEvent,
+    stopEvent,
+):
+    from services.browser import EnrollmentRun
+
+    worker.outputBuffer = QueueBuffer(messages)
+    if isinstance(worker, EnrollmentRun):
+        worker.onTimings = lambda summary: messages.put(("timings", summary))
+    done = threading.Event()
+
+    def relay(event, action: Callable[[], None]):
+        # Blocks on the shared event, so the run hears about it the moment the app sets it
+        event.wait()
+        if not done.is_set():
+            action()
+
+    for event, action in (
+        (startEvent, worker.trigger),
+        (stopEvent, worker.stop),
+    ):
+        threading.Thread(
+            target=relay, args=(event, action), daemon=True
+        ).start()
+    try:
+        worker.run()
+    finally:
+        done.set()
+        # Wakes the relays up, the app clears both events before the next run
+        startEvent.set()
+        stopEvent.set()
+        if isinstance(worker, EnrollmentRun):
+            messages.put(("picked", worker.picked))
+        messages.put(("done",))
+
+
+class EngineProcess:
+    """Process the runs of the app and their browsers live in, away from the window.
+
+    It is started on first use and kept between runs, so browsers started ahead of time are
+    still there for the next run. When a run gets stuck the whole process is killed and a new
+    one is started for the next run.
+    """
+
+    def __init__(self):
+        self.context = multiprocessing.get_context("spawn")
+        self.lock = threading.Lock()
+        self.process: SpawnProcess | None = None
+        self.job: int | None = None
+        """Job the process and its browsers are in on Windows."""
+        self.commands: multiprocessing.Queue = self.context.Queue()
+        self.messages: multiprocessing.Queue = self.context.Queue()
+        self.startEvent = self.context.Event()
+        self.stopEvent = self.context.Event()
+
+    def start(self):
+        with self.lock:
+            if self.process is not None and self.process.is_alive():
+                return
+            # A killed process may have left these locked, so every process gets new ones
+            self.commands = self.context.Queue()
+            self.messages = self.context.Queue()
+            self.startEvent = self.context.Event()
+            self.stopEvent = self.context.Event()
+            self.process = self.context.Process(
+                target=serve,
+                args=(
+                    self.commands,
+                    self.messages,
+                    self.startEvent,
+                    self.stopEvent,
+                ),
+                name="engine",
+                daemon=True,
+            )
+            self.process.start()
+            # The process is still importing, so nothing it starts escapes the job
+            self.job = createJob(self.process.pid)  # type: ignore
+            logger.info(f"Started engine process {self.process.pid}")
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def prewarm(self, browserChoice: BrowserChoice, leanPages: bool):
+        self.start()
+        self.commands.put(("prewarm", browserChoice.value, leanPages))
+
+    def prepareDriver(self, browserChoice: BrowserChoice):
+        """Looks up the driver of a browser ahead of the run that starts it."""
+        self.start()
+        self.commands.put(("driver", browserChoice.value))
+
+    def prepareSession(self, email: str, password: str):
+        """Derives the key of the saved session of an account ahead of the run that logs in with it."""
+        self.start()
+        self.commands.put(("session", email, password))
+
+    def run(self, inputs: dict, command: str = "run"):
+        """Starts a run, or a batch with the batch command, its messages arrive on the messages queue until the done message."""
+        self.start()
+        self.startEvent.clear()
+        self.stopEvent.clear()
+        self.commands.put((command, inputs))
+
+    def kill(self):
+        """Kills the process and the browsers it started, for a run that does not stop."""
+        with self.lock:
+            process, self.process = self.process, None
+            job, self.job = self.job, None
+        if process is None or process.pid is None:
+            return
+        logger.warning(f"Killing engine process {process.pid}")
+        try:
+            if job is not None:
+                terminateJob(job)
+            elif hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except OSError:
+            process.kill()
+        process.join(STOP_GRACE)
+
+    def close(self):
+        """Lets the process quit its browsers and exit, killing it if it does not."""
+        with self.lock:
+            process = self.process
+        if process is None or not process.is_alive():
+            return
+        self.stopEvent.set()
+        self.commands.put(("close",))
+        process.join(STOP_GRACE)
+        if process.is_alive():
+            self.kill()
+            return
+        with self.lock:
+            job, self.job = self.job, None
+        if job is not None:
+            closeJob(job)
+
+    def nextMessage(self, timeout: float) -> tuple | None:
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+engineProcess = EngineProcess()
+atexit.register(engineProcess.close)
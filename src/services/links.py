@@ -0,0 +1,64 @@
+import os
+import threading
+from typing import TypedDict
+
+from config.metadata import DATA_PATH
+from utils.json_cache import readJson, writeJson
+from utils.logger import logger
+
+LINKS_PATH = os.path.join(DATA_PATH, "links.json")
+"""Where the enrollment and course links of each account are kept between runs."""
+
+lock = threading.Lock()
+
+
+class CourseLink(TypedDict):
+    href: str
+    className: str
+
+
+class EnrollmentLinks(TypedDict):
+    enrollmentText: str
+    enrollmentLink: str
+    courses: dict[str, CourseLink]
+    """Every course of the enrollment by ID, not only the ones in the schedule table."""
+
+
+def linksKey(baseUrl: str, email: str, enrollmentIndex: int) -> str:
+    return f"{baseUrl} {email.strip().lower()} {enrollmentIndex}"
+
+
+def readCache() -> dict[str, EnrollmentLinks]:
+    return readJson(LINKS_PATH) or {}
+
+
+def writeCache(cache: dict[str, EnrollmentLinks]):
+    try:
+        writeJson(LINKS_PATH, cache)
+    except OSError as error:
+        logger.warning(f"Failed to cache course links: {error}")
+
+
+def readLinks(
+    baseUrl: str, email: str, enrollmentIndex: int
+) -> EnrollmentLinks | None:
+    """Links found by the last run of an account, None if it has not been run yet."""
+    with lock:
+        return readCache().get(linksKey(baseUrl, email, enrollmentIndex))
+
+
+def saveLinks(
+    baseUrl: str, email: str, enrollmentIndex: int, links: EnrollmentLinks
+):
+    with lock:
+        cache = readCache()
+        cache[linksKey(baseUrl, email, enrollmentIndex)] = links
+        writeCache(cache)
+
+
+def forgetLinks(baseUrl: str, email: str, enrollmentIndex: int):
+    """Drops the links of an account, for when one of them led nowhere."""
+    with lock:
+        cache = readCache()
+        if cache.pop(linksKey(baseUrl, email, enrollmentIndex), None):
+            writeCache(cache)
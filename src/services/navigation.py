@@ -0,0 +1,177 @@
+import threading
+from typing import Callable
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.bidi.session import Session
+
+from utils.logger import logger
+
+RESPONSE_EVENT = "network.responseCompleted"
+DOM_LOADED_EVENT = "browsingContext.domContentLoaded"
+LOADED_EVENT = "browsingContext.load"
+
+
+class BidiEvent:
+    """Names an event for the BiDi connection, which hands its parameters over untouched."""
+
+    def __init__(self, name: str):
+        self.event_class = name
+
+    def from_json(self, json: dict) -> dict:
+        return json
+
+
+class Cancelled(Exception):
+    """Raised by a wait that was cancelled, because the run it belongs to was stopped."""
+
+
+def redirected(response: dict) -> bool:
+    return 300 <= response["response"]["status"] < 400
+
+
+class Navigation:
+    """Document responses and loads of one browser tab, collected from WebDriver BiDi events.
+
+    Waiting on them blocks on a condition every event wakes up, so a step goes on the moment
+    what it needs arrives instead of polling the page.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.responses: list[dict] = []
+        self.loaded: set[str] = set()
+        self.cancelled = False
+
+    def onResponse(self, params: dict):
+        # Only responses to navigations carry a navigation id, assets are left out
+        if not params.get("navigation"):
+            return
+        with self.condition:
+            self.responses.append(params)
+            self.condition.notify_all()
+
+    def onLoaded(self, params: dict):
+        with self.condition:
+            self.loaded.add(params.get("navigation") or "")
+            self.condition.notify_all()
+
+    def mark(self) -> int:
+        """Position to only look at the responses that arrive after it."""
+        with self.condition:
+            return len(self.responses)
+
+    def waitForResponse(
+        self, since: int, matches: Callable[[dict], bool], timeout: float
+    ) -> dict:
+        def find() -> dict | None:
+            return next(
+                (
+                    response
+                    for response in self.responses[since:]
+                    if matches(response)
+                ),
+                None,
+            )
+
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self.cancelled or find() is not None, timeout
+            ):
+                raise TimeoutException(
+                    f"No matching response arrived in {timeout} seconds"
+                )
+            if self.cancelled:
+                raise Cancelled("Navigation was cancelled")
+            return find()  # type: ignore
+
+    def waitForPage(self, navigation: str, timeout: float):
+        """Waits until a navigation got past its redirects and loaded, events can come in any order."""
+
+        def ready() -> bool:
+            return navigation in self.loaded and any(
+                response["navigation"] == navigation
+                and not redirected(response)
+                for response in self.responses
+            )
+
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self.cancelled or ready(), timeout
+            ):
+                raise TimeoutException(
+                    f"Navigation did not load in {timeout} seconds"
+                )
+            if self.cancelled:
+                raise Cancelled("Navigation was cancelled")
+
+    def cancel(self):
+        """Wakes every wait up with Cancelled, now and from then on."""
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify_all()
+
+    def chain(self, navigation: str) -> list[dict]:
+        """Every response of a navigation, redirects first."""
+        with self.condition:
+            return sorted(
+                (
+                    response
+                    for response in self.responses
+                    if response["navigation"] == navigation
+                ),
+                key=lambda response: response.get("redirectCount", 0),
+            )
+
+
+class Navigator(Navigation):
+    """Navigation of a driver's current tab, raises if the browser session has no BiDi connection."""
+
+    def __init__(
+        self, driver: webdriver.Chrome | webdriver.Firefox, eager: bool
+    ):
+        super().__init__()
+        self.driver = driver
+        self.context = driver.current_window_handle
+        self.loadEvent = DOM_LOADED_EVENT if eager else LOADED_EVENT
+        self.connection = driver.network.conn
+        self.callbacks = [
+            (event, self.connection.add_callback(event, callback))
+            for event, callback in (
+                (BidiEvent(RESPONSE_EVENT), self.onResponse),
+                (BidiEvent(self.loadEvent), self.onLoaded),
+            )
+        ]
+        self.connection.execute(
+            Session(self.connection).subscribe(
+                RESPONSE_EVENT,
+                self.loadEvent,
+                browsing_contexts=[self.context],
+            )
+        )
+
+    def close(self):
+        """Stops listening to the tab, so the browser can be used by another run."""
+        self.cancel()
+        for event, callbackId in self.callbacks:
+            self.connection.remove_callback(event, callbackId)
+        try:
+            self.connection.execute(
+                Session(self.connection).unsubscribe(
+                    RESPONSE_EVENT,
+                    self.loadEvent,
+                    browsing_contexts=[self.context],
+                )
+            )
+        except Exception as error:
+            logger.warning(
+                f"Failed to unsubscribe from browser events: {error}"
+            )
+
+    def navigate(self, url: str, timeout: float) -> list[dict]:
+        """Opens the URL and returns once the page can be used, with the responses that led to it."""
+        result = self.driver.browsing_context.navigate(
+            self.context, url, wait="none"
+        )
+        self.waitForPage(result["navigation"], timeout)
+        return self.chain(result["navigation"])
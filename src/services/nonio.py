@@ -0,0 +1,454 @@
+import os
+import time
+from html.parser import HTMLParser
+from typing import Callable, TypedDict
+from http.cookies import SimpleCookie
+from urllib.parse import urljoin, urlencode, urlsplit
+
+import urllib3
+
+from services.clock import ClockOffset
+from services.links import CourseLink
+
+BASE_URL = os.environ.get(
+    "PLANNEI_BASE_URL", "https://inforestudante.uc.pt"
+).rstrip("/")
+"""Can be pointed at a local stand-in, like the one in nonio_mock, to run offline."""
+LOGIN_URL = f"{BASE_URL}/nonio/security/login.do"
+ENROLL_URL = f"{BASE_URL}/nonio/inscturmas/init.do"
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 10
+
+SAVE_ERROR_CLASSES = ("erro", "error", "errors", "alert-danger")
+"""Classes of the elements a page puts its error messages in, text alone can match a normal course page."""
+SAVE_ERROR_SELECTOR = ", ".join(f".{name}" for name in SAVE_ERROR_CLASSES)
+
+
+class PageError(Exception):
+    """Raised when a page is missing an element the enrollment flow relies on."""
+
+
+class ClassOption(TypedDict):
+    number: str
+    checked: bool
+    disabled: bool
+    index: int
+    """Position of the option checkbox in the list returned alongside the options."""
+    schedule: str
+    """Weekdays and times of the class as written in the page."""
+
+
+class Cell:
+    def __init__(self):
+        self.text = ""
+        self.lead = ""
+        """Text before the first sup tag, where nonio keeps the class number."""
+        self.inputs: list[dict[str, str]] = []
+        self.links: list[str] = []
+        self.pastSup = False
+
+
+class Table:
+    def __init__(self, attrs: dict[str, str]):
+        self.attrs = attrs
+        self.rows: list[list[Cell]] = []
+        self.inputs: list[dict[str, str]] = []
+        self.inHead = False
+
+
+class Form:
+    def __init__(self, attrs: dict[str, str]):
+        self.attrs = attrs
+        self.inputs: list[dict[str, str]] = []
+        self.selects: list[dict[str, str]] = []
+        self.ids: set[str] = set()
+
+    def element(self, elementId: str) -> dict[str, str] | None:
+        for element in self.inputs:
+            if element.get("id") == elementId:
+                return element
+        return None
+
+    def fields(
+        self, submitter: dict[str, str] | None = None
+    ) -> list[tuple[str, str]]:
+        """Builds the form data a browser would send when clicking the given submit button."""
+        fields: list[tuple[str, str]] = []
+        for element in self.inputs:
+            name = element.get("name")
+            if not name or "disabled" in element:
+                continue
+            kind = element.get("type", "text").lower()
+            if kind in ("checkbox", "radio"):
+                if "checked" in element:
+                    fields.append((name, element.get("value", "on")))
+            elif kind in ("submit", "button", "image", "reset"):
+                if element is submitter:
+                    fields.append((name, element.get("value", "")))
+            elif kind != "file":
+                fields.append((name, element.get("value", "")))
+        for select in self.selects:
+            if select.get("name") and "disabled" not in select:
+                fields.append((select["name"], select.get("value", "")))
+        return fields
+
+
+class PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.ids: set[str] = set()
+        self.classes: set[str] = set()
+        self.tables: list[Table] = []
+        self.forms: list[Form] = []
+        self.tableStack: list[Table] = []
+        self.cell: Cell | None = None
+        self.cellStack: list[Cell | None] = []
+        self.form: Form | None = None
+        self.select: dict[str, str] | None = None
+        self.option: dict[str, str] | None = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        attributes = {key: value or "" for key, value in attrs}
+        if "id" in attributes:
+            self.ids.add(attributes["id"])
+            if self.form is not None:
+                self.form.ids.add(attributes["id"])
+        self.classes.update(attributes.get("class", "").split())
+
+        if tag == "table":
+            table = Table(attributes)
+            self.tables.append(table)
+            self.tableStack.append(table)
+            self.cellStack.append(self.cell)
+            self.cell = None
+        elif tag == "thead" and self.tableStack:
+            self.tableStack[-1].inHead = True
+        elif tag == "tbody" and self.tableStack:
+            self.tableStack[-1].inHead = False
+        elif tag == "tr" and self.tableStack:
+            if not self.tableStack[-1].inHead:
+                self.tableStack[-1].rows.append([])
+        elif tag == "td" and self.tableStack:
+            table = self.tableStack[-1]
+            if not table.inHead and table.rows:
+                self.cell = Cell()
+                table.rows[-1].append(self.cell)
+        elif tag == "sup" and self.cell is not None:
+            self.cell.pastSup = True
+        elif tag == "form":
+            self.form = Form(attributes)
+            self.forms.append(self.form)
+        elif tag in ("input", "button"):
+            if tag == "button":
+                attributes.setdefault("type", "submit")
+            if self.cell is not None:
+                self.cell.inputs.append(attributes)
+            for table in self.tableStack:
+                table.inputs.append(attributes)
+            if self.form is not None:
+                self.form.inputs.append(attributes)
+        elif tag == "a" and self.cell is not None and "href" in attributes:
+            self.cell.links.append(attributes["href"])
+        elif tag == "select":
+            self.select = attributes
+            if self.form is not None:
+                self.form.selects.append(attributes)
+        elif tag == "option" and self.select is not None:
+            self.option = attributes
+            if "selected" in attributes or "value" not in self.select:
+                self.select["value"] = attributes.get("value", "")
+
+    def handle_endtag(self, tag: str):
+        if tag == "table" and self.tableStack:
+            self.tableStack.pop()
+            self.cell = self.cellStack.pop()
+        elif tag == "td":
+            self.cell = None
+        elif tag == "form":
+            self.form = None
+        elif tag == "select":
+            self.select = None
+        elif tag == "option":
+            self.option = None
+
+    def handle_data(self, data: str):
+        if (
+            self.option is not None
+            and self.select is not None
+            and "value" not in self.option
+            and self.select.get("value") == ""
+        ):
+            self.select["value"] = data.strip()
+        if self.cell is not None:
+            self.cell.text += data
+            if not self.cell.pastSup:
+                self.cell.lead += data
+
+
+class Page:
+    def __init__(
+        self, url: str, status: int, headers: dict[str, str], text: str
+    ):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.text = text
+        parser = PageParser()
+        parser.feed(text)
+        parser.close()
+        self.ids = parser.ids
+        self.classes = parser.classes
+        self.tables = parser.tables
+        self.forms = parser.forms
+
+    def displayTables(self, exact: bool = False) -> list[Table]:
+        """Tables with the displaytable class, when exact only those whose class is nothing else."""
+        return [
+            table
+            for table in self.tables
+            if (
+                table.attrs.get("class", "") == "displaytable"
+                if exact
+                else "displaytable" in table.attrs.get("class", "").split()
+            )
+        ]
+
+    def classOptions(
+        self, classType: str, dryRun: bool
+    ) -> tuple[list[ClassOption], list[dict[str, str]]]:
+        """Options of a class type and their checkboxes, the preview ones in dry run."""
+        options: list[ClassOption] = []
+        checkboxes: list[dict[str, str]] = []
+        for table in self.displayTables(exact=True):
+            if not any(
+                element.get("type") == "checkbox"
+                and element.get("alt") == classType
+                for element in table.inputs
+            ):
+                continue
+            for cells in table.rows:
+                if not cells:
+                    continue
+                boxes = (
+                    cells[-2].inputs if dryRun and len(cells) > 1 else []
+                ) or cells[-1].inputs
+                if not boxes:
+                    continue
+                checkboxes.append(boxes[0])
+                options.append(
+                    {
+                        "number": cells[0].lead.split(classType)[-1].strip(),
+                        "checked": "checked" in boxes[0],
+                        "disabled": "disabled" in boxes[0],
+                        "index": len(checkboxes) - 1,
+                        "schedule": cells[1].text.strip()
+                        if len(cells) > 2
+                        else "",
+                    }
+                )
+        return options, checkboxes
+
+    def enrollments(self) -> list[tuple[str, str | None]]:
+        """Name and link of every row in the enrollments page, None for rows without a link."""
+        tables = self.displayTables()
+        if not tables:
+            raise PageError(f"No enrollment table found at {self.url}")
+        return [
+            (
+                cells[0].text.strip() if cells else "",
+                self.absolute(cells[-1].links[0])
+                if cells and cells[-1].links
+                else None,
+            )
+            for cells in tables[0].rows
+        ]
+
+    def courseLinks(self) -> dict[str, CourseLink]:
+        """Link and name of every course in the courses page of an enrollment, by course ID."""
+        tables = self.displayTables()
+        if not tables:
+            raise PageError(f"No courses table found at {self.url}")
+        return {
+            cells[0].text.strip(): {
+                "href": self.absolute(cells[6].links[0]),
+                "className": cells[1].text.strip(),
+            }
+            for cells in tables[0].rows
+            if len(cells) >= 7 and cells[6].links
+        }
+
+    def showsError(self) -> bool:
+        return not self.classes.isdisjoint(SAVE_ERROR_CLASSES)
+
+    def formWith(self, elementId: str) -> Form | None:
+        for form in self.forms:
+            if elementId in form.ids:
+                return form
+        return None
+
+    def absolute(self, href: str) -> str:
+        return urljoin(self.url, href)
+
+
+def samePage(first: str, second: str) -> bool:
+    return urlsplit(first)._replace(query="", fragment="") == urlsplit(
+        second
+    )._replace(query="", fragment="")
+
+
+def saveError(status: int, showsError: bool) -> str | None:
+    """Why the answer to a save turned it down, None if it did not.
+
+    Whether the classes were kept is only known by reading the course page back, see unkept.
+    """
+    if status >= 400:
+        return f"saving failed with status {status}"
+    if showsError:
+        return "the page showed an error after saving"
+    return None
+
+
+def unkept(
+    chosen: dict[str, str], options: dict[str, list[ClassOption]]
+) -> list[str]:
+    """Class types whose chosen class number is not checked in the options read back after a save."""
+    return [
+        classType
+        for classType, number in chosen.items()
+        if not any(
+            option["number"] == number and option["checked"]
+            for option in options.get(classType, [])
+        )
+    ]
+
+
+class NonioSession:
+    """Keep-alive HTTP session that talks to nonio without a browser."""
+
+    def __init__(self, userAgent: str | None = None, timeout: float = 30):
+        self.pool = urllib3.PoolManager(
+            num_pools=2,
+            maxsize=8,
+            block=False,
+            retries=False,
+            timeout=urllib3.Timeout(total=timeout),
+        )
+        self.cookies: dict[str, str] = {}
+        self.clock = ClockOffset()
+        self.headers = {
+            "Accept": "text/html,application/xhtml+xml",
+            "Connection": "keep-alive",
+        }
+        if userAgent:
+            self.headers["User-Agent"] = userAgent
+        self.onResponse: Callable[[str, str, int, float], None] | None = None
+        """Called with the method, URL, status and seconds taken of every response, to record a run."""
+
+    def importCookies(self, cookies: list[dict]):
+        """Reuses the cookies of a logged in Selenium driver, from get_cookies."""
+        for cookie in cookies:
+            self.cookies[cookie["name"]] = cookie["value"]
+
+    def exportCookies(self, domain: str) -> list[dict]:
+        return [
+            {"name": name, "value": value, "domain": domain, "path": "/"}
+            for name, value in self.cookies.items()
+        ]
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        fields: list[tuple[str, str]] | None = None,
+    ) -> Page:
+        for _ in range(MAX_REDIRECTS):
+            headers = dict(self.headers)
+            if self.cookies:
+                headers["Cookie"] = "; ".join(
+                    f"{name}={value}" for name, value in self.cookies.items()
+                )
+            body = None
+            if fields is not None:
+                body = urlencode(fields)
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+            sentAt = time.time()
+            response = self.pool.request(
+                method,
+                url,
+                body=body,
+                headers=headers,
+                redirect=False,
+                preload_content=True,
+            )
+            receivedAt = time.time()
+            self.clock.add(sentAt, receivedAt, response.headers.get("Date"))
+            if self.onResponse is not None:
+                self.onResponse(
+                    method, url, response.status, receivedAt - sentAt
+                )
+            for header in response.headers.getlist("Set-Cookie"):
+                cookie = SimpleCookie()
+                cookie.load(header)
+                for name, morsel in cookie.items():
+                    self.cookies[name] = morsel.value
+            location = response.headers.get("Location")
+            if response.status in REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                if response.status not in (307, 308):
+                    method, fields = "GET", None
+                continue
+            charset = "utf-8"
+            contentType = response.headers.get("Content-Type", "")
+            if "charset=" in contentType:
+                charset = contentType.split("charset=")[-1].split(";")[0]
+            return Page(
+                url,
+                response.status,
+                dict(response.headers),
+                response.data.decode(charset.strip(), errors="replace"),
+            )
+        raise PageError(f"Too many redirects while loading {url}")
+
+    def get(self, url: str) -> Page:
+        return self.request("GET", url)
+
+    def submit(
+        self,
+        page: Page,
+        form: Form,
+        submitter: dict[str, str] | None = None,
+    ) -> Page:
+        action = page.absolute(form.attrs.get("action") or page.url)
+        method = form.attrs.get("method", "get").upper()
+        fields = form.fields(submitter)
+        if method == "POST":
+            return self.request("POST", action, fields)
+        return self.get(f"{action.split('?')[0]}?{urlencode(fields)}")
+
+    def login(self, email: str, password: str) -> bool | None:
+        """Logs in through the login form, None means the session was already logged in."""
+        page = self.get(LOGIN_URL)
+        if not samePage(page.url, LOGIN_URL):
+            return None
+        form = page.formWith("username")
+        if form is None:
+            raise PageError("Login form not found")
+        for element in form.inputs:
+            if element.get("id") == "username":
+                element["value"] = email
+            elif element.get("id") == "password1":
+                element["value"] = password
+        submitter = next(
+            (
+                element
+                for element in form.inputs
+                if element.get("type") == "submit"
+            ),
+            None,
+        )
+        page = self.submit(page, form, submitter)
+        return not samePage(page.url, LOGIN_URL)
+
+    def close(self):
+        self.pool.clear()
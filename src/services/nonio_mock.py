@@ -0,0 +1,424 @@
+import argparse
+import html
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, parse_qsl, urlsplit
+
+WEEKDAYS = ("Segunda", "Terça", "Quarta", "Quinta", "Sexta")
+CLASS_COUNTS = {"PL": 4, "TP": 2, "T": 1}
+ENROLLMENT_ID = "5482"
+
+
+class MockNonio:
+    """Local stand-in for nonio that serves the same markup the enrollment engines read.
+
+    Requests can be slowed down and made to fail, other students take seats over time once the
+    enrollment opens, and every saved schedule is kept so runs can be checked afterwards.
+    """
+
+    def __init__(
+        self,
+        courses: int = 20,
+        latency: float = 0,
+        jitter: float = 0,
+        errorRate: float = 0,
+        seats: int = 20,
+        contention: float = 0,
+        opensIn: float = 0,
+        assetDelay: float = 0,
+        savesInPlace: bool = False,
+        email: str = "student@student.uc.pt",
+        password: str = "password",
+        seed: int | None = None,
+    ):
+        self.courseCount = courses
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.seats = seats
+        self.contention = contention
+        """Seats taken by other students per second after the enrollment opens."""
+        self.opensIn = opensIn
+        self.assetDelay = assetDelay
+        """Seconds the stylesheet and font every page links to take, like the assets of the real site."""
+        self.savesInPlace = savesInPlace
+        """Kept saves are answered with the course page instead of a redirect."""
+        self.email = email
+        self.password = password
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.server: ThreadingHTTPServer | None = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.opensAt = time.time() + self.opensIn
+            self.sessions: set[str] = set()
+            self.taken = 0
+            self.requests = 0
+            self.saved: list[list[tuple[str, str]]] = []
+            self.picked: dict[tuple[str, str], str] = {}
+            self.courses: dict[str, dict] = {}
+            for index in range(self.courseCount):
+                classId = f"{1000010 + index * 11:08d}"
+                self.courses[classId] = {
+                    "name": f"Unidade Curricular {index + 1}",
+                    "classes": {
+                        classType: [
+                            {
+                                "number": str(number),
+                                "value": f"{index}{classType}{number}",
+                                "seats": self.seats,
+                                "schedule": self.schedule(
+                                    index, classType, number
+                                ),
+                            }
+                            for number in range(1, count + 1)
+                        ]
+                        for classType, count in CLASS_COUNTS.items()
+                    },
+                }
+
+    def schedule(self, index: int, classType: str, number: int) -> str:
+        slot = (
+            index * 7 + list(CLASS_COUNTS).index(classType) * 3 + number
+        ) % 25
+        hour = 8 + (slot % 5) * 2
+        return f"{WEEKDAYS[slot // 5]} {hour:02d}:00 - {hour + 2:02d}:00"
+
+    def isOpen(self) -> bool:
+        return time.time() >= self.opensAt
+
+    def contend(self):
+        """Lets other students take the seats they would have taken by now."""
+        if not self.contention or not self.isOpen():
+            return
+        due = int((time.time() - self.opensAt) * self.contention)
+        options = [
+            option
+            for course in self.courses.values()
+            for classes in course["classes"].values()
+            for option in classes
+        ]
+        while self.taken < due:
+            self.taken += 1
+            option = self.random.choice(options)
+            option["seats"] = max(0, option["seats"] - 1)
+
+    def writeTable(self, path: str, courses: int):
+        """Writes a schedule table asking for the first courses with every class ranked."""
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("CLASS,PL,TP,T,T/TP\n")
+            for classId in list(self.courses)[:courses]:
+                classes = self.courses[classId]["classes"]
+                file.write(
+                    ",".join(
+                        [classId]
+                        + [
+                            " # ".join(
+                                option["number"]
+                                for option in classes.get(classType, [])
+                            )
+                            for classType in ("PL", "TP", "T", "T/TP")
+                        ]
+                    )
+                    + "\n"
+                )
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        if self.server is None:
+            raise RuntimeError("Mock server is not running")
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def loginPage(self) -> str:
+        return """<form name="loginForm" method="post" action="/nonio/security/login.do">
+<input type="hidden" name="method" value="login">
+<input type="text" id="username" name="username" value="">
+<input type="password" id="password1" name="password" value="">
+<input type="submit" name="submit" value="Entrar">
+</form>"""
+
+    def enrollmentsPage(self) -> str:
+        return f"""<table class="displaytable" id="inscricoes">
+<thead><tr><th>Inscrição</th><th>Período</th><th></th></tr></thead>
+<tbody><tr>
+<td>Licenciatura em Engenharia Informática - 2.º Semestre</td>
+<td>01-02-2025 a 15-02-2025</td>
+<td><div class="acoes"><a href="/nonio/inscturmas/listaInscricoes.do?args={ENROLLMENT_ID}">Inscrever</a></div></td>
+</tr></tbody>
+</table>"""
+
+    def coursesPage(self) -> str:
+        rows = "".join(
+            f"""<tr><td>{classId}</td><td>{html.escape(course["name"])}</td><td>1</td><td>2</td><td>6</td><td>Aberta</td>
+<td><a href="inscrever.do?args={ENROLLMENT_ID}&amp;uc={classId}">Inscrever</a></td></tr>
+"""
+            for classId, course in self.courses.items()
+        )
+        return f"""<table class="displaytable" id="unidades">
+<thead><tr><th>Código</th><th>Unidade curricular</th><th>Ano</th><th>Semestre</th><th>ECTS</th><th>Estado</th><th></th></tr></thead>
+<tbody>
+{rows}</tbody>
+</table>"""
+
+    def coursePage(self, classId: str) -> str:
+        course = self.courses[classId]
+        tables = ""
+        for classType, options in course["classes"].items():
+            rows = ""
+            for option in options:
+                picked = (
+                    self.picked.get((classId, classType)) == option["value"]
+                )
+                state = " checked" if picked else ""
+                if not picked and (not option["seats"] or not self.isOpen()):
+                    state += " disabled"
+                rows += f"""<tr><td>{classType}{option["number"]}<sup>{option["seats"]}</sup></td><td>{option["schedule"]}</td><td>{option["seats"]}</td>
+<td><input type="checkbox" name="preview" value="{classType}{option["number"]}"></td>
+<td><input type="checkbox" name="turma{classType}" value="{option["value"]}" alt="{classType}"{state}></td></tr>
+"""
+            tables += f"""<table class="displaytable">
+<thead><tr><th>Turma</th><th>Horário</th><th>Vagas</th><th>Pré-visualizar</th><th>Inscrever</th></tr></thead>
+<tbody>
+{rows}</tbody>
+</table>
+"""
+        save = (
+            '<input type="submit" id="botaoGravar" name="gravar" value="Gravar">'
+            if self.isOpen()
+            else ""
+        )
+        return f"""<h1>{html.escape(course["name"])}</h1>
+<form name="inscreverForm" method="post" action="/nonio/inscturmas/gravar.do">
+<input type="hidden" name="args" value="{ENROLLMENT_ID}">
+<input type="hidden" name="uc" value="{classId}">
+{tables}{save}
+<input type="button" id="botaoVoltar" value="Voltar" onclick="history.back()">
+</form>"""
+
+    def save(self, fields: list[tuple[str, str]]) -> bool:
+        """Keeps the chosen classes of a course, False when one of them has no seats left."""
+        form = dict(fields)
+        classId = form.get("uc", "")
+        course = self.courses.get(classId)
+        if course is None or not self.isOpen():
+            return False
+        chosen: dict[str, dict] = {}
+        for name, value in fields:
+            if not name.startswith("turma"):
+                continue
+            classType = name[len("turma") :]
+            for option in course["classes"].get(classType, []):
+                if option["value"] == value:
+                    chosen[classType] = option
+        for classType, option in chosen.items():
+            if self.picked.get((classId, classType)) == option["value"]:
+                continue
+            if not option["seats"]:
+                return False
+        for classType, option in chosen.items():
+            previous = self.picked.get((classId, classType))
+            if previous == option["value"]:
+                continue
+            for other in course["classes"][classType]:
+                if other["value"] == previous:
+                    other["seats"] += 1
+            option["seats"] -= 1
+            self.picked[(classId, classType)] = option["value"]
+        self.saved.append(fields)
+        return True
+
+    def handler(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, without this every response waits on a delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def respond(self, status: int, body: str = "", headers: dict = {}):
+                content = f"<!DOCTYPE html><html><head><title>Inforestudante</title><link rel='stylesheet' href='/static/style.css'></head><body>{body}</body></html>".encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def asset(self, path: str):
+                if mock.assetDelay:
+                    time.sleep(mock.assetDelay)
+                if path == "/static/style.css":
+                    content = b'@font-face { font-family: "Nonio"; src: url("/static/nonio.woff2"); } body { font-family: "Nonio"; }'
+                    contentType = "text/css"
+                else:
+                    content = b""
+                    contentType = "font/woff2"
+                self.send_response(200)
+                self.send_header("Content-Type", contentType)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def redirect(self, location: str, headers: dict = {}):
+                self.respond(302, "", {"Location": location, **headers})
+
+            def session(self) -> str | None:
+                for part in self.headers.get("Cookie", "").split(";"):
+                    name, _, value = part.strip().partition("=")
+                    if name == "JSESSIONID" and value in mock.sessions:
+                        return value
+                return None
+
+            def delay(self) -> bool:
+                """Applies the configured latency, False if this request should fail."""
+                wait = mock.latency + mock.random.uniform(0, mock.jitter)
+                if wait:
+                    time.sleep(wait)
+                with mock.lock:
+                    mock.requests += 1
+                    fail = mock.random.random() < mock.errorRate
+                if fail:
+                    self.respond(
+                        503, "<p>Serviço temporariamente indisponível</p>"
+                    )
+                return not fail
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path.startswith("/static/"):
+                    return self.asset(url.path)
+                if not self.delay():
+                    return
+                query = parse_qs(url.query)
+                with mock.lock:
+                    mock.contend()
+                    if url.path == "/nonio/security/login.do":
+                        if self.session():
+                            return self.redirect(
+                                "/nonio/dashboard/dashboard.do"
+                            )
+                        return self.respond(200, mock.loginPage())
+                    if not self.session():
+                        return self.redirect("/nonio/security/login.do")
+                    if url.path == "/nonio/dashboard/dashboard.do":
+                        return self.respond(
+                            200,
+                            '<a href="/nonio/inscturmas/init.do">Inscrição em turmas</a>',
+                        )
+                    if url.path == "/nonio/inscturmas/init.do":
+                        return self.respond(200, mock.enrollmentsPage())
+                    if url.path == "/nonio/inscturmas/listaInscricoes.do":
+                        return self.respond(200, mock.coursesPage())
+                    if url.path == "/nonio/inscturmas/inscrever.do":
+                        classId = query.get("uc", [""])[0]
+                        if classId in mock.courses:
+                            return self.respond(200, mock.coursePage(classId))
+                self.respond(404, "<p>Página não encontrada</p>")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                fields = parse_qsl(self.rfile.read(length).decode())
+                if not self.delay():
+                    return
+                path = urlsplit(self.path).path
+                with mock.lock:
+                    mock.contend()
+                    if path == "/nonio/security/login.do":
+                        form = dict(fields)
+                        if (form.get("username"), form.get("password")) == (
+                            mock.email,
+                            mock.password,
+                        ):
+                            token = secrets.token_hex(16)
+                            mock.sessions.add(token)
+                            return self.redirect(
+                                "/nonio/dashboard/dashboard.do",
+                                {
+                                    "Set-Cookie": f"JSESSIONID={token}; Path=/; HttpOnly"
+                                },
+                            )
+                        return self.respond(200, mock.loginPage())
+                    if not self.session():
+                        return self.redirect("/nonio/security/login.do")
+                    if path == "/nonio/inscturmas/gravar.do":
+                        if mock.save(fields):
+                            if mock.savesInPlace:
+                                return self.respond(
+                                    200, mock.coursePage(dict(fields)["uc"])
+                                )
+                            return self.redirect(
+                                f"/nonio/inscturmas/listaInscricoes.do?args={ENROLLMENT_ID}"
+                            )
+                        return self.respond(
+                            409, "<p>Não foi possível gravar a inscrição</p>"
+                        )
+                self.respond(404, "<p>Página não encontrada</p>")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a local stand-in for nonio, point Plannei at it with PLANNEI_BASE_URL."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--seats", type=int, default=20)
+    parser.add_argument("--contention", type=float, default=0)
+    parser.add_argument("--opens-in", type=float, default=0)
+    parser.add_argument("--asset-delay", type=float, default=0)
+    parser.add_argument("--seed", type=int)
+    arguments = parser.parse_args()
+
+    mock = MockNonio(
+        courses=arguments.courses,
+        latency=arguments.latency,
+        jitter=arguments.jitter,
+        errorRate=arguments.error_rate,
+        seats=arguments.seats,
+        contention=arguments.contention,
+        opensIn=arguments.opens_in,
+        assetDelay=arguments.asset_delay,
+        seed=arguments.seed,
+    )
+    url = mock.start(arguments.host, arguments.port)
+    print(
+        f"Mock nonio running at {url}, log in as {mock.email} / {mock.password}"
+    )
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,164 @@
+import hashlib
+import os
+from csv import DictReader, __version__ as csv_version
+from typing import Literal
+
+from config.metadata import DATA_PATH
+from utils.json_cache import readJson, writeJson
+from utils.logger import logger
+
+PLANS_PATH = os.path.join(DATA_PATH, "plans")
+"""Where compiled schedule tables are cached between runs."""
+PLAN_VERSION = 1
+"""Bumped whenever the compiled plan layout changes, so older caches are ignored."""
+
+ClassType = Literal["PL", "TP", "T", "T/TP"]
+
+CLASS_TYPES: tuple[ClassType, ...] = (
+    "PL",
+    "TP",
+    "T",
+    "T/TP",
+)
+
+ClassData = dict[
+    Literal["href"]
+    | Literal["className"]
+    | Literal["PL"]
+    | Literal["TP"]
+    | Literal["T"]
+    | Literal["T/TP"],
+    str | list[str] | None,
+]
+
+EXPECTED_COLUMNS = 5
+
+
+def readRecords(path: str) -> tuple[list[dict[str, str]], list[str]]:
+    if path.endswith(".csv"):
+        logger.info(f"Using native CSV {csv_version} module to read {path}")
+        records = []
+        with open(path, mode="r", encoding="utf-8") as csvfile:
+            reader = DictReader(csvfile)
+            headers = reader.fieldnames
+            if not headers:
+                raise ValueError("CSV file has no headers")
+            logger.info(f"Headers found in CSV: {len(headers)}")
+            for row in reader:
+                records.append(
+                    {
+                        key: (value if value else "")
+                        for key, value in row.items()
+                    }
+                )
+    elif path.endswith(".xlsx"):
+        # Only Excel tables need openpyxl, which takes a while to import
+        from openpyxl import load_workbook, __version__ as openpyxl_version
+
+        logger.info(f"Using openpyxl {openpyxl_version} to read {path}")
+        workbook = load_workbook(filename=path, data_only=True)
+        logger.info(f"Loaded workbook with {len(workbook.sheetnames)} sheets")
+        sheet = workbook.active
+        if not sheet:
+            raise ValueError("Excel file has no sheets")
+        logger.info(
+            f"Active sheet: {sheet.title}, {sheet.max_row} rows, {sheet.max_column} columns"
+        )
+        headers = [str(cell.value) for cell in sheet[1] if cell.value]
+        logger.info(f"Headers found: {len(headers)}")
+        if not headers:
+            raise ValueError("Excel file has no headers")
+        records = []
+        for values in sheet.iter_rows(min_row=2, values_only=True):
+            logger.debug(f"Row data: {values}")
+            record = {
+                headers[i]: (value if value else "")
+                for i, value in enumerate(values)
+                if i < len(headers)
+            }
+            records.append(record)
+    else:
+        raise ValueError("Unsupported file extension")
+
+    return records, list(headers)
+
+
+def compilePlan(path: str) -> dict[str, ClassData]:
+    """Reads and validates a schedule table into the ranked class numbers of every course."""
+    rows_dict, headers = readRecords(path)
+    logger.info(
+        f"Table loaded, found {len(rows_dict)} {len(rows_dict) == 1 and 'row' or 'rows'}"
+    )
+    logger.info(f"Table headers read: {headers}")
+    logger.info(f"Table rows read: {rows_dict}")
+
+    if not rows_dict or not headers:
+        raise ValueError("Given table is empty")
+    if len(headers) != EXPECTED_COLUMNS:
+        raise ValueError(
+            f"Given table must have exactly {EXPECTED_COLUMNS} columns"
+        )
+
+    classes_dict: dict[str, ClassData] = {}
+    for item in rows_dict:
+        classId = str(item.get(headers[0]) or "").replace(" ", "").split("#")[0]
+        if not classId:
+            continue
+        classData: ClassData = {"href": None}
+        for header, classType in zip(headers[1:], CLASS_TYPES):
+            value = str(item.get(header) or "").replace(" ", "")
+            classData[classType] = (
+                [number for number in value.split("#") if number]
+                if value
+                else None
+            )
+        classes_dict[classId] = classData
+    if not classes_dict:
+        raise ValueError(
+            "Given table must have at least 1 row IN addition to the headers"
+        )
+    return classes_dict
+
+
+def cachePath(path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+    return os.path.join(PLANS_PATH, f"{key}.json")
+
+
+def loadPlan(path: str) -> dict[str, ClassData]:
+    """Compiled plan of a schedule table, only read again when the file has changed since it was cached."""
+    stat = os.stat(path)
+    cached = readJson(cachePath(path))
+    if not isinstance(cached, dict) or cached.get("version") != PLAN_VERSION:
+        cached = None
+    if (
+        cached
+        and cached["mtime"] == stat.st_mtime_ns
+        and cached["size"] == stat.st_size
+    ):
+        logger.info(f"Using cached plan for {path}")
+        return cached["classes"]
+
+    with open(path, "rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    if cached and cached["hash"] == digest:
+        logger.info(f"Using cached plan for {path}, only its time changed")
+        classes = cached["classes"]
+    else:
+        classes = compilePlan(path)
+
+    try:
+        writeJson(
+            cachePath(path),
+            {
+                "version": PLAN_VERSION,
+                "path": os.path.abspath(path),
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "hash": digest,
+                "classes": classes,
+            },
+        )
+    except OSError as error:
+        logger.warning(f"Failed to cache plan for {path}: {error}")
+    return classes
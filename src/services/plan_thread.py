@@ -0,0 +1,24 @@
+from PySide6.QtCore import QThread, Signal
+
+from services.plan import loadPlan
+from utils.logger import logger
+
+
+class PlanThread(QThread):
+    """Compiles a schedule table in the background so a run can start from it right away."""
+
+    compiledSignal = Signal(str, dict)
+    failedSignal = Signal(str, str)
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            classes = loadPlan(self.path)
+        except Exception as error:
+            logger.warning(f"Failed to compile {self.path}: {error}")
+            self.failedSignal.emit(self.path, str(error))
+            return
+        self.compiledSignal.emit(self.path, classes)
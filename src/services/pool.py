@@ -0,0 +1,175 @@
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable
+
+from services.choices import BrowserChoice
+from utils.logger import logger
+
+if TYPE_CHECKING:
+    # Only for annotations, selenium is imported once a browser is started
+    from selenium import webdriver
+
+    Driver = webdriver.Chrome | webdriver.Firefox
+
+PoolKey = tuple[str, bool, bool]
+"""Browser, headless and lean pages, the options a browser is started with."""
+
+IDLE_LIMIT = 2
+"""Idle browsers kept at most, each one holds a few hundred megabytes."""
+
+
+def poolKey(
+    browserChoice: BrowserChoice, headless: bool, leanPages: bool
+) -> PoolKey:
+    return (browserChoice.value, headless, leanPages)
+
+
+def reset(driver: "Driver"):
+    """Leaves a browser like it was just started, with a single blank tab and no cookies."""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    try:
+        # Unlike the classic command, this clears the cookies of every site
+        driver.storage.delete_cookies()
+    except Exception:
+        driver.delete_all_cookies()
+    driver.get("about:blank")
+
+
+def quitDriver(driver: "Driver"):
+    try:
+        driver.quit()
+    except Exception as error:
+        logger.warning(f"Failed to quit browser: {error}")
+
+
+class DriverPool:
+    """Browsers kept running between runs, so a run takes a ready one instead of starting its own.
+
+    Every browser handed out is tracked until it comes back, so all of them are quit when the
+    app closes, even the ones a failed run never returned.
+    """
+
+    def __init__(self, limit: int = IDLE_LIMIT):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.idle: list[tuple[PoolKey, "Driver"]] = []
+        self.warming: dict[PoolKey, Future] = {}
+        self.leased: list["Driver"] = []
+        self.closed = False
+
+    def prewarm(self, key: PoolKey, start: Callable[[], "Driver"]):
+        """Starts a browser in the background for the next run, unless one is already ready or starting."""
+        with self.lock:
+            if (
+                self.closed
+                or key in self.warming
+                or any(idleKey == key for idleKey, _ in self.idle)
+            ):
+                return
+            future: Future = Future()
+            self.warming[key] = future
+
+        def warm():
+            try:
+                driver = start()
+            except Exception as error:
+                logger.warning(
+                    f"Failed to start a browser ahead of time: {error}"
+                )
+                with self.lock:
+                    self.warming.pop(key, None)
+            else:
+                self.keep(key, driver, warming=True)
+            future.set_result(None)
+
+        threading.Thread(target=warm, daemon=True).start()
+
+    def acquire(self, key: PoolKey) -> "Driver | None":
+        """A ready browser started with the same options, waiting for one that is starting, None if there is none."""
+        with self.lock:
+            future = self.warming.get(key)
+        if future is not None:
+            future.result()
+        while True:
+            with self.lock:
+                index = next(
+                    (
+                        index
+                        for index, (idleKey, _) in enumerate(self.idle)
+                        if idleKey == key
+                    ),
+                    None,
+                )
+                if index is None:
+                    return None
+                _, driver = self.idle.pop(index)
+                self.leased.append(driver)
+            try:
+                driver.window_handles
+                return driver
+            except Exception as error:
+                # The browser was closed by hand or crashed while it waited
+                logger.warning(f"Dropping a browser that stopped: {error}")
+                self.forget(driver)
+                quitDriver(driver)
+
+    def track(self, driver: "Driver"):
+        """Counts a browser a run started on its own, so it is quit with the rest."""
+        with self.lock:
+            self.leased.append(driver)
+
+    def release(self, key: PoolKey, driver: "Driver"):
+        """Takes a browser back once a run is done with it, quitting it if it can not be reset."""
+        self.forget(driver)
+        try:
+            reset(driver)
+        except Exception as error:
+            logger.warning(f"Failed to reset browser, quitting it: {error}")
+            quitDriver(driver)
+            return
+        self.keep(key, driver)
+
+    def keep(self, key: PoolKey, driver: "Driver", warming: bool = False):
+        with self.lock:
+            if warming:
+                self.warming.pop(key, None)
+            if self.closed:
+                extra = [driver]
+            else:
+                self.idle.append((key, driver))
+                extra = [idle for _, idle in self.idle[: -self.limit or None]]
+                del self.idle[: -self.limit or None]
+        for driver in extra:
+            quitDriver(driver)
+
+    def forget(self, driver: "Driver"):
+        with self.lock:
+            if driver in self.leased:
+                self.leased.remove(driver)
+
+    def clear(self):
+        """Quits the idle browsers, so the next run starts its own like the first run of the app."""
+        with self.lock:
+            drivers = [driver for _, driver in self.idle]
+            self.idle.clear()
+        for driver in drivers:
+            quitDriver(driver)
+
+    def close(self):
+        """Quits every browser, idle or in use, and keeps new ones from being kept."""
+        with self.lock:
+            self.closed = True
+            drivers = [driver for _, driver in self.idle] + self.leased
+            self.idle.clear()
+            self.leased.clear()
+        for driver in drivers:
+            quitDriver(driver)
+
+
+driverPool = DriverPool()
+atexit.register(driverPool.close)
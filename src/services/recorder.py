@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+from config.metadata import DATA_PATH
+from services.nonio import Page
+from services.plan import CLASS_TYPES
+
+RECORDINGS_PATH = os.path.join(DATA_PATH, "recordings")
+"""Where recorded runs are kept, one archive per run."""
+RUN_FILE = "run.json"
+"""Archive entry with the run details, actions, response timings and the index of the pages."""
+
+
+def recordingPath() -> str:
+    return os.path.join(
+        RECORDINGS_PATH, f"{datetime.now():%Y-%m-%d_%H-%M-%S-%f}.zip"
+    )
+
+
+class Recorder:
+    """Pages, actions and response timings of one run, kept in a compressed archive for replay.
+
+    Pages are written to the archive as they come so a long run does not hold them in memory,
+    the rest is written when the run ends. Times are seconds since the recording started.
+    """
+
+    def __init__(self, path: str, **details: str | int | bool):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.details = {
+            "startedAt": datetime.now().isoformat(timespec="seconds"),
+            **details,
+        }
+        self.startedAt = time.monotonic()
+        self.lock = threading.Lock()
+        self.archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+        self.pages: list[dict] = []
+        self.actions: list[dict] = []
+        self.responses: list[dict] = []
+
+    def elapsed(self) -> float:
+        return round(time.monotonic() - self.startedAt, 4)
+
+    def page(self, kind: str, url: str, html: str, **fields: str | int):
+        with self.lock:
+            if self.archive.fp is None:
+                return
+            name = f"pages/{len(self.pages):04d}-{kind}.html"
+            self.archive.writestr(name, html)
+            self.pages.append(
+                {
+                    "file": name,
+                    "kind": kind,
+                    "url": url,
+                    "time": self.elapsed(),
+                    **fields,
+                }
+            )
+
+    def action(self, name: str, **fields):
+        with self.lock:
+            self.actions.append(
+                {"name": name, "time": self.elapsed(), **fields}
+            )
+
+    def response(self, method: str, url: str, status: int, duration: float):
+        """Timing of a direct request, in the shape NonioSession reports it."""
+        with self.lock:
+            self.responses.append(
+                {
+                    "method": method,
+                    "url": url,
+                    "status": status,
+                    "time": round(self.elapsed() - duration, 4),
+                    "duration": round(duration, 4),
+                }
+            )
+
+    def close(self, timings: dict):
+        """Writes the run details next to the pages, nothing is recorded after this."""
+        with self.lock:
+            if self.archive.fp is None:
+                return
+            self.archive.writestr(
+                RUN_FILE,
+                json.dumps(
+                    {
+                        **self.details,
+                        "pages": self.pages,
+                        "actions": self.actions,
+                        "responses": self.responses,
+                        "timings": timings,
+                    },
+                    ensure_ascii=False,
+                ),
+            )
+            self.archive.close()
+
+
+REPLAYABLE_ENGINES = ("direct", "hybrid")
+"""Engines that read pages with the page parser, the browser engine reads them with scripts in the browser instead."""
+
+
+def parsePage(kind: str, url: str, html: str, dryRun: bool) -> dict:
+    """What the direct engine reads from a page of the given kind."""
+    page = Page(url, 200, {}, html)
+    if kind == "enrollments":
+        return {"enrollments": page.enrollments()}
+    if kind == "courses":
+        return {"courses": page.courseLinks()}
+    if kind == "course":
+        return {
+            "coursePage": "botaoVoltar" in page.ids,
+            "open": page.formWith("botaoGravar") is not None,
+            "options": {
+                classType: page.classOptions(classType, dryRun)[0]
+                for classType in CLASS_TYPES
+            },
+        }
+    return {}
+
+
+def replay(path: str) -> tuple[dict, list[dict]]:
+    """Feeds the pages of a recorded run through the page parser again, without a browser or network.
+
+    Returns the run details and every page entry with what was read from it and how long the
+    parsing took. Raises ValueError for runs of the browser engine, replaying them through the
+    parser would not reproduce what the browser read.
+    """
+    with zipfile.ZipFile(path) as archive:
+        run = json.loads(archive.read(RUN_FILE))
+        if run.get("engine") not in REPLAYABLE_ENGINES:
+            raise ValueError(
+                f"Only runs of the {' and '.join(REPLAYABLE_ENGINES)} engines can be replayed, this one used the {run.get('engine')} engine"
+            )
+        results = []
+        for entry in run["pages"]:
+            html = archive.read(entry["file"]).decode("utf-8")
+            start = time.perf_counter()
+            result = parsePage(
+                entry["kind"], entry["url"], html, run.get("dryRun", False)
+            )
+            results.append(
+                {
+                    **entry,
+                    "parse": round(time.perf_counter() - start, 6),
+                    "result": result,
+                }
+            )
+    return run, results
@@ -0,0 +1,129 @@
+import heapq
+import random
+import threading
+import time
+
+
+class EnrollmentQueue:
+    """Hands courses to enrollment workers and brings failed ones back with jittered backoff.
+
+    A course leaves the queue when it is done, when its own time budget runs out or when the
+    global deadline passes, so a slow course only ever holds up the worker visiting it.
+    """
+
+    def __init__(
+        self,
+        classIds: list[str],
+        deadline: float,
+        courseBudget: float,
+        retryDelay: float = 0.5,
+        retryMaxDelay: float = 5,
+    ):
+        self.deadline = time.monotonic() + deadline
+        self.courseBudget = courseBudget
+        self.retryDelay = retryDelay
+        self.retryMaxDelay = retryMaxDelay
+        self.condition = threading.Condition()
+        self.heap: list[tuple[float, int, str]] = [
+            (0, order, classId) for order, classId in enumerate(classIds)
+        ]
+        self.order = len(classIds)
+        self.active = 0
+        self.attempts: dict[str, int] = {classId: 0 for classId in classIds}
+        self.startedAt: dict[str, float] = {}
+        self.visiting: set[str] = set()
+        self.stopped = False
+        self.again: set[str] = set()
+        """Courses asked to be revisited while they were being visited."""
+        self.failed: dict[str, str] = {}
+        """Reason each course was given up on."""
+
+    def next(self) -> str | None:
+        """Blocks until a course is ready to be visited, None once there is nothing left to do."""
+        with self.condition:
+            while True:
+                if self.stopped:
+                    return None
+                now = time.monotonic()
+                if now >= self.deadline:
+                    self.expire("the enrollment deadline was reached")
+                    return None
+                if not self.heap:
+                    if not self.active:
+                        return None
+                    self.condition.wait(self.deadline - now)
+                    continue
+                readyAt, _, classId = self.heap[0]
+                if readyAt > now:
+                    self.condition.wait(min(readyAt, self.deadline) - now)
+                    continue
+                heapq.heappop(self.heap)
+                self.visiting.add(classId)
+                self.active += 1
+                self.attempts[classId] += 1
+                self.startedAt.setdefault(classId, now)
+                return classId
+
+    def done(self, classId: str):
+        with self.condition:
+            self.active -= 1
+            self.visiting.discard(classId)
+            if classId in self.again:
+                self.again.discard(classId)
+                self.startedAt.pop(classId, None)
+                self.push(time.monotonic(), classId)
+            self.condition.notify_all()
+
+    def retry(self, classId: str, reason: str) -> bool:
+        """Schedules another visit to the course, False if it is out of time and was given up on."""
+        with self.condition:
+            self.active -= 1
+            self.visiting.discard(classId)
+            self.condition.notify_all()
+            now = time.monotonic()
+            if self.stopped:
+                self.failed[classId] = reason
+                return False
+            if classId in self.again:
+                self.again.discard(classId)
+                self.startedAt.pop(classId, None)
+            elif now - self.startedAt[classId] >= self.courseBudget:
+                self.failed[classId] = reason
+                return False
+            backoff = min(
+                self.retryMaxDelay,
+                self.retryDelay * 2 ** (self.attempts[classId] - 1),
+            )
+            readyAt = now + backoff * random.uniform(0.5, 1.5)
+            if readyAt >= self.deadline:
+                self.failed[classId] = reason
+                return False
+            self.push(readyAt, classId)
+            return True
+
+    def revisit(self, classId: str):
+        """Brings a course back right away, with a fresh time budget, for when its saved picks have to change."""
+        with self.condition:
+            self.failed.pop(classId, None)
+            if classId in self.visiting:
+                self.again.add(classId)
+            elif all(queued != classId for _, _, queued in self.heap):
+                self.startedAt.pop(classId, None)
+                self.push(time.monotonic(), classId)
+            self.condition.notify_all()
+
+    def stop(self):
+        """Ends the work, waiting workers get None and queued courses are given up on."""
+        with self.condition:
+            self.stopped = True
+            self.expire("the run was stopped")
+
+    def push(self, readyAt: float, classId: str):
+        heapq.heappush(self.heap, (readyAt, self.order, classId))
+        self.order += 1
+
+    def expire(self, reason: str):
+        for _, _, classId in self.heap:
+            self.failed.setdefault(classId, reason)
+        self.heap.clear()
+        self.condition.notify_all()
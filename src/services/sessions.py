@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from config.metadata import DATA_PATH
+from utils.json_cache import readJson, writeJson
+from utils.logger import logger
+
+SESSIONS_PATH = os.path.join(DATA_PATH, "sessions.json")
+"""Where the login cookies of each account are kept between runs, encrypted."""
+SESSION_LIFETIME = 12 * 60 * 60
+"""Seconds saved cookies are tried for, older ones are dropped without spending a request on them."""
+KEY_ITERATIONS = 200_000
+CACHED_KEYS = 4
+"""Accounts whose keys are kept, a batch derives the rest again when it gets back to them."""
+
+COOKIE_KEYS = (
+    "name",
+    "value",
+    "path",
+    "domain",
+    "secure",
+    "httpOnly",
+    "expiry",
+)
+
+lock = threading.Lock()
+keyLock = threading.Lock()
+keys: dict[tuple[str, str], Future[Fernet]] = {}
+keyPool = ThreadPoolExecutor(thread_name_prefix="session-key")
+
+
+def sessionKey(baseUrl: str, email: str) -> str:
+    return f"{baseUrl} {email.strip().lower()}"
+
+
+def deriveCipher(email: str, password: str) -> Fernet:
+    """Key derived from the credentials, so the cookies can only be read by whoever can log in anyway."""
+    key = hashlib.pbkdf2_hmac(
+        "sha256", password.encode(), email.encode(), KEY_ITERATIONS
+    )
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def prepareCipher(email: str, password: str) -> Future[Fernet]:
+    """Starts deriving the key of an account in the background, so it is ready by the time the login needs it."""
+    credentials = (email.strip().lower(), password)
+    with keyLock:
+        future = keys.pop(credentials, None)
+        if future is None:
+            future = keyPool.submit(deriveCipher, *credentials)
+        keys[credentials] = future
+        while len(keys) > CACHED_KEYS:
+            del keys[next(iter(keys))]
+    return future
+
+
+def cipher(email: str, password: str) -> Fernet:
+    return prepareCipher(email, password).result()
+
+
+def readCache() -> dict[str, str]:
+    return readJson(SESSIONS_PATH) or {}
+
+
+def writeCache(cache: dict[str, str]):
+    try:
+        writeJson(SESSIONS_PATH, cache)
+    except OSError as error:
+        logger.warning(f"Failed to save the login session: {error}")
+
+
+def readSession(baseUrl: str, email: str, password: str) -> list[dict] | None:
+    """Cookies of the last login of an account, None if there is none, it expired or the password changed."""
+    with lock:
+        token = readCache().get(sessionKey(baseUrl, email))
+    if token is None:
+        return None
+    try:
+        return json.loads(
+            cipher(email, password).decrypt(token, SESSION_LIFETIME)
+        )
+    except (InvalidToken, ValueError):
+        return None
+
+
+def saveSession(baseUrl: str, email: str, password: str, cookies: list[dict]):
+    """Keeps the cookies of a logged in browser or session, in the format of get_cookies."""
+    token = cipher(email, password).encrypt(
+        json.dumps(
+            [
+                {key: cookie[key] for key in COOKIE_KEYS if key in cookie}
+                for cookie in cookies
+            ]
+        ).encode()
+    )
+    with lock:
+        cache = readCache()
+        cache[sessionKey(baseUrl, email)] = token.decode()
+        writeCache(cache)
+
+
+def forgetSession(baseUrl: str, email: str):
+    """Drops the cookies of an account, for when they no longer log in."""
+    with lock:
+        cache = readCache()
+        if cache.pop(sessionKey(baseUrl, email), None):
+            writeCache(cache)
@@ -0,0 +1,190 @@
+import re
+import threading
+
+from services.nonio import ClassOption
+
+SLOT_MINUTES = 30
+"""Length of each bit in a schedule bitset."""
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+WEEKDAYS = ("seg", "ter", "qua", "qui", "sex", "sáb", "dom")
+"""Start of the weekday names nonio writes schedules with, Monday first."""
+
+SCHEDULE_PATTERN = re.compile(
+    r"(\w+)[^\d\s]*\s+(\d{1,2})[:h](\d{2})\s*-\s*(\d{1,2})[:h](\d{2})"
+)
+
+UNPICKED = 1 << 20
+"""Cost of leaving a class type without an option, higher than any ranking."""
+FALLBACK = 1 << 12
+"""Cost of an option that is not in the preferences, higher than any preference rank."""
+RANK = 4
+"""Cost of each step down the preferences."""
+CHANGE = 1
+"""Cost of changing a class already picked, less than a rank so it only happens for a better timetable."""
+SEARCH_LIMIT = 50_000
+"""Options tried before the search settles for the best combination found so far."""
+
+Group = tuple[list[str], list[ClassOption], str | None]
+"""Ranked preferences, options and number of the option currently picked for a class type."""
+
+
+def parseSlots(schedule: str) -> int:
+    """Bitset of the half hours of the week a schedule takes, 0 if it can not be read so it never clashes."""
+    slots = 0
+    for (
+        day,
+        startHour,
+        startMinute,
+        endHour,
+        endMinute,
+    ) in SCHEDULE_PATTERN.findall(schedule):
+        weekday = day[:3].lower()
+        if weekday not in WEEKDAYS:
+            continue
+        offset = WEEKDAYS.index(weekday) * SLOTS_PER_DAY
+        start = (int(startHour) * 60 + int(startMinute)) // SLOT_MINUTES
+        end = -(-(int(endHour) * 60 + int(endMinute)) // SLOT_MINUTES)
+        if end > start:
+            slots |= ((1 << (end - start)) - 1) << (offset + start)
+    return slots
+
+
+def candidates(
+    preferences: list[str], options: list[ClassOption], current: str | None
+) -> list[tuple[int, int, ClassOption | None]]:
+    """Options worth trying for a class type as cost, slots and option, cheapest first."""
+    available = {
+        option["number"]: option
+        for option in options
+        if option["checked"] or not option["disabled"]
+    }
+    ranked: list[tuple[int, int, ClassOption | None]] = []
+    for rank, number in enumerate(preferences):
+        option = available.pop(number, None)
+        if option is not None:
+            ranked.append((rank * RANK, parseSlots(option["schedule"]), option))
+    # Free options nobody asked for are only used when every preference is full or clashes
+    for option in available.values():
+        ranked.append(
+            (
+                FALLBACK + len(ranked) * RANK,
+                parseSlots(option["schedule"]),
+                option,
+            )
+        )
+    if current is not None:
+        ranked = [
+            (
+                cost + (CHANGE if option["number"] != current else 0),  # type: ignore
+                slots,
+                option,
+            )
+            for cost, slots, option in ranked
+        ]
+        ranked.sort(key=lambda candidate: candidate[0])
+    ranked.append((UNPICKED, 0, None))
+    return ranked
+
+
+def solve(groups: list[Group], taken: int = 0) -> list[ClassOption | None]:
+    """Best ranked options that do not clash with each other or with the taken slots, one per group.
+
+    Searches depth first with the slots picked so far in a bitset, dropping branches that can
+    not beat the best combination found.
+    """
+    choices = [
+        candidates(preferences, options, current)
+        for preferences, options, current in groups
+    ]
+    # Class types with fewer choices go first so clashes cut the search early
+    order = sorted(range(len(choices)), key=lambda index: len(choices[index]))
+    cheapest = [min(cost for cost, _, _ in choices[index]) for index in order]
+    remaining = [sum(cheapest[depth:]) for depth in range(len(order) + 1)]
+    best: list[ClassOption | None] = [None] * len(groups)
+    bestCost = UNPICKED * (len(groups) + 1)
+    current: list[ClassOption | None] = [None] * len(groups)
+    tries = 0
+
+    def search(depth: int, slots: int, cost: int):
+        nonlocal best, bestCost, tries
+        if cost + remaining[depth] >= bestCost or tries >= SEARCH_LIMIT:
+            return
+        if depth == len(order):
+            best, bestCost = list(current), cost
+            return
+        index = order[depth]
+        for optionCost, optionSlots, option in choices[index]:
+            if optionSlots & slots:
+                continue
+            tries += 1
+            current[index] = option
+            search(depth + 1, slots | optionSlots, cost + optionCost)
+        current[index] = None
+
+    search(0, taken, 0)
+    return best
+
+
+class Timetable:
+    """Options picked for every course read so far, shared by every enrollment worker.
+
+    Each course that is read is solved together with the ones read before it. When a better
+    timetable needs a course that was already saved to change, the course is left for a revisit.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.groups: dict[
+            tuple[str, str], tuple[list[str], list[ClassOption]]
+        ] = {}
+        self.held: dict[tuple[str, str], ClassOption | None] = {}
+        self.revisits: dict[str, set[str]] = {}
+
+    def pick(
+        self,
+        course: str,
+        preferences: dict[str, list[str]],
+        options: dict[str, list[ClassOption]],
+    ) -> dict[str, ClassOption | None]:
+        """Best option of every class type of a course that fits the timetable of all courses."""
+        with self.lock:
+            for classType, typeOptions in options.items():
+                self.groups[(course, classType)] = (
+                    preferences.get(classType, []),
+                    typeOptions,
+                )
+            keys = list(self.groups)
+            chosen = solve(
+                [
+                    (
+                        *self.groups[key],
+                        None
+                        if key[0] == course and key[1] in options
+                        else self.number(key),
+                    )
+                    for key in keys
+                ]
+            )
+            for key, option in zip(keys, chosen):
+                other, classType = key
+                if (
+                    key in self.held
+                    and (other != course or classType not in options)
+                    and self.number(key) != (option and option["number"])
+                ):
+                    self.revisits.setdefault(other, set()).add(classType)
+                self.held[key] = option
+        return {
+            classType: self.held[(course, classType)] for classType in options
+        }
+
+    def number(self, key: tuple[str, str]) -> str | None:
+        option = self.held.get(key)
+        return option["number"] if option is not None else None
+
+    def takeRevisits(self) -> dict[str, set[str]]:
+        """Class types of each course whose pick changed since it was saved."""
+        with self.lock:
+            revisits, self.revisits = self.revisits, {}
+        return revisits
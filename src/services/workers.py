@@ -0,0 +1,78 @@
+import time
+
+from PySide6.QtCore import QThread, Signal
+
+from services.host import STOP_GRACE, engineProcess
+from utils.log_buffer import LogBuffer
+from utils.logger import LogLevel
+
+MESSAGE_WAIT = 0.1
+"""Seconds to wait for a message before checking on the engine process."""
+
+
+class ProcessWorker(QThread):
+    """Runs an EnrollmentRun in the engine process, relaying its output, timings and picks to the window.
+
+    Takes the same arguments as EnrollmentRun, or as BatchRun with the batch command. A stopped
+    run that does not end within the grace period gets its process killed, so a stuck browser never
+    holds the app.
+    """
+
+    timingsSignal = Signal(list)
+
+    def __init__(self, command: str = "run", **inputs):
+        super().__init__()
+        self.command = command
+        self.inputs = inputs
+        self.warmUp = (
+            inputs.get("warmUp", False) or inputs.get("startAt") is not None
+        )
+        self.engine = engineProcess
+        self.outputBuffer = LogBuffer()
+        self.picked: dict[str, str | None] = {}
+        self.killAt: float | None = None
+
+    def output(self, text: str, level: LogLevel = LogLevel.INFO):
+        self.outputBuffer.push(text, level.value)
+
+    def trigger(self):
+        self.engine.startEvent.set()
+
+    def stop(self):
+        self.killAt = time.monotonic() + STOP_GRACE
+        self.engine.stopEvent.set()
+
+    def run(self):
+        self.killAt = None
+        try:
+            self.engine.run(self.inputs, self.command)
+        except Exception as error:
+            self.output(
+                f"Failed to start the run process: {error}", LogLevel.ERROR
+            )
+            return
+        while True:
+            message = self.engine.nextMessage(MESSAGE_WAIT)
+            if message is None:
+                if not self.engine.alive():
+                    self.output(
+                        "The run process exited unexpectedly, the browser may have crashed",
+                        LogLevel.ERROR,
+                    )
+                    return
+                if self.killAt is not None and time.monotonic() > self.killAt:
+                    self.engine.kill()
+                    self.output(
+                        f"The run did not stop within {STOP_GRACE} seconds, its process and browsers were killed",
+                        LogLevel.WARNING,
+                    )
+                    return
+                continue
+            if message[0] == "output":
+                self.outputBuffer.push(message[1], message[2])
+            elif message[0] == "timings":
+                self.timingsSignal.emit(message[1])
+            elif message[0] == "picked":
+                self.picked = message[1]
+            elif message[0] == "done":
+                return
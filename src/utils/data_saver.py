@@ -12,7 +12,7 @@ from qfluentwidgets import (
     ColorValidator,
 )
 
-from services.browser import BrowserChoice
+from services.choices import BrowserChoice, EngineChoice
 
 from config.metadata import DATA_PATH
 
@@ -60,6 +60,11 @@ class Config(QConfig):
         "BrowserChoice",
         BrowserChoice.CHROME.value,
     )
+    engineChoice = ConfigItem(
+        "Browser",
+        "EngineChoice",
+        EngineChoice.BROWSER.value,
+    )
     enrollmentIndex = ConfigItem(
         "Browser",
         "EnrollmentIndex",
@@ -70,6 +75,21 @@ class Config(QConfig):
         "TablePath",
         "",
     )
+    scheduledStart = ConfigItem("Browser", "ScheduledStart", False)
+    startTime = ConfigItem("Browser", "StartTime", "10:00:00")
+    parallelBrowsers = ConfigItem(
+        "Browser",
+        "ParallelBrowsers",
+        1,
+    )
+    leanPages = ConfigItem("Browser", "LeanPages", True)
+    recordRuns = ConfigItem("Browser", "RecordRuns", False)
+    batchMode = ConfigItem("Browser", "BatchMode", False)
+    manifestPath = ConfigItem(
+        "Browser",
+        "ManifestPath",
+        "",
+    )
 
     def reset(self):
         for _, attr in self.__class__.__dict__.items():
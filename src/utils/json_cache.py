@@ -0,0 +1,36 @@
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def readJson(path: str) -> Any:
+    """Contents of a JSON file, None if it is missing or can not be read."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def writeJson(path: str, data: Any):
+    """Replaces a JSON file in one step, raising OSError if it can not be written.
+
+    The app and the engine process write the same caches, so every write goes through a
+    temporary file of its own that no other writer can move into place half written.
+    """
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(
+        dir=folder, prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with open(descriptor, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,27 @@
+import threading
+from collections import deque
+
+VIEW_LINES = 2000
+"""Lines the log view keeps, older ones are only in the log files."""
+
+
+class LogBuffer:
+    """Output lines waiting for the log view, filled by workers and drained by the view on a timer.
+
+    Lines pile up here instead of crossing over to the UI thread one by one, and only the last
+    lines the view can show are kept if it falls behind.
+    """
+
+    def __init__(self, size: int = VIEW_LINES):
+        self.lock = threading.Lock()
+        self.lines: deque[tuple[str, str]] = deque(maxlen=size)
+
+    def push(self, text: str, level: str):
+        with self.lock:
+            self.lines.append((text, level))
+
+    def drain(self) -> list[tuple[str, str]]:
+        with self.lock:
+            lines = list(self.lines)
+            self.lines.clear()
+        return lines
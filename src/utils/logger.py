@@ -1,10 +1,10 @@
 import datetime
 from enum import Enum
+import multiprocessing
 import os
 import sys
 
 from loguru import logger
-from PySide6 import QtCore
 
 from config.metadata import DATA_PATH
 
@@ -30,8 +30,9 @@ trace = "__compiled__" not in globals() or "--debug" in sys.argv[1:]
 logger.remove()
 logger.level(LogLevel.INFO.value, color="<green>")
 
+consoleSink: int | None = None
 if trace:
-    logger.add(
+    consoleSink = logger.add(
         sys.stdout,
         colorize=True,
         format=formatter,
@@ -39,8 +40,14 @@ if trace:
         enqueue=True,
     )
 
+# Processes spawned by the app, like the engine, write to a file of their own,
+# two processes writing to and rotating the same file would lose lines
+processName = multiprocessing.current_process().name
+fileSuffix = "" if processName == "MainProcess" else f".{processName}"
 logger.add(
-    os.path.join(LOGS_PATH, "{time:YYYY-MM-DD!UTC}.log".replace("\\", "/")),
+    os.path.join(
+        LOGS_PATH, f"{{time:YYYY-MM-DD!UTC}}{fileSuffix}.log".replace("\\", "/")
+    ),
     format=formatter,
     rotation=datetime.time(0, 0, 0, tzinfo=datetime.timezone.utc),
     retention="30 days",
@@ -49,19 +56,9 @@ logger.add(
 )
 
 
-def qMessageHandler(
-    mode: QtCore.QtMsgType, _: QtCore.QMessageLogContext, message: str
-):
-    match mode:
-        case QtCore.QtMsgType.QtDebugMsg:
-            logger.debug(message)
-        case QtCore.QtMsgType.QtInfoMsg:
-            logger.debug(message)
-        case QtCore.QtMsgType.QtWarningMsg:
-            logger.warning(message)
-        case QtCore.QtMsgType.QtCriticalMsg:
-            logger.error(message)
-        case QtCore.QtMsgType.QtFatalMsg:
-            logger.critical(message)
-        case _:
-            logger.trace(message)
+def quietConsole():
+    """Stops printing log lines to the console, for the command line runner that prints the run output itself."""
+    global consoleSink
+    if consoleSink is not None:
+        logger.remove(consoleSink)
+        consoleSink = None
@@ -0,0 +1,25 @@
+import importlib
+import threading
+
+from utils.logger import logger
+
+PRELOAD_MODULES = (
+    "openpyxl",
+    "PySide6.QtMultimedia",
+    "services.workers",
+)
+"""Modules the window shows without, imported in the background once it is up so the first run does not wait on them.
+
+Selenium is left out, runs happen in the engine process which imports it as soon as it starts.
+"""
+
+
+def preload(modules: tuple[str, ...] = PRELOAD_MODULES):
+    def load():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as error:
+                logger.warning(f"Failed to preload {name}: {error}")
+
+    threading.Thread(target=load, daemon=True).start()
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Timings:
+    """Collects monotonic clock spans for the phases of a run, from any thread."""
+
+    def __init__(self):
+        self.startedAt = time.monotonic()
+        self.lock = threading.Lock()
+        self.spans: list[dict] = []
+
+    @contextmanager
+    def span(self, name: str, **fields: str | int | bool):
+        start = time.monotonic()
+        try:
+            # Fields added to the yielded dict before the span ends are kept with it
+            yield fields
+        finally:
+            end = time.monotonic()
+            with self.lock:
+                self.spans.append(
+                    {
+                        "name": name,
+                        "start": round(start - self.startedAt, 4),
+                        "duration": round(end - start, 4),
+                        "thread": threading.current_thread().name,
+                        **fields,
+                    }
+                )
+
+    def summary(self) -> list[dict]:
+        """Spans grouped by name in the order they first started, with their count, total and slowest duration."""
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        phases: dict[str, dict] = {}
+        for span in spans:
+            phase = phases.setdefault(
+                span["name"],
+                {"name": span["name"], "count": 0, "total": 0.0, "max": 0.0},
+            )
+            phase["count"] += 1
+            phase["total"] = round(phase["total"] + span["duration"], 4)
+            phase["max"] = max(phase["max"], span["duration"])
+        return list(phases.values())
+
+    def record(self) -> str:
+        """Every span and the total run time as a single line of JSON."""
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        return json.dumps(
+            {
+                "total": round(time.monotonic() - self.startedAt, 4),
+                "spans": spans,
+            },
+            ensure_ascii=False,
+        )
+
+
+class LatencyWindow:
+    """Keeps the latest durations of page loads to size timeouts from what the run has seen so far."""
+
+    def __init__(self, size: int = 20):
+        self.lock = threading.Lock()
+        self.samples: deque[float] = deque(maxlen=size)
+
+    def add(self, duration: float):
+        with self.lock:
+            self.samples.append(duration)
+
+    def timeout(
+        self,
+        default: float,
+        floor: float,
+        ceiling: float,
+        factor: float = 4,
+    ) -> float:
+        """A few times the slowest typical duration, kept within the bounds, the default before any samples."""
+        with self.lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return default
+        typical = samples[int(0.9 * (len(samples) - 1))]
+        return max(floor, min(ceiling, typical * factor))
@@ -16,11 +16,15 @@ try:
 finally:
     sys.stdout.close()
     sys.stdout = old
-from PySide6.QtCore import QSize, QPoint
+from PySide6.QtCore import QSize, QPoint, QTimer
 
 from utils.data_saver import config
 from pages.home import HomePage
+from pages.lazy import LazyPage
 from pages.settings import SettingsPage
+from services.host import engineProcess
+from services.pool import driverPool
+from utils.preload import preload
 
 
 class Window(FluentWindow):
@@ -45,13 +49,15 @@ class Window(FluentWindow):
         self.addSubInterface(HomePage(), FluentIcon.HOME, "Home")
 
         self.addSubInterface(
-            SettingsPage(),
+            LazyPage("Settings", SettingsPage),
             FluentIcon.SETTING,
             "Settings",
             NavigationItemPosition.BOTTOM,
         )
 
         self.splashScreen.finish()
+        # Runs once the event loop is up, after the window was first painted
+        QTimer.singleShot(0, preload)
 
     def closeEvent(self, e):
         """Saves the current window geometry and other settings before closing."""
@@ -61,4 +67,6 @@ class Window(FluentWindow):
         config.y.set(self.y())
         config.maximized.set(self.isMaximized())
         config.save()
+        driverPool.close()
+        engineProcess.close()
         super().closeEvent(e)
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+from conftest import EMAIL, PASSWORD
+
+from services.batch import BatchRun, defaultSlots, readManifest
+from services.browser import BrowserChoice, EngineChoice
+from services.nonio_mock import MockNonio
+
+
+def writeManifest(path: str, rows: list[tuple[str, str, str]]):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("Email,Password,Table\n")
+        for row in rows:
+            file.write(",".join(row) + "\n")
+
+
+def testReadManifest(tmp_path):
+    manifestPath = os.path.join(tmp_path, "manifest.csv")
+    with open(manifestPath, "w", encoding="utf-8") as file:
+        file.write("Email,Password,Table,Enrollment index\n")
+        file.write("a@student.uc.pt,secret,a.csv,2\n")
+        file.write(",,,\n")
+        file.write("b@student.uc.pt,secret,tables/b.csv,\n")
+
+    accounts = readManifest(manifestPath)
+
+    assert [account["email"] for account in accounts] == [
+        "a@student.uc.pt",
+        "b@student.uc.pt",
+    ]
+    assert accounts[0]["enrollmentIndex"] == 2
+    assert accounts[1]["enrollmentIndex"] == 1
+    assert accounts[1]["tablePath"] == os.path.join(tmp_path, "tables", "b.csv")
+
+
+def testDefaultSlotsAreBounded():
+    chrome = BrowserChoice.CHROME
+
+    assert defaultSlots(EngineChoice.BROWSER, chrome, 1) >= 1
+    assert defaultSlots(EngineChoice.BROWSER, chrome, 64) == 1
+    assert defaultSlots(EngineChoice.DIRECT, chrome, 1) > defaultSlots(
+        EngineChoice.BROWSER, chrome, 1
+    )
+
+
+def testRaceAccountsTakeTwoSlots(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    monkeypatch.setattr("services.batch.totalMemory", lambda: None)
+
+    assert defaultSlots(EngineChoice.BROWSER, BrowserChoice.CHROME, 2) == 4
+    assert defaultSlots(EngineChoice.BROWSER, BrowserChoice.RACE, 2) == 2
+
+
+def testBatchRunsEveryAccount(mockNonio: MockNonio, tmp_path):
+    tablePath = os.path.join(tmp_path, "table.csv")
+    mockNonio.writeTable(tablePath, 2)
+    manifestPath = os.path.join(tmp_path, "manifest.csv")
+    writeManifest(
+        manifestPath,
+        [
+            (EMAIL, PASSWORD, "table.csv"),
+            ("other@student.uc.pt", "wrong", "table.csv"),
+        ],
+    )
+    batch = BatchRun(
+        manifestPath=manifestPath,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        engineChoice=EngineChoice.DIRECT,
+        slots=2,
+    )
+
+    batch.run()
+
+    assert len(batch.results[EMAIL]) == 6
+    assert batch.results["other@student.uc.pt"] == {}
+    assert len(mockNonio.picked) == 6
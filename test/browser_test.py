@@ -0,0 +1,257 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from conftest import EMAIL, PASSWORD
+from selenium.common.exceptions import NoSuchElementException
+
+from services import browser
+from services.browser import BrowserChoice, EnrollmentRun
+from services.choices import RACERS
+from services.plan import ClassData, ClassType
+from utils.timings import Timings
+
+
+class FakeDriver:
+    """Finds its element only after a delay, and reports a fixed ready state."""
+
+    current_url = "http://localhost/page"
+
+    def __init__(self, appearsAfter: float, readyState: str):
+        self.appearsAt = time.monotonic() + appearsAfter
+        self.readyState = readyState
+
+    def find_element(self, by: str, value: str):
+        if time.monotonic() < self.appearsAt:
+            raise NoSuchElementException(value)
+        return value
+
+    def execute_script(self, script: str):
+        return self.readyState
+
+
+@pytest.fixture
+def thread(monkeypatch: pytest.MonkeyPatch) -> EnrollmentRun:
+    monkeypatch.setattr(browser, "ELEMENT_TIMEOUT", 0.1)
+    monkeypatch.setattr(browser, "ELEMENT_TIMEOUT_MIN", 0.1)
+    monkeypatch.setattr(browser, "ELEMENT_TIMEOUT_MAX", 1)
+    return EnrollmentRun(
+        loginEmail=EMAIL,
+        loginPassword=PASSWORD,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        enrollmentIndex=1,
+        tablePath="",
+    )
+
+
+def testWaitOutlastsSlowPage(thread: EnrollmentRun):
+    driver = FakeDriver(appearsAfter=0.35, readyState="loading")
+
+    assert thread.waitForElement(driver, "table") == "table"  # type: ignore
+    assert thread.latency.samples
+
+
+def testWaitFailsFastOnLoadedPage(thread: EnrollmentRun):
+    driver = FakeDriver(appearsAfter=60, readyState="complete")
+
+    start = time.monotonic()
+    with pytest.raises(NoSuchElementException):
+        thread.waitForElement(driver, "table")  # type: ignore
+    assert time.monotonic() - start < 0.5
+
+
+def testWaitGivesUpOnPageThatNeverLoads(thread: EnrollmentRun):
+    driver = FakeDriver(appearsAfter=60, readyState="loading")
+
+    with pytest.raises(NoSuchElementException):
+        thread.waitForElement(driver, "table")  # type: ignore
+
+
+def startRace(
+    thread: EnrollmentRun, delays: dict[BrowserChoice, float | None]
+) -> tuple[object, list]:
+    """Races browsers that start after their delay, or fail to if it is None."""
+
+    def setupDriver(browserChoice: BrowserChoice):
+        delay = delays[browserChoice]
+        if delay is None:
+            raise RuntimeError(f"{browserChoice.value} is not installed")
+        time.sleep(delay)
+        return browserChoice
+
+    thread.setupDriver = setupDriver  # type: ignore
+    pool = ThreadPoolExecutor(max_workers=len(RACERS))
+    futures = [pool.submit(setupDriver, browser) for browser in RACERS]
+    return thread.raceDrivers(futures), futures
+
+
+def testRaceTakesFirstReadyBrowser(thread: EnrollmentRun):
+    winner, helpers = startRace(
+        thread, {BrowserChoice.CHROME: 0.3, BrowserChoice.FIREFOX: 0}
+    )
+
+    assert winner == BrowserChoice.FIREFOX
+    assert helpers == [thread.racing]
+    assert helpers[0].result() == BrowserChoice.CHROME
+
+
+def testRaceGoesOnWhenOneBrowserFails(thread: EnrollmentRun):
+    winner, helpers = startRace(
+        thread, {BrowserChoice.CHROME: 0.1, BrowserChoice.FIREFOX: None}
+    )
+
+    assert winner == BrowserChoice.CHROME
+    assert helpers == []
+    assert "Firefox failed to start" in thread.outputBuffer.drain()[0][0]
+
+
+def testRaceFailsWhenNoBrowserStarts(thread: EnrollmentRun):
+    with pytest.raises(RuntimeError, match="is not installed"):
+        startRace(
+            thread, {BrowserChoice.CHROME: None, BrowserChoice.FIREFOX: None}
+        )
+
+
+class SessionDriver:
+    """Keeps the pages it was sent to and the cookies it was given."""
+
+    def __init__(self, cookies: list[dict] | None = None):
+        self.cookies = cookies or []
+        self.pages: list[str] = []
+
+    def get(self, url: str):
+        self.pages.append(url)
+
+    def get_cookies(self) -> list[dict]:
+        return self.cookies
+
+    def add_cookie(self, cookie: dict):
+        self.cookies.append(cookie)
+
+
+def testCopySessionSendsOnlyCookieFields(thread: EnrollmentRun):
+    source = SessionDriver(
+        [{"name": "JSESSIONID", "value": "1", "path": "/", "sameSite": "Lax"}]
+    )
+    target = SessionDriver()
+
+    thread.copySession(source, target)  # type: ignore
+
+    assert target.pages == [browser.BASE_URL]
+    assert target.cookies == [{"name": "JSESSIONID", "value": "1", "path": "/"}]
+
+
+def testReleaseHelpersReturnsEveryStartedBrowser(
+    thread: EnrollmentRun, monkeypatch: pytest.MonkeyPatch
+):
+    released = []
+    monkeypatch.setattr(
+        browser.driverPool,
+        "release",
+        lambda key, driver: released.append(driver),
+    )
+    started, failed = Future(), Future()
+    started.set_result("late")
+    failed.set_exception(RuntimeError("not installed"))
+    helpers = ["ready"]
+
+    thread.releaseHelpers(
+        ThreadPoolExecutor(max_workers=1),
+        [started, failed, Future()],
+        helpers,  # type: ignore
+    )
+
+    assert released == ["ready", "late"]
+    assert helpers == []
+
+
+def testCoursesAreSplitBetweenBrowsers(thread: EnrollmentRun):
+    thread.timings = Timings()
+    visited: dict[str, set[str]] = {}
+
+    def visitor(name: str):
+        def visit(
+            classId: str, classData: ClassData, classTypes: list[ClassType]
+        ):
+            visited.setdefault(name, set()).add(classId)
+            time.sleep(0.05)
+            return {classData["className"]: "#1"}, []
+
+        return visit
+
+    courses: list[tuple[str, ClassData]] = [
+        (
+            str(number),
+            {
+                "href": "",
+                "className": f"C{number}",
+                "PL": "1",
+                "TP": None,
+                "T": None,
+                "T/TP": None,
+            },
+        )
+        for number in range(4)
+    ]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        thread.enrollCourses(courses, [visitor("a"), visitor("b")], pool)
+
+    assert set(visited) == {"a", "b"}
+    assert visited["a"] | visited["b"] == {"0", "1", "2", "3"}
+    assert not visited["a"] & visited["b"]
+    assert thread.picked == {f"C{number}": "#1" for number in range(4)}
+
+
+class OptionsDriver:
+    """Stands in for a browser, keeping the options it was started with."""
+
+    def __init__(self, options, service):
+        self.options = options
+        self.commands: dict[str, dict] = {}
+
+    def execute_cdp_cmd(self, command: str, parameters: dict):
+        self.commands[command] = parameters
+
+
+def testLeanChromeSkipsAssets(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(browser.webdriver, "Chrome", OptionsDriver)
+
+    lean = browser.setupChromium(None, headless=True, leanPages=True)
+    full = browser.setupChromium(None, headless=True, leanPages=False)
+
+    assert lean.options.page_load_strategy == "eager"
+    assert lean.commands == {
+        "Network.enable": {},
+        "Network.setBlockedURLs": {"urls": list(browser.BLOCKED_URLS)},
+    }
+    assert full.options.page_load_strategy == "normal"
+    assert full.commands == {}
+
+
+def testLeanFirefoxSkipsAssets(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(browser.webdriver, "Firefox", OptionsDriver)
+
+    lean = browser.setupFirefox(None, headless=True, leanPages=True)
+    full = browser.setupFirefox(None, headless=True, leanPages=False)
+
+    assert lean.options.page_load_strategy == "eager"
+    assert lean.options.preferences["permissions.default.stylesheet"] == 2
+    assert not lean.options.preferences["gfx.downloadable_fonts.enabled"]
+    assert full.options.page_load_strategy == "normal"
+    assert "permissions.default.stylesheet" not in full.options.preferences
+
+
+def testRunLogsOnlyItsInputs(thread: EnrollmentRun):
+    messages: list[str] = []
+    sink = browser.logger.add(messages.append, format="{message}")
+    try:
+        thread.run()
+    finally:
+        browser.logger.remove(sink)
+
+    (line,) = [line for line in messages if "input parameters" in line]
+    assert "'dryRun': False" in line
+    assert PASSWORD not in line
+    assert "Event" not in line
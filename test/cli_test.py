@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import EMAIL, PASSWORD
+
+from cli import main, parseStart, readCredentials
+from services.nonio_mock import MockNonio
+
+SCRIPT = """
+import json, sys
+import cli
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def testCredentialsFromFileOrEnvironment(
+    monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    monkeypatch.setenv("PLANNEI_EMAIL", "env@student.uc.pt")
+    monkeypatch.setenv("PLANNEI_PASSWORD", "secret")
+
+    assert readCredentials(None) == ("env@student.uc.pt", "secret")
+
+    path = os.path.join(tmp_path, "credentials")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("file@student.uc.pt\npass word\n")
+
+    assert readCredentials(path) == ("file@student.uc.pt", "pass word")
+
+
+def testDirectRun(
+    mockNonio: MockNonio,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path,
+    capsys: pytest.CaptureFixture,
+):
+    tablePath = os.path.join(tmp_path, "table.csv")
+    mockNonio.writeTable(tablePath, 2)
+    monkeypatch.setenv("PLANNEI_EMAIL", EMAIL)
+    monkeypatch.setenv("PLANNEI_PASSWORD", PASSWORD)
+
+    assert main([tablePath, "--engine", "direct"]) == 0
+
+    assert len(mockNonio.saved) == 2
+    assert "[SUCCESS] Final choices were:" in capsys.readouterr().out
+
+
+def testFailedLoginExitsWithError(
+    mockNonio: MockNonio,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path,
+    capsys: pytest.CaptureFixture,
+):
+    tablePath = os.path.join(tmp_path, "table.csv")
+    mockNonio.writeTable(tablePath, 1)
+    monkeypatch.setenv("PLANNEI_EMAIL", EMAIL)
+    monkeypatch.setenv("PLANNEI_PASSWORD", "wrong")
+
+    assert main([tablePath, "--engine", "direct"]) == 1
+
+    assert "[ERROR] Login failed" in capsys.readouterr().out
+
+
+def testRunnerDoesNotImportQt(tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        env={
+            **os.environ,
+            "PYTHONPATH": "src",
+            "PLANNEI_DATA_PATH": str(tmp_path),
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = json.loads(result.stdout.splitlines()[-1])
+
+    assert [
+        name
+        for name in modules
+        if name.startswith(("PySide6", "shiboken6", "qfluentwidgets"))
+    ] == []
+
+
+def testPassedStartTimeIsTomorrow():
+    past = datetime.now() - timedelta(minutes=1)
+    start = parseStart(f"{past:%H:%M:%S}")
+
+    assert start > datetime.now()
+    assert start - past < timedelta(days=1)
@@ -0,0 +1,55 @@
+import threading
+import time
+from datetime import datetime
+from email.utils import formatdate
+
+from services.clock import ClockOffset, nextOccurrence, sleepUntil
+
+
+def testOffsetNarrowsBelowASecond():
+    clock = ClockOffset()
+    offset = 2.345
+    latency = 0.03
+    local = 1_700_000_000.0
+    for _ in range(12):
+        local += 0.3
+        sentAt = local
+        server = sentAt + latency / 2 + offset
+        receivedAt = sentAt + latency
+        assert clock.add(
+            sentAt, receivedAt, formatdate(int(server), usegmt=True)
+        )
+
+    assert abs(clock.offset - offset) <= clock.uncertainty
+    assert clock.uncertainty < 0.1
+
+
+def testOffsetIgnoresMissingDate():
+    clock = ClockOffset()
+    assert not clock.add(0, 1, None)
+    assert not clock.add(0, 1, "not a date")
+    assert clock.offset == 0
+
+
+def testSleepUntilIsPrecise():
+    deadline = time.time() + 0.2
+    assert sleepUntil(deadline)
+    assert 0 <= time.time() - deadline < 0.01
+
+
+def testSleepUntilWakesOnEvent():
+    event = threading.Event()
+    threading.Timer(0.05, event.set).start()
+    assert not sleepUntil(time.time() + 5, event)
+
+
+def testPassedTimeRollsOverToTomorrow():
+    now = datetime(2026, 10, 18, 12, 0, 0)
+
+    assert nextOccurrence(datetime(1, 1, 1, 13).time(), now) == datetime(
+        2026, 10, 18, 13
+    )
+    assert nextOccurrence(datetime(1, 1, 1, 9).time(), now) == datetime(
+        2026, 10, 19, 9
+    )
+    assert nextOccurrence(now.time(), now) == datetime(2026, 10, 19, 12)
@@ -0,0 +1,164 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from config.metadata import DATA_PATH
+from services import browser, drivers, links, nonio, plan, recorder, sessions
+from services.nonio_mock import MockNonio
+
+PAGES_PATH = os.path.join(os.path.dirname(__file__), "pages")
+
+EMAIL = "student@student.uc.pt"
+PASSWORD = "password"
+SESSION = "JSESSIONID=recorded"
+
+
+class RecordedNonio(BaseHTTPRequestHandler):
+    """Serves the recorded nonio pages and keeps every saved form."""
+
+    saved: list[list[tuple[str, str]]] = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def page(self, name: str, status: int = 200, headers: dict = {}):
+        with open(os.path.join(PAGES_PATH, name), "rb") as file:
+            body = file.read()
+        if name == "course.html" and self.saved:
+            body = self.keepSaved(body.decode()).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def keepSaved(self, text: str) -> str:
+        """Checks the classes of the last save, like the course page shows them once they are kept."""
+        for name, value in self.saved[-1]:
+            if not name.startswith("turma"):
+                continue
+            text = re.sub(
+                rf'(<input [^>]*name="{name}"[^>]*?)(?: checked="checked")?>',
+                lambda match: match[1]
+                + (
+                    ' checked="checked"'
+                    if f'value="{value}"' in match[1]
+                    else ""
+                )
+                + ">",
+                text,
+            )
+        return text
+
+    def redirect(self, location: str, headers: dict = {}):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def loggedIn(self) -> bool:
+        return SESSION in self.headers.get("Cookie", "")
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/nonio/security/login.do":
+            if self.loggedIn():
+                return self.redirect("/nonio/dashboard/dashboard.do")
+            return self.page("login.html")
+        if not self.loggedIn():
+            return self.redirect("/nonio/security/login.do")
+        if path == "/nonio/dashboard/dashboard.do":
+            return self.page("dashboard.html")
+        if path == "/nonio/inscturmas/init.do":
+            return self.page("init.html")
+        if path == "/nonio/inscturmas/listaInscricoes.do":
+            return self.page("courses.html")
+        if path == "/nonio/inscturmas/inscrever.do":
+            if "01000010" in self.path:
+                return self.page("course.html")
+            return self.page("closed.html")
+        self.send_error(404)
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        length = int(self.headers.get("Content-Length", 0))
+        fields = parse_qsl(self.rfile.read(length).decode())
+        if path == "/nonio/security/login.do":
+            form = dict(fields)
+            if (form.get("username"), form.get("password")) == (
+                EMAIL,
+                PASSWORD,
+            ):
+                return self.redirect(
+                    "/nonio/dashboard/dashboard.do",
+                    {"Set-Cookie": f"{SESSION}; Path=/; HttpOnly"},
+                )
+            return self.page("login.html")
+        if not self.loggedIn():
+            return self.redirect("/nonio/security/login.do")
+        if path == "/nonio/inscturmas/gravar.do":
+            self.saved.append(fields)
+            return self.redirect("/nonio/inscturmas/init.do")
+        self.send_error(404)
+
+
+def pointAt(monkeypatch: pytest.MonkeyPatch, base: str):
+    for module in (nonio, browser):
+        monkeypatch.setattr(module, "BASE_URL", base)
+        monkeypatch.setattr(
+            module, "LOGIN_URL", f"{base}/nonio/security/login.do"
+        )
+        monkeypatch.setattr(
+            module, "ENROLL_URL", f"{base}/nonio/inscturmas/init.do"
+        )
+
+
+DATA_PATHS = (
+    (plan, "PLANS_PATH"),
+    (drivers, "DRIVERS_PATH"),
+    (links, "LINKS_PATH"),
+    (sessions, "SESSIONS_PATH"),
+    (recorder, "RECORDINGS_PATH"),
+)
+"""Files and folders the services keep in the app data folder."""
+
+
+@pytest.fixture(autouse=True)
+def dataPath(monkeypatch: pytest.MonkeyPatch, tmp_path) -> str:
+    """Moves everything the services keep in the app data folder into the test folder."""
+    path = os.path.join(tmp_path, "data")
+    for module, name in DATA_PATHS:
+        relative = os.path.relpath(getattr(module, name), DATA_PATH)
+        monkeypatch.setattr(module, name, os.path.join(path, relative))
+    return path
+
+
+@pytest.fixture
+def recordedNonio(monkeypatch: pytest.MonkeyPatch):
+    RecordedNonio.saved = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordedNonio)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pointAt(monkeypatch, f"http://127.0.0.1:{server.server_address[1]}")
+    # The recorded closed course never opens, so do not keep retrying it for long
+    monkeypatch.setattr(browser, "COURSE_BUDGET", 1)
+    yield RecordedNonio
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mockNonio(monkeypatch: pytest.MonkeyPatch):
+    mock = MockNonio(courses=5, email=EMAIL, password=PASSWORD, seed=0)
+    pointAt(monkeypatch, mock.start())
+    monkeypatch.setattr(browser, "COURSE_BUDGET", 5)
+    yield mock
+    mock.stop()
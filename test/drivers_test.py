@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+from services.drivers import forgetDriver, resolveDriver
+
+
+@pytest.fixture
+def binaries(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """Fake driver and browser files, and a Selenium Manager that counts its lookups."""
+    driverPath = os.path.join(tmp_path, "chromedriver")
+    browserPath = os.path.join(tmp_path, "chrome")
+    for path in (driverPath, browserPath):
+        with open(path, "w") as file:
+            file.write("binary")
+    lookups = []
+
+    def binaryPaths(self, args: list[str]) -> dict:
+        lookups.append(args)
+        return {"driver_path": driverPath, "browser_path": browserPath}
+
+    monkeypatch.setattr(SeleniumManager, "binary_paths", binaryPaths)
+    return driverPath, browserPath, lookups
+
+
+def testResolveDriverIsCached(binaries):
+    driverPath, _, lookups = binaries
+
+    assert resolveDriver("chrome")["driverPath"] == driverPath  # type: ignore
+    assert resolveDriver("chrome")["driverPath"] == driverPath  # type: ignore
+    assert lookups == [["--browser", "chrome"]]
+
+
+def testResolveDriverAgainWhenBrowserChanges(binaries):
+    _, browserPath, lookups = binaries
+    resolveDriver("chrome")
+
+    with open(browserPath, "a") as file:
+        file.write(" updated")
+    resolveDriver("chrome")
+
+    assert len(lookups) == 2
+
+
+def testForgetDriver(binaries):
+    _, _, lookups = binaries
+    resolveDriver("chrome")
+
+    forgetDriver("chrome")
+    resolveDriver("chrome")
+
+    assert len(lookups) == 2
+
+
+def testResolveDriverFailure(monkeypatch: pytest.MonkeyPatch):
+    def binaryPaths(self, args: list[str]) -> dict:
+        raise RuntimeError("no browser")
+
+    monkeypatch.setattr(SeleniumManager, "binary_paths", binaryPaths)
+
+    assert resolveDriver("firefox") is None
@@ -0,0 +1,124 @@
+import os
+import threading
+
+import pytest
+from conftest import EMAIL, PASSWORD
+
+from services import host, nonio, workers
+from services.browser import BrowserChoice, EngineChoice
+from services.host import EngineProcess
+from services.nonio_mock import MockNonio
+from services.workers import ProcessWorker
+
+
+def engineEnvironment(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    # The engine process reads these when it imports, patched modules do not reach it
+    monkeypatch.setenv("PLANNEI_BASE_URL", nonio.BASE_URL)
+    monkeypatch.setenv("PLANNEI_DATA_PATH", str(tmp_path))
+
+
+def startWorker(
+    mock: MockNonio, monkeypatch: pytest.MonkeyPatch, tmp_path, **inputs
+) -> ProcessWorker:
+    engineEnvironment(monkeypatch, tmp_path)
+    tablePath = os.path.join(tmp_path, "table.csv")
+    mock.writeTable(tablePath, 2)
+    worker = ProcessWorker(
+        loginEmail=EMAIL,
+        loginPassword=PASSWORD,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        enrollmentIndex=1,
+        tablePath=tablePath,
+        engineChoice=EngineChoice.DIRECT,
+        **inputs,
+    )
+    worker.engine = EngineProcess()
+    return worker
+
+
+def testProcessRunRelaysOutputAndPicks(
+    mockNonio: MockNonio, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    worker = startWorker(mockNonio, monkeypatch, tmp_path)
+    try:
+        worker.run()
+        lines = [text for text, _ in worker.outputBuffer.drain()]
+        assert worker.engine.alive()
+    finally:
+        worker.engine.close()
+
+    assert len(mockNonio.saved) == 2
+    assert any("Final choices were:" in line for line in lines)
+    logs = os.listdir(os.path.join(tmp_path, "logs"))
+    assert [name for name in logs if name.endswith(".engine.log")] == logs
+    assert worker.picked
+    assert not worker.engine.alive()
+
+
+def testStuckRunIsKilled(
+    mockNonio: MockNonio, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    mockNonio.latency = 30
+    monkeypatch.setattr(host, "STOP_GRACE", 1)
+    monkeypatch.setattr(workers, "STOP_GRACE", 1)
+    worker = startWorker(mockNonio, monkeypatch, tmp_path)
+    timer = threading.Timer(1, worker.stop)
+    timer.start()
+    try:
+        worker.run()
+        lines = [text for text, _ in worker.outputBuffer.drain()]
+        assert not worker.engine.alive()
+    finally:
+        timer.cancel()
+        worker.engine.close()
+
+    assert any("killed" in line for line in lines)
+
+
+def testWarmedUpRunStartsWhenTriggered(
+    mockNonio: MockNonio, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    worker = startWorker(mockNonio, monkeypatch, tmp_path, warmUp=True)
+    timer = threading.Timer(1, worker.trigger)
+    timer.start()
+    try:
+        worker.run()
+        lines = [text for text, _ in worker.outputBuffer.drain()]
+    finally:
+        timer.cancel()
+        worker.engine.close()
+
+    assert lines.index("Starting enrollment") > lines.index(
+        "Warm up complete, press start when the enrollment opens"
+    )
+    assert len(mockNonio.saved) == 2
+
+
+def testBatchRunsInTheEngine(
+    mockNonio: MockNonio, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    engineEnvironment(monkeypatch, tmp_path)
+    mockNonio.writeTable(os.path.join(tmp_path, "table.csv"), 2)
+    manifestPath = os.path.join(tmp_path, "manifest.csv")
+    with open(manifestPath, "w", encoding="utf-8") as file:
+        file.write(f"Email,Password,Table\n{EMAIL},{PASSWORD},table.csv\n")
+    worker = ProcessWorker(
+        command="batch",
+        manifestPath=manifestPath,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        engineChoice=EngineChoice.DIRECT,
+    )
+    worker.engine = EngineProcess()
+    try:
+        worker.run()
+        lines = [text for text, _ in worker.outputBuffer.drain()]
+        assert worker.engine.alive()
+    finally:
+        worker.engine.close()
+
+    assert len(mockNonio.saved) == 2
+    assert "Batch completed, 1 of 1 accounts got classes" in lines
@@ -0,0 +1,32 @@
+import os
+import threading
+
+from utils.json_cache import readJson, writeJson
+
+
+def testConcurrentWritersNeverLeaveHalfWrittenFiles(tmp_path):
+    path = os.path.join(tmp_path, "cache", "links.json")
+
+    def write(writer: int):
+        for number in range(50):
+            writeJson(path, {"writer": writer, "values": list(range(number))})
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert readJson(path)["writer"] in range(4)
+    assert os.listdir(os.path.dirname(path)) == ["links.json"]
+
+
+def testReadJsonOfMissingOrBrokenFile(tmp_path):
+    path = os.path.join(tmp_path, "broken.json")
+
+    assert readJson(path) is None
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("{")
+
+    assert readJson(path) is None
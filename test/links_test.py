@@ -0,0 +1,20 @@
+from services.links import EnrollmentLinks, forgetLinks, readLinks, saveLinks
+
+BASE_URL = "https://inforestudante.uc.pt"
+
+
+def testLinksAreKeptPerAccountAndEnrollment():
+    links: EnrollmentLinks = {
+        "enrollmentText": "Licenciatura",
+        "enrollmentLink": f"{BASE_URL}/nonio/inscturmas/listaInscricoes.do",
+        "courses": {"1": {"href": f"{BASE_URL}/a", "className": "A"}},
+    }
+    saveLinks(BASE_URL, "Student@student.uc.pt", 1, links)
+
+    assert readLinks(BASE_URL, "student@student.uc.pt", 1) == links
+    assert readLinks(BASE_URL, "student@student.uc.pt", 2) is None
+    assert readLinks("http://127.0.0.1", "student@student.uc.pt", 1) is None
+
+    forgetLinks(BASE_URL, "student@student.uc.pt", 1)
+
+    assert readLinks(BASE_URL, "student@student.uc.pt", 1) is None
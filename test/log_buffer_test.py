@@ -0,0 +1,18 @@
+from utils.log_buffer import LogBuffer
+
+
+def testDrainsInOrder():
+    buffer = LogBuffer()
+    buffer.push("first", "INFO")
+    buffer.push("second", "ERROR")
+
+    assert buffer.drain() == [("first", "INFO"), ("second", "ERROR")]
+    assert buffer.drain() == []
+
+
+def testKeepsLatestLines():
+    buffer = LogBuffer(size=3)
+    for index in range(10):
+        buffer.push(str(index), "INFO")
+
+    assert [text for text, _ in buffer.drain()] == ["7", "8", "9"]
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from services.navigation import Cancelled, Navigation, redirected
+
+
+def response(navigation: str, method: str, status: int, redirects: int = 0):
+    return {
+        "navigation": navigation,
+        "redirectCount": redirects,
+        "request": {"method": method, "url": "http://localhost/"},
+        "response": {"status": status},
+    }
+
+
+def later(action, *args):
+    timer = threading.Timer(0.05, action, args)
+    timer.start()
+    return timer
+
+
+def testPageWaitsForLoadAndFinalResponse():
+    navigation = Navigation()
+    # Events are handled on their own threads, so the load can come before the response
+    navigation.onLoaded({"navigation": "1"})
+    navigation.onResponse(response("1", "GET", 302))
+    later(navigation.onResponse, response("1", "GET", 200, 1))
+
+    navigation.waitForPage("1", 1)
+
+    assert [redirected(item) for item in navigation.chain("1")] == [
+        True,
+        False,
+    ]
+
+
+def testPageTimesOut():
+    navigation = Navigation()
+    navigation.onResponse(response("1", "GET", 200))
+
+    with pytest.raises(TimeoutException):
+        navigation.waitForPage("1", 0.05)
+
+
+def testResponseAfterMark():
+    navigation = Navigation()
+    navigation.onResponse(response("1", "POST", 200))
+    since = navigation.mark()
+    later(navigation.onResponse, response("2", "POST", 302))
+
+    found = navigation.waitForResponse(
+        since, lambda item: item["request"]["method"] == "POST", 1
+    )
+
+    assert redirected(found)
+
+
+def testAssetResponsesAreIgnored():
+    navigation = Navigation()
+    navigation.onResponse({**response("1", "GET", 200), "navigation": None})
+
+    assert navigation.mark() == 0
+
+
+def testCancelWakesWaits():
+    navigation = Navigation()
+    later(navigation.cancel)
+
+    with pytest.raises(Cancelled):
+        navigation.waitForPage("1", 5)
@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+import time
+
+from conftest import EMAIL, PASSWORD
+
+from services.browser import BrowserChoice, EnrollmentRun, EngineChoice
+from services.nonio_mock import MockNonio
+from services.solver import parseSlots
+
+
+def runDirect(mock: MockNonio, tablePath: str, courses: int) -> EnrollmentRun:
+    mock.writeTable(tablePath, courses)
+    thread = EnrollmentRun(
+        loginEmail=EMAIL,
+        loginPassword=PASSWORD,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        enrollmentIndex=1,
+        tablePath=tablePath,
+        engineChoice=EngineChoice.DIRECT,
+    )
+    thread.run()
+    return thread
+
+
+def testDirectRunPicksBestClasses(mockNonio: MockNonio, tmp_path):
+    runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 3)
+
+    assert len(mockNonio.saved) == 3
+    assert len(mockNonio.picked) == 9
+    assert all(value.endswith("1") for value in mockNonio.picked.values())
+
+
+def testDirectRunFallsBackWhenFull(mockNonio: MockNonio, tmp_path):
+    course = next(iter(mockNonio.courses.values()))
+    course["classes"]["PL"][0]["seats"] = 0
+
+    runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 1)
+
+    assert mockNonio.picked[(next(iter(mockNonio.courses)), "PL")] == "0PL2"
+
+
+def testDirectRunAvoidsClashes(mockNonio: MockNonio, tmp_path):
+    runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 5)
+
+    slots = [
+        parseSlots(option["schedule"])
+        for (classId, classType), value in mockNonio.picked.items()
+        for option in mockNonio.courses[classId]["classes"][classType]
+        if option["value"] == value
+    ]
+    assert len(slots) == 15
+    assert bin(sum(slots)).count("1") == sum(
+        bin(slot).count("1") for slot in slots
+    )
+
+
+def testDirectRunFallsBackToFreeClass(mockNonio: MockNonio, tmp_path):
+    classId = next(iter(mockNonio.courses))
+    mockNonio.courses[classId]["classes"]["PL"][0]["seats"] = 0
+    tablePath = os.path.join(tmp_path, "table.csv")
+    with open(tablePath, "w", encoding="utf-8") as file:
+        file.write(f"CLASS,PL,TP,T,T/TP\n{classId},1,1,1,\n")
+
+    thread = EnrollmentRun(
+        loginEmail=EMAIL,
+        loginPassword=PASSWORD,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        enrollmentIndex=1,
+        tablePath=tablePath,
+        engineChoice=EngineChoice.DIRECT,
+    )
+    thread.run()
+
+    assert mockNonio.picked[(classId, "PL")] == "0PL2"
+
+
+def testDirectRunRecordsTimings(mockNonio: MockNonio, tmp_path):
+    thread = runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 2)
+
+    phases = {phase["name"]: phase for phase in thread.timings.summary()}
+    assert list(phases)[:5] == [
+        "table",
+        "login",
+        "enrollments",
+        "courses",
+        "wait",
+    ]
+    assert phases["course"]["count"] == 2
+    assert phases["save"]["count"] == 2
+    assert phases["enrollment"]["total"] >= phases["course"]["max"]
+
+
+def testDirectRunBuffersOutput(mockNonio: MockNonio, tmp_path):
+    thread = runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 1)
+
+    lines = thread.outputBuffer.drain()
+    assert lines
+    assert all(isinstance(text, str) for text, _ in lines)
+    assert thread.outputBuffer.drain() == []
+
+
+def testRepeatRunUsesSavedLinks(mockNonio: MockNonio, tmp_path):
+    tablePath = os.path.join(tmp_path, "table.csv")
+    runDirect(mockNonio, tablePath, 2)
+
+    thread = runDirect(mockNonio, tablePath, 2)
+
+    phases = {phase["name"] for phase in thread.timings.summary()}
+    assert "enrollments" not in phases
+    assert "courses" not in phases
+    assert len(thread.picked) == 6
+
+
+def testRepeatRunReusesSession(mockNonio: MockNonio, tmp_path):
+    tablePath = os.path.join(tmp_path, "table.csv")
+    runDirect(mockNonio, tablePath, 1)
+
+    thread = runDirect(mockNonio, tablePath, 1)
+
+    lines = [text for text, _ in thread.outputBuffer.drain()]
+    assert "Already logged in" in lines
+    assert len(mockNonio.sessions) == 1
+
+
+def testExpiredSessionLogsInAgain(mockNonio: MockNonio, tmp_path):
+    tablePath = os.path.join(tmp_path, "table.csv")
+    runDirect(mockNonio, tablePath, 1)
+    mockNonio.sessions.clear()
+
+    thread = runDirect(mockNonio, tablePath, 1)
+
+    lines = [text for text, _ in thread.outputBuffer.drain()]
+    assert "Login successful" in lines
+    assert len(mockNonio.saved) == 2
+
+
+def testStaleLinkIsFoundAgain(mockNonio: MockNonio, tmp_path, dataPath):
+    linksPath = os.path.join(dataPath, "links.json")
+    tablePath = os.path.join(tmp_path, "table.csv")
+    runDirect(mockNonio, tablePath, 2)
+    with open(linksPath, encoding="utf-8") as file:
+        saved = json.load(file)
+    courses = next(iter(saved.values()))["courses"]
+    classId = next(iter(courses))
+    href = courses[classId]["href"]
+    courses[classId]["href"] = href.replace("inscrever.do", "removido.do")
+    with open(linksPath, "w", encoding="utf-8") as file:
+        json.dump(saved, file)
+
+    thread = runDirect(mockNonio, tablePath, 2)
+
+    assert len(thread.picked) == 6
+    with open(linksPath, encoding="utf-8") as file:
+        saved = json.load(file)
+    assert next(iter(saved.values()))["courses"][classId]["href"] == href
+
+
+def testDirectRunRetriesFailedRequests(mockNonio: MockNonio, tmp_path):
+    mockNonio.errorRate = 0.2
+
+    runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 5)
+
+    assert len(mockNonio.picked) == 15
+
+
+def testOverloadedCoursePageKeepsSavedLinks(
+    mockNonio: MockNonio, tmp_path, dataPath
+):
+    linksPath = os.path.join(dataPath, "links.json")
+    tablePath = os.path.join(tmp_path, "table.csv")
+    runDirect(mockNonio, tablePath, 5)
+    modified = os.stat(linksPath).st_mtime_ns
+    mockNonio.errorRate = 0.3
+
+    thread = runDirect(mockNonio, tablePath, 5)
+
+    lines = [text for text, _ in thread.outputBuffer.drain()]
+    assert not any("stale" in line for line in lines)
+    assert os.stat(linksPath).st_mtime_ns == modified
+    assert len(thread.picked) == 15
+
+
+def testRejectedSaveIsRetried(mockNonio: MockNonio, tmp_path):
+    save = mockNonio.save
+    rejected: list[list[tuple[str, str]]] = []
+
+    def rejectFirst(fields: list[tuple[str, str]]) -> bool:
+        if not rejected:
+            rejected.append(fields)
+            return False
+        return save(fields)
+
+    mockNonio.save = rejectFirst  # type: ignore
+    thread = runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 1)
+
+    lines = [text for text, _ in thread.outputBuffer.drain()]
+    assert any("saving failed with status 409" in line for line in lines)
+    assert len(mockNonio.saved) == 1
+    assert len(thread.picked) == 3
+
+
+def testSaveAnsweredInPlaceIsKept(mockNonio: MockNonio, tmp_path):
+    mockNonio.savesInPlace = True
+
+    thread = runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 2)
+
+    lines = [text for text, _ in thread.outputBuffer.drain()]
+    assert not any("Will retry" in line for line in lines)
+    assert len(mockNonio.saved) == 2
+    assert len(thread.picked) == 6
+
+
+def testUnkeptSaveIsRetried(mockNonio: MockNonio, tmp_path):
+    save = mockNonio.save
+    ignored: list[list[tuple[str, str]]] = []
+
+    def ignoreFirst(fields: list[tuple[str, str]]) -> bool:
+        if not ignored:
+            ignored.append(fields)
+            return True
+        return save(fields)
+
+    mockNonio.save = ignoreFirst  # type: ignore
+    thread = runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 1)
+
+    lines = [text for text, _ in thread.outputBuffer.drain()]
+    assert any("the save did not keep" in line for line in lines)
+    assert len(mockNonio.saved) == 1
+    assert len(thread.picked) == 3
+
+
+def testCoursesOnlyOpenAtOpeningTime(mockNonio: MockNonio, tmp_path):
+    mockNonio.opensIn = 0.5
+    mockNonio.reset()
+
+    runDirect(mockNonio, os.path.join(tmp_path, "table.csv"), 2)
+
+    assert len(mockNonio.picked) == 6
+
+
+def testStoppedRunEndsRightAway(mockNonio: MockNonio, tmp_path):
+    mockNonio.opensIn = 60
+    mockNonio.reset()
+    tablePath = os.path.join(tmp_path, "table.csv")
+    mockNonio.writeTable(tablePath, 2)
+    thread = EnrollmentRun(
+        loginEmail=EMAIL,
+        loginPassword=PASSWORD,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        enrollmentIndex=1,
+        tablePath=tablePath,
+        engineChoice=EngineChoice.DIRECT,
+    )
+    runner = threading.Thread(target=thread.run)
+    runner.start()
+    # Every course keeps failing until the enrollment opens, so the run is retrying them
+    deadline = time.monotonic() + 5
+    while mockNonio.requests < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    thread.stop()
+    runner.join(2)
+
+    assert not runner.is_alive()
+    assert mockNonio.saved == []
@@ -0,0 +1,182 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import EMAIL, PASSWORD, RecordedNonio
+
+from services import browser
+from services.browser import BrowserChoice, EnrollmentRun, EngineChoice
+from services.nonio import NonioSession, Page, saveError, unkept
+from services.solver import solve
+
+
+def createThread(dryRun: bool = False, warmUp: bool = False) -> EnrollmentRun:
+    return EnrollmentRun(
+        loginEmail=EMAIL,
+        loginPassword=PASSWORD,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=dryRun,
+        enrollmentIndex=1,
+        tablePath="",
+        engineChoice=EngineChoice.DIRECT,
+        warmUp=warmUp,
+    )
+
+
+def testParseClassTable():
+    with open("test/pages/course.html", encoding="utf-8") as file:
+        page = Page("http://localhost/course", 200, {}, file.read())
+
+    tables = page.displayTables(exact=True)
+    assert len(tables) == 2
+    assert [cells[0].lead for cells in tables[0].rows] == ["PL1", "PL2", "PL3"]
+    assert "disabled" in tables[0].rows[0][-1].inputs[0]
+    assert "checked" in tables[0].rows[2][-1].inputs[0]
+    form = page.formWith("botaoGravar")
+    assert form is not None
+    assert form.fields() == [
+        ("args", "5482"),
+        ("uc", "01000010"),
+        ("turmaPL", "103"),
+    ]
+
+
+def testClassOptions():
+    with open("test/pages/course.html", encoding="utf-8") as file:
+        page = Page("http://localhost/course", 200, {}, file.read())
+
+    options, checkboxes = page.classOptions("PL", dryRun=False)
+    assert [option["number"] for option in options] == ["1", "2", "3"]
+    assert checkboxes[options[1]["index"]]["value"] == "102"
+    assert options[0]["schedule"] == "Segunda 09:00 - 11:00"
+    assert solve([(["1", "2"], options, None)]) == [options[1]]
+    assert solve([(["3", "2"], options, None)]) == [options[2]]
+
+    previews, checkboxes = page.classOptions("PL", dryRun=True)
+    assert not any(option["disabled"] for option in previews)
+    assert checkboxes[0]["name"] == "preview"
+
+
+def testSaveError():
+    page = Page("", 200, {}, '<p class="alert alert-danger">Sem vagas</p>')
+
+    assert saveError(302, False) is None
+    assert saveError(409, False) == "saving failed with status 409"
+    assert saveError(200, page.showsError()) is not None
+    assert not Page("", 200, {}, "<p>Turma sem vagas</p>").showsError()
+
+
+def testUnkeptClasses():
+    options = {
+        "PL": [
+            {"number": "1", "checked": False},
+            {"number": "2", "checked": True},
+        ],
+        "TP": [{"number": "1", "checked": False}],
+    }
+
+    assert unkept({"PL": "2", "TP": "1"}, options) == ["TP"]  # type: ignore
+    assert unkept({"PL": "1", "T": "1"}, options) == ["PL", "T"]  # type: ignore
+
+
+def testLogin(recordedNonio: type[RecordedNonio]):
+    session = NonioSession()
+    assert session.login(EMAIL, "wrong") is False
+    assert session.login(EMAIL, PASSWORD) is True
+    assert session.login(EMAIL, PASSWORD) is None
+    session.close()
+
+
+def testDirectEnrollment(recordedNonio: type[RecordedNonio]):
+    thread = createThread()
+    session = NonioSession()
+    classes = {
+        "01000010": {"href": None, "PL": ["1", "2"], "TP": ["2"]},
+        "01000021": {"href": None, "PL": ["1"]},
+    }
+    for classData in classes.values():
+        for classType in ("PL", "TP", "T", "T/TP"):
+            classData.setdefault(classType, None)
+
+    thread.enrollDirect(session, classes)  # type: ignore
+    session.close()
+
+    assert recordedNonio.saved == [
+        [
+            ("args", "5482"),
+            ("uc", "01000010"),
+            ("turmaPL", "102"),
+            ("turmaTP", "202"),
+            ("gravar", "Gravar"),
+        ]
+    ]
+
+
+def testDirectDryRun(recordedNonio: type[RecordedNonio]):
+    thread = createThread(dryRun=True)
+    session = NonioSession()
+    classes = {"01000010": {"href": None, "PL": ["3"], "TP": None}}
+    for classData in classes.values():
+        classData.update({"T": None, "T/TP": None})
+
+    thread.enrollDirect(session, classes)  # type: ignore
+    session.close()
+
+    assert recordedNonio.saved == []
+
+
+def testWarmUpWaitsForTrigger(
+    recordedNonio: type[RecordedNonio], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(browser, "KEEPALIVE_INTERVAL", 0.01)
+    thread = createThread(warmUp=True)
+    session = NonioSession()
+    classes = {"01000010": {"href": None, "PL": ["2"]}}
+    for classData in classes.values():
+        classData.update({"TP": None, "T": None, "T/TP": None})
+
+    keepalives = []
+    original = session.get
+    monkeypatch.setattr(
+        session, "get", lambda url: (keepalives.append(url), original(url))[1]
+    )
+    worker = threading.Thread(
+        target=thread.enrollDirect,
+        args=(session, classes),
+    )
+    worker.start()
+    worker.join(0.5)
+
+    assert worker.is_alive()
+    assert recordedNonio.saved == []
+    assert len(keepalives) > 3
+
+    thread.trigger()
+    worker.join(5)
+    session.close()
+
+    assert not worker.is_alive()
+    assert len(recordedNonio.saved) == 1
+
+
+def testScheduledStart(
+    recordedNonio: type[RecordedNonio], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(browser, "CLOCK_SAMPLES", 2)
+    monkeypatch.setattr(browser, "CLOCK_SAMPLE_SPACING", 0.01)
+    thread = createThread()
+    thread.warmUp = True
+    thread.startAt = datetime.now() + timedelta(seconds=1.5)
+    session = NonioSession()
+    classes = {"01000010": {"href": None, "PL": ["2"]}}
+    for classData in classes.values():
+        classData.update({"TP": None, "T": None, "T/TP": None})
+
+    thread.enrollDirect(session, classes)  # type: ignore
+    session.close()
+
+    # The recorded server clock only has second resolution, so allow for it
+    assert time.time() > thread.startAt.timestamp() - 1
+    assert len(recordedNonio.saved) == 1
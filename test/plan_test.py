@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from services import plan
+from services.plan import compilePlan, loadPlan
+
+
+def testCompileExampleTable():
+    classes = compilePlan("example/table.csv")
+
+    assert classes["01000010"] == {
+        "href": None,
+        "PL": ["3", "2"],
+        "TP": ["1", "2"],
+        "T": ["1"],
+        "T/TP": None,
+    }
+
+
+def testCompileRejectsWrongColumns(tmp_path):
+    path = os.path.join(tmp_path, "table.csv")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("CLASS,PL\n01000010,1\n")
+
+    with pytest.raises(ValueError, match="exactly 5 columns"):
+        compilePlan(path)
+
+
+def testLoadPlanUsesCacheUntilFileChanges(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    path = os.path.join(tmp_path, "table.csv")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("CLASS,PL,TP,T,T/TP\n01000010,1 # 2,,,\n")
+    compiled = []
+
+    def compileCounted(path: str):
+        compiled.append(path)
+        return compilePlan(path)
+
+    monkeypatch.setattr(plan, "compilePlan", compileCounted)
+
+    assert loadPlan(path)["01000010"]["PL"] == ["1", "2"]
+    assert loadPlan(path)["01000010"]["PL"] == ["1", "2"]
+    assert len(compiled) == 1
+
+    # Touching the file without changing it is caught by the hash
+    os.utime(path, ns=(0, 0))
+    loadPlan(path)
+    assert len(compiled) == 1
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("CLASS,PL,TP,T,T/TP\n01000010,3,,,\n")
+    assert loadPlan(path)["01000010"]["PL"] == ["3"]
+    assert len(compiled) == 2
@@ -0,0 +1,106 @@
+import threading
+
+from services.pool import DriverPool
+
+KEY = ("chrome", True, True)
+
+
+class FakeDriver:
+    """Records the calls a pool makes, with a second tab left open by the last run."""
+
+    def __init__(self):
+        self.window_handles = ["first", "second"]
+        self.cookies = True
+        self.url = "http://localhost/page"
+        self.quitted = False
+        self.switch_to = self
+        self.storage = self
+
+    def window(self, handle: str):
+        self.current = handle
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def delete_cookies(self):
+        self.cookies = False
+
+    def get(self, url: str):
+        self.url = url
+
+    def quit(self):
+        self.quitted = True
+
+
+def testReleasedBrowserIsResetAndReused():
+    pool = DriverPool()
+    driver = FakeDriver()
+    pool.track(driver)  # type: ignore
+
+    pool.release(KEY, driver)  # type: ignore
+
+    assert driver.window_handles == ["first"]
+    assert not driver.cookies
+    assert driver.url == "about:blank"
+    assert pool.acquire(("firefox", True, True)) is None
+    assert pool.acquire(KEY) is driver
+    assert pool.acquire(KEY) is None
+
+
+def testAcquireWaitsForPrewarmedBrowser():
+    pool = DriverPool()
+    started = threading.Event()
+    driver = FakeDriver()
+
+    def start():
+        started.wait(1)
+        return driver
+
+    pool.prewarm(KEY, start)  # type: ignore
+    pool.prewarm(KEY, FakeDriver)  # type: ignore
+    started.set()
+
+    assert pool.acquire(KEY) is driver
+    assert pool.acquire(KEY) is None
+
+
+def testIdleBrowsersAreBounded():
+    pool = DriverPool(limit=1)
+    first, second = FakeDriver(), FakeDriver()
+
+    pool.release(KEY, first)  # type: ignore
+    pool.release(KEY, second)  # type: ignore
+
+    assert first.quitted
+    assert pool.acquire(KEY) is second
+
+
+def testCloseQuitsEveryBrowser():
+    pool = DriverPool()
+    idle, leased = FakeDriver(), FakeDriver()
+    pool.release(KEY, idle)  # type: ignore
+    pool.track(leased)  # type: ignore
+
+    pool.close()
+    pool.release(KEY, leased)  # type: ignore
+
+    assert idle.quitted
+    assert leased.quitted
+    assert pool.acquire(KEY) is None
+
+
+def testClearQuitsIdleBrowsersOnly():
+    pool = DriverPool()
+    idle, leased = FakeDriver(), FakeDriver()
+    pool.release(KEY, idle)  # type: ignore
+    pool.track(leased)  # type: ignore
+
+    pool.clear()
+
+    assert idle.quitted
+    assert not leased.quitted
+    assert pool.acquire(KEY) is None
+
+    pool.release(KEY, leased)  # type: ignore
+
+    assert pool.acquire(KEY) is leased
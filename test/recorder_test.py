@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from conftest import EMAIL, PASSWORD
+
+from services.browser import BrowserChoice, EnrollmentRun, EngineChoice
+from services.nonio_mock import MockNonio
+from services.recorder import Recorder, replay
+
+
+def testReplayReadsRecordedPages(tmp_path):
+    path = os.path.join(tmp_path, "run.zip")
+    recorder = Recorder(path, engine="direct", dryRun=False)
+    for kind, name in (
+        ("enrollments", "init.html"),
+        ("courses", "courses.html"),
+        ("course", "course.html"),
+    ):
+        with open(f"test/pages/{name}", encoding="utf-8") as file:
+            recorder.page(kind, f"http://localhost/{name}", file.read())
+    recorder.action("click", target="save")
+    recorder.close({"total": 1.0, "spans": []})
+    recorder.page("course", "http://localhost/late", "")
+
+    run, results = replay(path)
+
+    assert run["engine"] == "direct"
+    assert [action["name"] for action in run["actions"]] == ["click"]
+    assert [result["kind"] for result in results] == [
+        "enrollments",
+        "courses",
+        "course",
+    ]
+    assert results[0]["result"]["enrollments"][0][1] is not None
+    assert "01000010" in results[1]["result"]["courses"]
+    course = results[2]["result"]
+    assert course["coursePage"] and course["open"]
+    assert [option["number"] for option in course["options"]["PL"]] == [
+        "1",
+        "2",
+        "3",
+    ]
+
+
+def testBrowserRunIsNotReplayed(tmp_path):
+    path = os.path.join(tmp_path, "run.zip")
+    recorder = Recorder(path, engine="browser", dryRun=False)
+    recorder.close({"total": 1.0, "spans": []})
+
+    with pytest.raises(ValueError, match="browser engine"):
+        replay(path)
+
+
+def testRecordedRunReplays(mockNonio: MockNonio, tmp_path, dataPath):
+    tablePath = os.path.join(tmp_path, "table.csv")
+    mockNonio.writeTable(tablePath, 2)
+    thread = EnrollmentRun(
+        loginEmail=EMAIL,
+        loginPassword=PASSWORD,
+        browserChoice=BrowserChoice.CHROME,
+        headless=True,
+        dryRun=False,
+        enrollmentIndex=1,
+        tablePath=tablePath,
+        engineChoice=EngineChoice.DIRECT,
+        recordRun=True,
+    )
+    thread.run()
+
+    recordingsPath = os.path.join(dataPath, "recordings")
+    (archive,) = os.listdir(recordingsPath)
+    run, results = replay(os.path.join(recordingsPath, archive))
+
+    assert [result["kind"] for result in results] == [
+        "enrollments",
+        "courses",
+        "course",
+        "course",
+    ]
+    assert all(
+        result["result"]["coursePage"] and result["result"]["options"]["PL"]
+        for result in results[2:]
+    )
+    assert len(results[1]["result"]["courses"]) == len(mockNonio.courses)
+    assert sum(action["name"] == "submit" for action in run["actions"]) == 2
+    assert all(response["duration"] >= 0 for response in run["responses"])
+    assert any(span["name"] == "save" for span in run["timings"]["spans"])
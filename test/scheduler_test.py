@@ -0,0 +1,103 @@
+import threading
+import time
+
+from services.scheduler import EnrollmentQueue
+
+
+def testQueueHandsOutEveryCourseOnce():
+    queue = EnrollmentQueue(["a", "b", "c"], deadline=5, courseBudget=5)
+    visited = []
+    while (classId := queue.next()) is not None:
+        visited.append(classId)
+        queue.done(classId)
+
+    assert visited == ["a", "b", "c"]
+    assert queue.failed == {}
+
+
+def testQueueRetriesWithBackoff():
+    queue = EnrollmentQueue(["a"], deadline=5, courseBudget=5, retryDelay=0.1)
+    visits = []
+    while (classId := queue.next()) is not None:
+        visits.append(time.monotonic())
+        if len(visits) < 3:
+            assert queue.retry(classId, "not open")
+        else:
+            queue.done(classId)
+
+    assert len(visits) == 3
+    assert visits[1] - visits[0] >= 0.05
+    assert visits[2] - visits[1] >= 0.1
+    assert queue.attempts["a"] == 3
+
+
+def testQueueGivesUpAfterCourseBudget():
+    queue = EnrollmentQueue(["a", "b"], deadline=5, courseBudget=0.2)
+    while (classId := queue.next()) is not None:
+        if classId == "a":
+            queue.retry(classId, "not open")
+        else:
+            queue.done(classId)
+
+    assert queue.failed == {"a": "not open"}
+
+
+def testSlowCourseDoesNotBlockOthers():
+    queue = EnrollmentQueue(["slow", "a", "b"], deadline=5, courseBudget=5)
+    visited = []
+
+    def worker(delay: float):
+        while (classId := queue.next()) is not None:
+            time.sleep(delay if classId == "slow" else 0)
+            visited.append(classId)
+            queue.done(classId)
+
+    slow = threading.Thread(target=worker, args=(0.3,))
+    slow.start()
+    time.sleep(0.05)
+    fast = threading.Thread(target=worker, args=(0,))
+    fast.start()
+    fast.join(1)
+    slow.join(1)
+
+    assert visited == ["a", "b", "slow"]
+
+
+def testQueueStopsAtDeadline():
+    queue = EnrollmentQueue(["a"], deadline=0.2, courseBudget=5, retryDelay=1)
+    classId = queue.next()
+    assert classId == "a"
+    assert not queue.retry(classId, "not open")
+    assert queue.next() is None
+    assert queue.failed == {"a": "not open"}
+
+
+def testQueueRevisitsDoneCourses():
+    queue = EnrollmentQueue(["a", "b"], deadline=5, courseBudget=5)
+    visited = []
+    while (classId := queue.next()) is not None:
+        visited.append(classId)
+        if visited == ["a", "b"]:
+            queue.revisit("a")
+            # Asked while it is being visited, so it comes back once that visit ends
+            queue.revisit("b")
+        queue.done(classId)
+
+    assert visited == ["a", "b", "a", "b"]
+
+
+def testStoppedQueueWakesWaitingWorkers():
+    queue = EnrollmentQueue(["a", "b"], deadline=5, courseBudget=5)
+    assert queue.next() == "a"
+    queue.retry("a", "not open")
+    assert queue.next() == "b"
+    results = []
+    waiting = threading.Thread(target=lambda: results.append(queue.next()))
+    waiting.start()
+
+    queue.stop()
+    waiting.join(1)
+
+    assert results == [None]
+    assert queue.failed == {"a": "the run was stopped"}
+    assert not queue.retry("b", "not open")
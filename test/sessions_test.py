@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from services import sessions
+from services.sessions import (
+    forgetSession,
+    prepareCipher,
+    readSession,
+    saveSession,
+)
+
+BASE_URL = "https://inforestudante.uc.pt"
+COOKIES = [
+    {
+        "name": "JSESSIONID",
+        "value": "token",
+        "domain": "inforestudante.uc.pt",
+        "path": "/",
+        "sameSite": "Lax",
+    }
+]
+
+
+def testSessionIsKeptEncryptedPerAccount(dataPath: str):
+    saveSession(BASE_URL, "Student@student.uc.pt", "password", COOKIES)
+
+    with open(
+        os.path.join(dataPath, "sessions.json"), encoding="utf-8"
+    ) as file:
+        assert "token" not in file.read()
+    assert readSession(BASE_URL, "student@student.uc.pt", "password") == [
+        {key: value for key, value in COOKIES[0].items() if key != "sameSite"}
+    ]
+    assert readSession(BASE_URL, "other@student.uc.pt", "password") is None
+    assert readSession(BASE_URL, "student@student.uc.pt", "changed") is None
+
+    forgetSession(BASE_URL, "student@student.uc.pt")
+
+    assert readSession(BASE_URL, "student@student.uc.pt", "password") is None
+
+
+def testExpiredSessionIsNotUsed(monkeypatch: pytest.MonkeyPatch):
+    saveSession(BASE_URL, "student@student.uc.pt", "password", COOKIES)
+    monkeypatch.setattr(sessions, "SESSION_LIFETIME", -1)
+
+    assert readSession(BASE_URL, "student@student.uc.pt", "password") is None
+
+
+def testKeyIsDerivedOnceAheadOfTheLogin(monkeypatch: pytest.MonkeyPatch):
+    derived = []
+    deriveCipher = sessions.deriveCipher
+    monkeypatch.setattr(sessions, "keys", {})
+    monkeypatch.setattr(
+        sessions,
+        "deriveCipher",
+        lambda email, password: (
+            derived.append(email) or deriveCipher(email, password)
+        ),
+    )
+
+    prepareCipher(" Student@student.uc.pt", "password").result()
+    saveSession(BASE_URL, "student@student.uc.pt", "password", COOKIES)
+
+    assert readSession(BASE_URL, "student@student.uc.pt", "password")
+    assert derived == ["student@student.uc.pt"]
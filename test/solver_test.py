@@ -0,0 +1,98 @@
+from services.nonio import ClassOption
+from services.solver import Timetable, parseSlots, solve
+
+
+def option(
+    number: str, schedule: str, disabled: bool = False, checked: bool = False
+) -> ClassOption:
+    return {
+        "number": number,
+        "checked": checked,
+        "disabled": disabled,
+        "index": 0,
+        "schedule": schedule,
+    }
+
+
+def testParseSlots():
+    monday = parseSlots("Segunda 09:00 - 11:00")
+
+    assert bin(monday).count("1") == 4
+    assert monday & parseSlots("Segunda 10:30 - 12:00")
+    assert not monday & parseSlots("Segunda 11:00 - 13:00")
+    assert not monday & parseSlots("Terça 09:00 - 11:00")
+    assert parseSlots("Seg 9h00 - 11h00, Qua 09:00 - 11:00") & monday
+    assert parseSlots("A combinar") == 0
+
+
+def testSolveAvoidsClashes():
+    pl = [
+        option("1", "Segunda 09:00 - 11:00"),
+        option("2", "Terça 09:00 - 11:00"),
+    ]
+    tp = [
+        option("1", "Segunda 10:00 - 12:00"),
+        option("2", "Quarta 10:00 - 12:00"),
+    ]
+
+    # Keeping the first preference of one type beats the second of both
+    assert solve([(["1", "2"], pl, None), (["1", "2"], tp, None)]) == [
+        pl[0],
+        tp[1],
+    ]
+    assert solve(
+        [(["1", "2"], pl, None)], taken=parseSlots("Segunda 08:00 - 10:00")
+    ) == [pl[1]]
+
+
+def testSolveFallsBackToFreeOptions():
+    pl = [
+        option("1", "Segunda 09:00 - 11:00", disabled=True),
+        option("2", "Terça 09:00 - 11:00", disabled=True),
+        option("3", "Quarta 09:00 - 11:00"),
+        option("4", "Quinta 09:00 - 11:00", checked=True, disabled=True),
+    ]
+
+    assert solve([(["1", "2"], pl, None)]) == [pl[2]]
+    assert solve([(["1", "4"], pl, None)]) == [pl[3]]
+    assert solve([(["1"], pl[:2], None)]) == [None]
+
+
+def testSolveKeepsCurrentPicksOnTies():
+    pl = [
+        option("1", "Segunda 09:00 - 11:00"),
+        option("2", "Terça 09:00 - 11:00"),
+    ]
+    tp = [option("1", "Segunda 09:00 - 11:00")]
+
+    # Moving either class costs one rank, so the one that was not picked yet moves
+    assert solve([(["1", "2"], pl, None), (["1", "2"], pl, "1")]) == [
+        pl[1],
+        pl[0],
+    ]
+    assert solve([(["1", "2"], pl, "1"), (["1"], tp, None)]) == [
+        pl[1],
+        tp[0],
+    ]
+
+
+def testTimetableRevisitsCoursesThatHaveToChange():
+    timetable = Timetable()
+    first = {
+        "PL": [
+            option("1", "Segunda 09:00 - 11:00"),
+            option("2", "Terça 09:00 - 11:00"),
+        ]
+    }
+    second = {"TP": [option("1", "Segunda 09:00 - 11:00")]}
+
+    assert timetable.pick("a", {"PL": ["1", "2"]}, first) == {
+        "PL": first["PL"][0]
+    }
+    assert timetable.takeRevisits() == {}
+    assert timetable.pick("b", {"TP": ["1"]}, second) == {"TP": second["TP"][0]}
+    assert timetable.takeRevisits() == {"a": {"PL"}}
+    assert timetable.pick("a", {"PL": ["1", "2"]}, first) == {
+        "PL": first["PL"][1]
+    }
+    assert timetable.takeRevisits() == {}
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+from utils.preload import PRELOAD_MODULES
+
+SCRIPT = """
+import json, sys
+import window
+print(json.dumps(sorted(sys.modules)))
+"""
+
+PRELOAD_SCRIPT = """
+import json, sys
+from utils.preload import PRELOAD_MODULES
+for name in PRELOAD_MODULES:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+print(json.dumps(sorted(sys.modules)))
+"""
+
+SHOW_SCRIPT = """
+import json, sys, time
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+from window import Window
+window = Window()
+window.show()
+app.processEvents()
+# Gives anything started in the background time to import what it needs
+time.sleep(1)
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def importedBy(script: str, dataPath: str = "") -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env={
+            **os.environ,
+            "PYTHONPATH": "src",
+            "QT_QPA_PLATFORM": "offscreen",
+            "PLANNEI_DATA_PATH": dataPath,
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def testWindowImportSkipsPreloadedModules():
+    modules = importedBy(SCRIPT)
+
+    assert [name for name in PRELOAD_MODULES if name in modules] == []
+    assert "selenium" not in modules
+
+
+def testPreloadLeavesSeleniumToTheEngine():
+    assert "selenium" not in importedBy(PRELOAD_SCRIPT)
+
+
+def testShownWindowLeavesSeleniumToTheEngine(tmp_path):
+    assert "selenium" not in importedBy(SHOW_SCRIPT, str(tmp_path))
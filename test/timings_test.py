@@ -0,0 +1,54 @@
+import threading
+
+from utils.timings import LatencyWindow, Timings
+
+
+def testSummaryGroupsSpans():
+    timings = Timings()
+    with timings.span("login"):
+        pass
+    for course in ("a", "b"):
+        with timings.span("course", course=course):
+            pass
+
+    summary = timings.summary()
+
+    assert [phase["name"] for phase in summary] == ["login", "course"]
+    assert summary[1]["count"] == 2
+    assert summary[1]["max"] <= summary[1]["total"]
+
+
+def testSpansFromManyThreads():
+    timings = Timings()
+
+    def visit():
+        with timings.span("course"):
+            pass
+
+    threads = [threading.Thread(target=visit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert timings.summary()[0]["count"] == 8
+
+
+def testLatencyTimeoutFollowsSamples():
+    window = LatencyWindow()
+    assert window.timeout(10, 2, 30) == 10
+
+    for _ in range(10):
+        window.add(0.1)
+    assert window.timeout(10, 2, 30) == 2
+
+    for _ in range(10):
+        window.add(5)
+    assert window.timeout(10, 2, 30) == 20
+
+    # A single outlier does not stretch the timeout, a slow streak does
+    window.add(60)
+    assert window.timeout(10, 2, 30) == 20
+    for _ in range(4):
+        window.add(60)
+    assert window.timeout(10, 2, 30) == 30
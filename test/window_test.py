@@ -1,6 +1,11 @@
+from datetime import datetime, timedelta
+
 from PySide6 import QtCore
 from pytestqt.qtbot import QtBot
 
+from pages.home import HomePage
+from pages.lazy import LazyPage
+from pages.settings import SettingsPage
 from window import Window
 
 
@@ -25,3 +30,35 @@ def testExitButton(qtbot: QtBot):
     qtbot.mouseClick(window.titleBar.closeBtn, QtCore.Qt.MouseButton.LeftButton)
 
     assert not window.isVisible()
+
+
+def testSettingsBuiltOnFirstShow(qtbot: QtBot):
+    window = Window()
+    qtbot.addWidget(window)
+    window.show()
+    settings = window.findChild(LazyPage, "Settings")
+
+    assert settings is not None
+    assert settings.page is None
+
+    window.switchTo(settings)
+
+    assert isinstance(settings.page, SettingsPage)
+
+
+def testPassedScheduledStartIsTomorrow(qtbot: QtBot):
+    home = HomePage()
+    qtbot.addWidget(home)
+    past = datetime.now() - timedelta(minutes=1)
+    home.startTimePicker.setTime(
+        QtCore.QTime(past.hour, past.minute, past.second)
+    )
+
+    assert home.scheduledStart() is None
+
+    home.scheduledStartCheckBox.setChecked(True)
+    start = home.scheduledStart()
+
+    assert start is not None
+    assert start > datetime.now()
+    assert start - past < timedelta(days=1)